@@ -1,6 +1,7 @@
 # app.py
 from flask import Flask, render_template, redirect, url_for
 from flask_wtf.csrf import CSRFProtect
+import click
 from dotenv import load_dotenv
 from datetime import timedelta
 from utils.api_client import APIClient
@@ -8,7 +9,7 @@ import os
 import logging
 
 # 🔑 Extensiones
-from extensions import login_manager
+from extensions import compress, login_manager
 
 # 🔹 Blueprints
 from views.vistaLogin import login_bp
@@ -18,6 +19,13 @@ from views.vistaSoluciones import soluciones_bp
 from views.vistaPerfil import perfil_bp
 from views.vistaDashboard import dashboard_bp
 from views.vistaMain import main_bp
+from views.vistaImportar import importar_bp
+from views.vistaExportar import exportar_bp
+from views.vistaBuscar import buscar_bp
+from views.vistaEstadisticas import estadisticas_bp
+from views.vistaArchivos import archivos_bp
+from views.vistaMedia import media_bp
+from views.vistaAssets import assets_bp
 
 
 
@@ -35,6 +43,21 @@ app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY")
 if not app.config["SECRET_KEY"]:
     raise ValueError("❌ SECRET_KEY no encontrada en las variables de entorno")
 
+# Media: envío delegado al servidor web (ver config_flask)
+from config_flask import MEDIA_ACCEL_REDIRECT, MEDIA_GC_INTERVAL, MEDIA_X_SENDFILE
+app.config["USE_X_SENDFILE"] = MEDIA_X_SENDFILE
+app.config["MEDIA_ACCEL_REDIRECT"] = MEDIA_ACCEL_REDIRECT
+if MEDIA_GC_INTERVAL:
+    from utils import media_gc
+    media_gc.start(MEDIA_GC_INTERVAL)
+
+# Compresión: HTML y JSON al vuelo; los estáticos, ya comprimidos en el build
+from config_flask import COMPRESS_CONFIG
+from views.vistaAssets import servir_estatico
+app.config.update(COMPRESS_CONFIG)
+compress.init_app(app)
+app.view_functions["static"] = servir_estatico
+
     # Inicializar extensiones
 login_manager.init_app(app)
 login_manager.login_view = "login.login_view"
@@ -75,6 +98,13 @@ app.register_blueprint(soluciones_bp)
 app.register_blueprint(perfil_bp, url_prefix='/perfil')
 app.register_blueprint(dashboard_bp, url_prefix='/dashboard')
 app.register_blueprint(main_bp, url_prefix='/')
+app.register_blueprint(importar_bp, url_prefix='/importar')
+app.register_blueprint(exportar_bp, url_prefix='/exportar')
+app.register_blueprint(buscar_bp, url_prefix='/buscar')
+app.register_blueprint(estadisticas_bp, url_prefix='/estadisticas')
+app.register_blueprint(archivos_bp, url_prefix='/archivos')
+app.register_blueprint(media_bp, url_prefix='/media')
+app.register_blueprint(assets_bp, url_prefix='/assets')
 
 
 @app.errorhandler(404)
@@ -85,6 +115,67 @@ def page_not_found(e):
 def internal_server_error(e):
     return render_template('error/500.html'), 500
 
+@app.cli.command("reindexar-busqueda")
+def reindexar_busqueda():
+    """Reconstruye el índice de búsqueda de ideas, soluciones y oportunidades."""
+    from utils import search_index
+    total = search_index.rebuild()
+    print(f"✅ Índice de búsqueda reconstruido: {total} documentos")
+
+@app.cli.command("reindexar-duplicados")
+def reindexar_duplicados():
+    """Reconstruye el índice de ideas parecidas (posibles duplicados)."""
+    from utils import duplicates
+    ix = duplicates.rebuild()
+    print(f"✅ Índice de duplicados reconstruido: {len(ix.signatures)} ideas")
+
+@app.cli.command("migrar-archivos")
+def migrar_archivos():
+    """Pasa los archivos multimedia anteriores al almacenamiento por contenido."""
+    from utils import file_storage
+    from utils.catalogs import ENTITIES
+    for entity in ENTITIES:
+        stats = file_storage.migrate_legacy(entity)
+        print(f"✅ {entity}: {stats['migrados']} migrados, {stats['sin_archivo']} sin archivo local, {stats['errores']} errores")
+
+@app.cli.command("migrar-almacenamiento")
+@click.argument("destino")
+def migrar_almacenamiento(destino):
+    """Copia los blobs del backend configurado al backend DESTINO (local o s3)."""
+    from utils import file_storage, storage
+    stats = file_storage.copy_to_backend(storage.create_backend(destino))
+    print(f"✅ {stats['copiados']} copiados, {stats['existentes']} ya existían, {stats['errores']} errores")
+
+@app.cli.command("construir-assets")
+def construir_assets():
+    """Construye los paquetes CSS/JS con hash y su manifiesto (static/dist) y precomprime los assets."""
+    from utils import assets
+    manifest = assets.build()
+    for name in sorted(manifest):
+        print(f"  {name} -> {manifest[name]}")
+    print(f"✅ {len(manifest)} archivos en {assets.DIST_DIR}")
+    stats = assets.precompress()
+    print(f"✅ {stats['archivos']} archivos precomprimidos: {stats['bytes']} -> {stats['bytes_br']} bytes con brotli")
+
+@app.cli.command("limpiar-archivos")
+@click.option("--eliminar", is_flag=True, help="Elimina los huérfanos en lugar de sólo informarlos.")
+def limpiar_archivos(eliminar):
+    """Informa (y con --eliminar borra) los archivos que ningún registro usa."""
+    from utils import media_gc
+    report = media_gc.run(delete=eliminar)
+    print(f"Registros: {report['registros']} · blobs: {report['blobs']} ({report['blobs_bytes']} bytes)")
+    print(f"Huérfanos: {report['huerfanos_total']} ({report['huerfanos_bytes']} bytes)")
+    for item in report["huerfanos"]:
+        print(f"  {item['ruta']}  {item['bytes']} bytes, {item['dias']} días")
+    print(f"Duplicados: {report['duplicados_total']} ({report['duplicados_bytes']} bytes)")
+    for item in report["duplicados"]:
+        print(f"  {item['ruta']}  {item['bytes']} bytes")
+    if report["faltantes"]:
+        print(f"⚠️ {report['faltantes']} blobs referenciados no existen")
+    if eliminar:
+        print(f"✅ {report['eliminados']} eliminados, {report['bytes_liberados']} bytes liberados, "
+              f"{report['subidas_vencidas']} subidas vencidas, {report['errores']} errores")
+
 @app.route('/test_template')
 def test_template():
     import os
@@ -43,7 +43,79 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
+# Archivos subidos, guardados una sola vez por contenido (SHA-256)
+BLOB_ROOT = os.path.join(MEDIA_ROOT, 'blobs')
+BLOB_URL = MEDIA_URL + 'blobs/'
+# Archivos internos (temporales al guardar un blob, subidas por partes e
+# informe de la limpieza): fuera de MEDIA_ROOT para que /media nunca los
+# sirva. Debe estar en el mismo disco que BLOB_ROOT, porque los temporales
+# se mueven con os.replace.
+STAGING_ROOT = os.path.join(BASE_DIR, 'staging')
+# Envío de media por el servidor web en lugar de Python: X-Sendfile
+# (Apache, lighttpd) o X-Accel-Redirect de nginx, con el prefijo de una
+# location "internal" que apunta a BASE_DIR (p. ej. '/_media_interno/')
+MEDIA_X_SENDFILE = os.environ.get('MEDIA_X_SENDFILE', 'False').lower() == 'true'
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+# Caché en el navegador: un año para blobs (el nombre cambia con el
+# contenido) y una hora para los archivos anteriores
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MEDIA_MAX_AGE = 3600
+# Dónde se guardan los blobs: 'local' (BLOB_ROOT) o 's3' (S3, MinIO u otro
+# servicio compatible). Con 's3' los archivos se descargan directo del
+# almacenamiento mediante URLs firmadas, o de STORAGE_S3_PUBLIC_URL (un CDN
+# o un bucket público) si está definida.
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+STORAGE_S3_BUCKET = os.environ.get('STORAGE_S3_BUCKET', '')
+STORAGE_S3_ENDPOINT = os.environ.get('STORAGE_S3_ENDPOINT', '')  # p. ej. 'http://localhost:9000' para MinIO
+STORAGE_S3_REGION = os.environ.get('STORAGE_S3_REGION', 'us-east-1')
+STORAGE_S3_ACCESS_KEY = os.environ.get('STORAGE_S3_ACCESS_KEY', '')
+STORAGE_S3_SECRET_KEY = os.environ.get('STORAGE_S3_SECRET_KEY', '')
+STORAGE_S3_PREFIX = os.environ.get('STORAGE_S3_PREFIX', 'blobs/')
+STORAGE_S3_PUBLIC_URL = os.environ.get('STORAGE_S3_PUBLIC_URL', '')
+# Segundos de validez de las URLs firmadas
+STORAGE_S3_URL_EXPIRY = 6 * 3600
+# Subida multiparte: tamaño de cada parte y partes enviadas en paralelo
+STORAGE_S3_PART_SIZE = 16 * 1024 * 1024  # 16 MB
+STORAGE_S3_CONCURRENCY = 8
+# Limpieza de archivos huérfanos cada MEDIA_GC_INTERVAL segundos (0 la
+# desactiva; también se puede correr con 'flask limpiar-archivos')
+MEDIA_GC_INTERVAL = int(os.environ.get('MEDIA_GC_INTERVAL', 0))
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
+# Subidas por partes: tamaño máximo del archivo completo y de cada parte
+# (cada parte es una petición, así que también la limita MAX_CONTENT_LENGTH)
+MAX_UPLOAD_SIZE = 1024 * 1024 * 1024  # 1 GB
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB
+# Extensiones permitidas para archivo_multimedia en cada entidad
+UPLOAD_EXTENSIONS = {
+    'ideas': ['jpg', 'png', 'pdf', 'mp4', 'zip', 'docx'],
+    'soluciones': ['jpg', 'jpeg', 'png', 'pdf'],
+    'oportunidades': ['jpg', 'jpeg', 'png', 'pdf'],
+}
+
+# =========================
+# Compresión
+# =========================
+# Los archivos estáticos se sirven ya comprimidos (.br y .gz generados por
+# 'flask construir-assets' con la compresión máxima); Flask-Compress sólo
+# comprime al vuelo el HTML y el JSON, con niveles rápidos y sin tocar las
+# respuestas más chicas que un paquete TCP ni las que se envían por partes.
+COMPRESS_CONFIG = {
+    'COMPRESS_MIMETYPES': ['text/html', 'application/json'],
+    'COMPRESS_ALGORITHM': ['br', 'gzip'],
+    'COMPRESS_BR_LEVEL': 5,
+    'COMPRESS_LEVEL': 6,
+    'COMPRESS_MIN_SIZE': 1400,
+    'COMPRESS_STREAMS': False,
+}
+# Extensiones de los archivos estáticos que se precomprimen y tamaño mínimo
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.ttf', '.eot', '.txt', '.xml', '.html')
+PRECOMPRESS_MIN_SIZE = 1024
+
+# =========================
+# Índices locales
+# =========================
+SEARCH_INDEX_DIR = os.path.join(BASE_DIR, 'search_index')
+DUPLICATES_INDEX_PATH = os.path.join(SEARCH_INDEX_DIR, 'ideas_minhash.pkl')
 
 # =========================
 # Configuración de sesión
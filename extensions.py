@@ -1,10 +1,13 @@
 # extensions.py
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from flask_compress import Compress
 
 # Instancias de las extensiones
 db = SQLAlchemy()
 login_manager = LoginManager()
+# Compresión al vuelo de las respuestas dinámicas (ver COMPRESS_* en config_flask)
+compress = Compress()
 
 # Configuración del clogin
 login_manager.login_view = "login.login_view"
@@ -4,6 +4,7 @@ from wtforms import (
     HiddenField, BooleanField, IntegerField, DateField
 )
 from flask_wtf.file import FileField, FileAllowed
+from config_flask import UPLOAD_EXTENSIONS
 from wtforms.validators import DataRequired, Length, Optional, NumberRange
 
 
@@ -41,7 +42,7 @@ class IdeaForm(FlaskForm):
 
     archivo_multimedia = FileField('Archivo Multimedia', validators=[
         Optional(),
-        FileAllowed(['jpg', 'png', 'pdf', 'mp4', 'zip', 'docx'], 'Formato no permitido.')
+        FileAllowed(UPLOAD_EXTENSIONS['ideas'], 'Formato no permitido.')
     ])
     
     fecha_creacion = DateField('Fecha de creación', format='%Y-%m-%d', validators=[Optional()])
@@ -2,6 +2,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SelectField, FileField, IntegerField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Length
 from flask_wtf.file import FileAllowed
+from config_flask import UPLOAD_EXTENSIONS
 
 class OportunidadForm(FlaskForm):
     """
@@ -39,7 +40,7 @@ class OportunidadForm(FlaskForm):
     ])
 
     archivo_multimedia = FileField('Archivo', validators=[
-        FileAllowed(['jpg', 'jpeg', 'png', 'pdf'], 'Solo imágenes o documentos.')
+        FileAllowed(UPLOAD_EXTENSIONS['oportunidades'], 'Solo imágenes o documentos.')
     ])
 
     creador_por = StringField('Creado Por', validators=[
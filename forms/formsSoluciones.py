@@ -3,6 +3,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SelectField, FileField, IntegerField, SubmitField
 from wtforms.validators import DataRequired, Length
 from flask_wtf.file import FileAllowed
+from config_flask import UPLOAD_EXTENSIONS
 
 class SolucionForm(FlaskForm):
     """
@@ -40,7 +41,7 @@ class SolucionForm(FlaskForm):
     ])
 
     archivo_multimedia = FileField('Archivo', validators=[
-        FileAllowed(['jpg', 'jpeg', 'png', 'pdf'], 'Solo imágenes o documentos.')
+        FileAllowed(UPLOAD_EXTENSIONS['soluciones'], 'Solo imágenes o documentos.')
     ])
     
     submit = SubmitField('Guardar')
@@ -0,0 +1,10 @@
+from extensions import db
+
+class CriterioEvaluacion(db.Model):
+    __tablename__ = 'criterio_evaluacion'
+    __table_args__ = {'schema': 'public'}
+    
+    id = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(255), nullable=False)
+    descripcion = db.Column(db.Text)
+    peso = db.Column(db.Float, nullable=False, default=1.0)
@@ -0,0 +1,12 @@
+from extensions import db
+
+class EvaluacionIdea(db.Model):
+    __tablename__ = 'evaluacion_idea'
+    __table_args__ = {'schema': 'public'}
+    
+    id = db.Column(db.Integer, primary_key=True)
+    codigo_idea = db.Column(db.Integer, db.ForeignKey('public.idea.codigo_idea'), nullable=False)
+    usuario_email = db.Column(db.String(100), db.ForeignKey('public.usuario.email'), nullable=False)
+    id_criterio = db.Column(db.Integer, db.ForeignKey('public.criterio_evaluacion.id'), nullable=False)
+    puntaje = db.Column(db.Float, nullable=False)
+    fecha_evaluacion = db.Column(db.DateTime, default=db.func.now())
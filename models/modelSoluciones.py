@@ -1,21 +1,26 @@
 # models/solucion.py (versión para Flask)
 
 import requests
-import os
+import threading
+from concurrent.futures import Future
 from urllib.parse import unquote
-from config_flask import MEDIA_ROOT
+from utils import file_storage
 
 # -------------------------------
 # Clase para peticiones API REST
 # -------------------------------
 class APIClient:
     BASE_URL = "http://190.217.58.246:5186/api/SGV/procedures/execute"
+    BATCH_URL = BASE_URL + "/batch"
+    # None hasta la primera llamada; False si la API no expone el endpoint
+    # por lotes, para no volver a intentarlo en cada execute_batch.
+    _batch_supported = None
 
     def __init__(self, table_name):
         self.table_name = table_name
 
-    def _make_request(self, procedure, where_condition=None, order_by=None, limit_clause=None, json_data=None, select_columns=None):
-        payload = {
+    def _build_payload(self, procedure, where_condition=None, order_by=None, limit_clause=None, json_data=None, select_columns=None):
+        return {
             "procedure": procedure,
             "parameters": {
                 "table_name": self.table_name,
@@ -26,6 +31,12 @@ class APIClient:
                 "select_columns": select_columns
             }
         }
+
+    def _make_request(self, procedure, where_condition=None, order_by=None, limit_clause=None, json_data=None, select_columns=None):
+        payload = self._build_payload(
+            procedure, where_condition=where_condition, order_by=order_by,
+            limit_clause=limit_clause, json_data=json_data, select_columns=select_columns
+        )
         try:
             response = requests.post(self.BASE_URL, json=payload)
             response.raise_for_status()
@@ -34,6 +45,70 @@ class APIClient:
             print(f"Error en _make_request: {e}")
             return None
 
+    def call(self, procedure, **kwargs):
+        """Describe una invocación para execute_batch sin ejecutarla."""
+        return self._build_payload(procedure, **kwargs)
+
+    @classmethod
+    def execute_batch(cls, calls, atomic=False):
+        """
+        Ejecuta varios procedimientos en un solo viaje a la API.
+
+        Parameters
+        ----------
+        calls : list[dict]
+            Invocaciones construidas con ``APIClient(tabla).call(...)``.
+            Pueden mezclar tablas distintas.
+        atomic : bool, optional
+            Si es True se pide a la API que ejecute todo en una transacción:
+            o se aplican todas las invocaciones o ninguna. Sin endpoint por
+            lotes la ejecución secuencial se detiene en el primer error, pero
+            no puede revertir lo ya aplicado.
+
+        Returns
+        -------
+        list
+            Un resultado por invocación, en el mismo orden; None para las
+            invocaciones que fallaron o no se ejecutaron.
+        """
+        if not calls:
+            return []
+
+        if cls._batch_supported is not False:
+            try:
+                response = requests.post(cls.BATCH_URL, json={"calls": calls, "atomic": atomic})
+                if response.status_code in (404, 405):
+                    print("[modelSoluciones] La API no expone procedures/execute/batch; se ejecuta uno a uno")
+                    cls._batch_supported = False
+                else:
+                    response.raise_for_status()
+                    cls._batch_supported = True
+                    data = response.json()
+                    results = data.get("results", data) if isinstance(data, dict) else data
+                    if isinstance(results, list) and len(results) == len(calls):
+                        return results
+                    print(f"Respuesta inesperada de execute_batch: {data}")
+                    return [None] * len(calls)
+            except Exception as e:
+                print(f"Error en execute_batch: {e}")
+                return [None] * len(calls)
+
+        # La API no expone el endpoint por lotes: se ejecuta uno a uno.
+        # En modo atómico se detiene en el primer error (sin poder revertir
+        # lo ya aplicado).
+        results = []
+        for payload in calls:
+            try:
+                response = requests.post(cls.BASE_URL, json=payload)
+                response.raise_for_status()
+                results.append(response.json())
+            except Exception as e:
+                print(f"Error en execute_batch ({payload.get('procedure')}): {e}")
+                results.append(None)
+                if atomic:
+                    break
+        return results + [None] * (len(calls) - len(results))
+
     def get_data(self, where_condition=None, **kwargs):
         resp = self._make_request("select_json_entity", where_condition=where_condition, **kwargs)
         return resp.get('outputParams', {}).get('result', []) if resp else []
@@ -58,6 +133,68 @@ class APIClient:
         return self.update_data(where_condition, updates) if updates else None
 
 
+# ------------------------------------------------
+# Agrupador de procedimientos por ventana de tiempo
+# ------------------------------------------------
+class ProcedureBatcher:
+    """
+    Agrupa las invocaciones emitidas dentro de una ventana corta de tiempo
+    y las envía juntas con APIClient.execute_batch.
+
+    ``submit`` devuelve un Future con el resultado de cada invocación; el
+    lote se envía cuando pasa ``window`` segundos desde la primera llamada
+    pendiente o cuando se alcanzan ``max_size`` invocaciones.
+    """
+
+    def __init__(self, window=0.01, max_size=50):
+        self.window = window
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    def submit(self, client, procedure, **kwargs):
+        future = Future()
+        with self._lock:
+            self._pending.append((client.call(procedure, **kwargs), future))
+            if len(self._pending) >= self.max_size:
+                batch = self._take_pending()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._send(batch)
+        return future
+
+    def flush(self):
+        """Envía de inmediato las invocaciones pendientes."""
+        with self._lock:
+            batch = self._take_pending()
+        if batch:
+            self._send(batch)
+
+    def _take_pending(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    @staticmethod
+    def _send(batch):
+        try:
+            results = APIClient.execute_batch([payload for payload, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
 # ----------------------------
 # APIs auxiliares de catálogos
 # ----------------------------
@@ -139,10 +276,7 @@ class SolucionUsuario:
 # ---------------------------------------
 def save_archivo(archivo):
     try:
-        filename = archivo.filename
-        path = os.path.join(MEDIA_ROOT, filename)
-        archivo.save(path)
-        return f"/media/{filename}"
+        return file_storage.save_file(archivo)
     except Exception as e:
         print(f"Error guardando archivo: {e}")
         return None
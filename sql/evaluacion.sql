@@ -0,0 +1,37 @@
+-- sql/evaluacion.sql
+-- Tablas de la matriz de evaluación de ideas (utils/evaluation.py), con las
+-- mismas columnas que models/CriterioEvaluacion.py y models/EvaluacionIdea.py.
+-- Se puede ejecutar más de una vez: no borra datos existentes.
+
+CREATE TABLE IF NOT EXISTS public.criterio_evaluacion (
+    id           SERIAL PRIMARY KEY,
+    nombre       VARCHAR(255) NOT NULL,
+    descripcion  TEXT,
+    peso         DOUBLE PRECISION NOT NULL DEFAULT 1.0
+);
+
+-- Los mismos criterios que DEFAULT_CRITERIOS, con sus ids
+INSERT INTO public.criterio_evaluacion (id, nombre, peso) VALUES
+    (1, 'Novedad', 1.0),
+    (2, 'Viabilidad', 1.0),
+    (3, 'Impacto', 1.5),
+    (4, 'Alineación estratégica', 1.0)
+ON CONFLICT (id) DO NOTHING;
+
+-- Los criterios nuevos siguen después de los cargados arriba
+SELECT setval(
+    pg_get_serial_sequence('public.criterio_evaluacion', 'id'),
+    GREATEST((SELECT MAX(id) FROM public.criterio_evaluacion), 1)
+);
+
+-- Un puntaje por evaluador, idea y criterio; si se repite, gana el de id mayor
+CREATE TABLE IF NOT EXISTS public.evaluacion_idea (
+    id                SERIAL PRIMARY KEY,
+    codigo_idea       INTEGER NOT NULL REFERENCES public.idea (codigo_idea),
+    usuario_email     VARCHAR(100) NOT NULL REFERENCES public.usuario (email),
+    id_criterio       INTEGER NOT NULL REFERENCES public.criterio_evaluacion (id),
+    puntaje           DOUBLE PRECISION NOT NULL,
+    fecha_evaluacion  TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS evaluacion_idea_codigo_idea_idx ON public.evaluacion_idea (codigo_idea);
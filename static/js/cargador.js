@@ -0,0 +1,99 @@
+/*
+ * Cargador de librerías bajo demanda (ver LIBRARIES en utils/assets.py).
+ * Las URLs de cada librería vienen en <script id="librerias">; las de la
+ * página (data-librerias del <body>) se piden al cargar y el resto cuando
+ * se usan:
+ *   - <textarea data-editor>: el editor se carga al enfocar el campo.
+ *   - data-libreria="pdfmake" (u otra): se precarga al pasar el mouse o
+ *     enfocar y, al hacer clic, el elemento recibe "libreria:lista" cuando
+ *     la librería está disponible.
+ * El código de la página espera con cargarLibreria('nombre').then(...);
+ * cargarScript(url) agrega un script propio de la página cuando hace falta
+ * que corra después de una librería.
+ */
+(function () {
+    var manifiesto = null;
+    var cargas = {};
+
+    function librerias() {
+        if (manifiesto === null) {
+            var nodo = document.getElementById('librerias');
+            manifiesto = nodo ? JSON.parse(nodo.textContent) : {};
+        }
+        return manifiesto;
+    }
+
+    function cargarCss(url) {
+        return new Promise(function (resolve, reject) {
+            var link = document.createElement('link');
+            link.rel = 'stylesheet';
+            link.href = url;
+            link.onload = resolve;
+            link.onerror = function () { reject(new Error('No se pudo cargar ' + url)); };
+            document.head.appendChild(link);
+        });
+    }
+
+    function cargarScript(url) {
+        return new Promise(function (resolve, reject) {
+            var script = document.createElement('script');
+            script.src = url;
+            // Se descargan en paralelo pero se ejecutan en orden
+            script.async = false;
+            script.onload = resolve;
+            script.onerror = function () { reject(new Error('No se pudo cargar ' + url)); };
+            document.body.appendChild(script);
+        });
+    }
+
+    function cargarLibreria(nombre) {
+        if (!cargas[nombre]) {
+            var libreria = librerias()[nombre];
+            if (!libreria) return Promise.reject(new Error('Librería desconocida: ' + nombre));
+            cargas[nombre] = Promise.all(
+                libreria.css.map(cargarCss).concat(libreria.js.map(cargarScript))
+            ).catch(function (error) {
+                // Un fallo de red no queda guardado: el próximo intento vuelve a pedirla
+                delete cargas[nombre];
+                throw error;
+            });
+        }
+        return cargas[nombre];
+    }
+
+    window.cargarLibreria = cargarLibreria;
+    window.cargarScript = cargarScript;
+
+    // Librerías de la página
+    (document.body.dataset.librerias || '').split(/\s+/).forEach(function (nombre) {
+        if (nombre) cargarLibreria(nombre).catch(function (e) { console.error(e); });
+    });
+
+    document.addEventListener('focusin', function (e) {
+        var campo = e.target.closest && e.target.closest('textarea[data-editor]');
+        if (!campo || campo.dataset.editorCargado) return;
+        campo.dataset.editorCargado = '1';
+        cargarLibreria('editor').then(function () {
+            $(campo).summernote({ lang: 'es-ES', height: 200, focus: true });
+        }).catch(function (error) {
+            delete campo.dataset.editorCargado;
+            console.error(error);
+        });
+    });
+
+    function precargar(e) {
+        var elemento = e.target.closest && e.target.closest('[data-libreria]');
+        if (elemento) cargarLibreria(elemento.dataset.libreria).catch(function () {});
+    }
+    document.addEventListener('mouseover', precargar);
+    document.addEventListener('focusin', precargar);
+
+    document.addEventListener('click', function (e) {
+        var elemento = e.target.closest && e.target.closest('[data-libreria]');
+        if (!elemento) return;
+        var nombre = elemento.dataset.libreria;
+        cargarLibreria(nombre).then(function () {
+            elemento.dispatchEvent(new CustomEvent('libreria:lista', { detail: nombre, bubbles: true }));
+        }).catch(function (error) { console.error(error); });
+    });
+})();
@@ -0,0 +1,45 @@
+/*
+ * Desplazamiento infinito.
+ * Observa los elementos ".scroll-sentinel" con data-next-url: cuando uno se
+ * vuelve visible pide ese fragmento HTML, lo agrega al contenedor indicado
+ * en data-container y el fragmento trae, si hay más, el siguiente sentinel.
+ * Sin JavaScript el sentinel sigue siendo un enlace "Ver más".
+ */
+(function () {
+    function cargar(sentinel, observer) {
+        var url = sentinel.dataset.nextUrl;
+        var contenedor = document.getElementById(sentinel.dataset.container);
+        if (!url || !contenedor || sentinel.dataset.cargando) return;
+        sentinel.dataset.cargando = '1';
+        observer.unobserve(sentinel);
+
+        fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' }, credentials: 'same-origin' })
+            .then(function (resp) {
+                if (!resp.ok) throw new Error(resp.status);
+                return resp.text();
+            })
+            .then(function (html) {
+                sentinel.remove();
+                contenedor.insertAdjacentHTML('beforeend', html);
+                contenedor.querySelectorAll('.scroll-sentinel').forEach(function (nuevo) {
+                    observer.observe(nuevo);
+                });
+            })
+            .catch(function () {
+                // Se deja el enlace "Ver más" como respaldo
+                delete sentinel.dataset.cargando;
+            });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        if (!('IntersectionObserver' in window)) return;
+        var observer = new IntersectionObserver(function (entradas) {
+            entradas.forEach(function (entrada) {
+                if (entrada.isIntersecting) cargar(entrada.target, observer);
+            });
+        }, { rootMargin: '400px 0px' });
+        document.querySelectorAll('.scroll-sentinel').forEach(function (sentinel) {
+            observer.observe(sentinel);
+        });
+    });
+})();
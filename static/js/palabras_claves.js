@@ -0,0 +1,70 @@
+/*
+ * Autocompletado de palabras claves.
+ * Se activa en cualquier campo con id "palabras_claves": sugiere palabras
+ * existentes para el último término (separado por comas) que se escribe.
+ */
+(function () {
+    // La URL viene en data-url del script o, dentro del paquete de base.html,
+    // en data-palabras-claves-url del body
+    var script = document.currentScript;
+    var url = script && script.dataset.url;
+
+    document.addEventListener('DOMContentLoaded', function () {
+        url = url || document.body.dataset.palabrasClavesUrl;
+        var campo = document.getElementById('palabras_claves');
+        if (!campo || !url) return;
+
+        var lista = document.createElement('div');
+        lista.className = 'dropdown-menu';
+        campo.parentNode.style.position = 'relative';
+        campo.parentNode.appendChild(lista);
+
+        var espera = null;
+        var ultimaConsulta = '';
+
+        function terminoActual() {
+            var partes = campo.value.split(',');
+            return partes[partes.length - 1].trim();
+        }
+
+        function elegir(palabra) {
+            var partes = campo.value.split(',');
+            partes[partes.length - 1] = (partes.length > 1 ? ' ' : '') + palabra;
+            campo.value = partes.join(',') + ', ';
+            lista.classList.remove('show');
+            campo.focus();
+        }
+
+        function mostrar(sugerencias) {
+            lista.innerHTML = '';
+            sugerencias.forEach(function (s) {
+                var item = document.createElement('button');
+                item.type = 'button';
+                item.className = 'dropdown-item';
+                item.textContent = s.palabra + ' (' + s.frecuencia + ')';
+                item.addEventListener('mousedown', function (ev) {
+                    ev.preventDefault();
+                    elegir(s.palabra);
+                });
+                lista.appendChild(item);
+            });
+            lista.classList.toggle('show', sugerencias.length > 0);
+        }
+
+        campo.setAttribute('autocomplete', 'off');
+        campo.addEventListener('input', function () {
+            var termino = terminoActual();
+            clearTimeout(espera);
+            if (termino.length < 1) { mostrar([]); return; }
+            espera = setTimeout(function () {
+                ultimaConsulta = termino;
+                fetch(url + '?q=' + encodeURIComponent(termino), {credentials: 'same-origin'})
+                    .then(function (r) { return r.json(); })
+                    .then(function (data) {
+                        if (termino === ultimaConsulta) mostrar(data.sugerencias || []);
+                    });
+            }, 120);
+        });
+        campo.addEventListener('blur', function () { lista.classList.remove('show'); });
+    });
+})();
@@ -0,0 +1,127 @@
+/*
+ * Subidas por partes y reanudables.
+ * Para cada input ".subida-por-partes" toma el input file de data-campo:
+ * al elegir un archivo crea la subida, envía partes con PATCH y, si una
+ * parte falla, pregunta el desplazamiento (HEAD) y sigue desde ahí. El id
+ * se guarda en localStorage para reanudar también tras recargar la página.
+ * Mientras sube, el envío del formulario queda bloqueado.
+ */
+(function () {
+    var REINTENTOS = 5;
+
+    function csrf(form) {
+        var campo = form.querySelector('input[name="csrf_token"]');
+        return campo ? campo.value : '';
+    }
+
+    function clave(entidad, archivo) {
+        return 'subida:' + entidad + ':' + archivo.name + ':' + archivo.size + ':' + archivo.lastModified;
+    }
+
+    function esperar(ms) {
+        return new Promise(function (resolve) { setTimeout(resolve, ms); });
+    }
+
+    function pedir(url, opciones) {
+        return fetch(url, Object.assign({ credentials: 'same-origin' }, opciones)).then(function (resp) {
+            return resp.json().catch(function () { return {}; }).then(function (datos) {
+                if (!resp.ok) {
+                    var error = new Error(datos.error || ('Error ' + resp.status));
+                    error.status = resp.status;
+                    throw error;
+                }
+                return datos;
+            });
+        });
+    }
+
+    function iniciar(oculto) {
+        var input = document.getElementById(oculto.dataset.campo);
+        var form = oculto.form;
+        if (!input || !form) return;
+        var barra = document.querySelector('#' + oculto.dataset.campo + '-progreso');
+        var error = document.getElementById(oculto.dataset.campo + '-error');
+        var subiendo = false;
+
+        function progreso(offset, total) {
+            barra.classList.remove('d-none');
+            barra.firstElementChild.style.width = Math.round(100 * offset / total) + '%';
+        }
+
+        function crear(archivo) {
+            var guardado = localStorage.getItem(clave(oculto.dataset.entidad, archivo));
+            var inicial = guardado
+                ? pedir(guardado, { method: 'GET' }).catch(function () { return null; })
+                : Promise.resolve(null);
+            return inicial.then(function (estado) {
+                if (estado) return estado;
+                return pedir(oculto.dataset.url, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrf(form) },
+                    body: JSON.stringify({ entidad: oculto.dataset.entidad, nombre: archivo.name, tamano: archivo.size })
+                }).then(function (estado) {
+                    localStorage.setItem(clave(oculto.dataset.entidad, archivo), estado.url);
+                    return estado;
+                });
+            });
+        }
+
+        function enviar(archivo, estado, tamano, intentos) {
+            progreso(estado.offset, archivo.size);
+            if (estado.completa) return Promise.resolve(estado);
+            var parte = archivo.slice(estado.offset, estado.offset + tamano);
+            return pedir(estado.url, {
+                method: 'PATCH',
+                headers: {
+                    'Content-Type': 'application/offset+octet-stream',
+                    'Upload-Offset': String(estado.offset),
+                    'X-CSRFToken': csrf(form)
+                },
+                body: parte
+            }).then(function (nuevo) {
+                return enviar(archivo, nuevo, tamano, 0);
+            }, function (e) {
+                if ((e.status && e.status !== 409 && e.status < 500) || intentos >= REINTENTOS) throw e;
+                // Corte o conflicto: se pregunta dónde quedó y se reanuda
+                return esperar(1000 * Math.pow(2, intentos))
+                    .then(function () { return pedir(estado.url, { method: 'GET' }); })
+                    .then(function (actual) { return enviar(archivo, actual, tamano, intentos + 1); });
+            });
+        }
+
+        input.addEventListener('change', function () {
+            var archivo = input.files[0];
+            oculto.value = '';
+            error.classList.add('d-none');
+            if (!archivo) return;
+            subiendo = true;
+            crear(archivo)
+                .then(function (estado) {
+                    return enviar(archivo, estado, estado.tamano_parte || 8 * 1024 * 1024, 0);
+                })
+                .then(function (estado) {
+                    localStorage.removeItem(clave(oculto.dataset.entidad, archivo));
+                    oculto.value = estado.id;
+                    // El archivo ya está en el servidor: no se vuelve a enviar con el formulario
+                    input.value = '';
+                })
+                .catch(function (e) {
+                    error.textContent = e.message;
+                    error.classList.remove('d-none');
+                })
+                .then(function () { subiendo = false; });
+        });
+
+        form.addEventListener('submit', function (e) {
+            if (subiendo) {
+                e.preventDefault();
+                error.textContent = 'Espera a que termine de subir el archivo.';
+                error.classList.remove('d-none');
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('.subida-por-partes').forEach(iniciar);
+    });
+})();
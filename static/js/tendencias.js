@@ -0,0 +1,72 @@
+/*
+ * Gráficos de tendencia (Chart.js 2).
+ * Cada ".grafico-tendencia" tiene data-url con el endpoint de series y un
+ * formulario con los selectores (evento, periodo, dimension); al cambiar
+ * un selector se vuelve a pedir la serie y se redibuja el gráfico.
+ */
+(function () {
+    var COLORES = ['#556ee6', '#34c38f', '#f46a6a', '#f1b44c', '#50a5f1', '#74788d', '#e83e8c', '#6f42c1'];
+
+    function dibujar(canvas, datos) {
+        if (canvas._grafico) canvas._grafico.destroy();
+        canvas._grafico = new Chart(canvas.getContext('2d'), {
+            type: 'line',
+            data: {
+                labels: datos.periodos,
+                datasets: datos.series.map(function (serie, i) {
+                    return {
+                        label: serie.etiqueta,
+                        data: serie.datos,
+                        borderColor: COLORES[i % COLORES.length],
+                        backgroundColor: 'transparent',
+                        pointRadius: datos.periodos.length > 60 ? 0 : 2,
+                        lineTension: 0
+                    };
+                })
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                scales: { yAxes: [{ ticks: { beginAtZero: true, precision: 0 } }] }
+            }
+        });
+    }
+
+    function cargar(contenedor) {
+        var form = contenedor.querySelector('form');
+        var canvas = contenedor.querySelector('canvas');
+        var params = new URLSearchParams(new FormData(form));
+        fetch(contenedor.dataset.url + '?' + params.toString(), { credentials: 'same-origin' })
+            .then(function (resp) {
+                if (!resp.ok) throw new Error(resp.status);
+                return resp.json();
+            })
+            .then(function (datos) { dibujar(canvas, datos); })
+            .catch(function () {
+                contenedor.querySelector('.grafico-error').classList.remove('d-none');
+            });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        var contenedores = document.querySelectorAll('.grafico-tendencia');
+        if (!contenedores.length) return;
+        // Chart.js lo pide js/cargador.js (librería "chartjs" de la página)
+        cargarLibreria('chartjs').then(function () {
+            contenedores.forEach(iniciar);
+        }).catch(function () {
+            contenedores.forEach(function (contenedor) {
+                contenedor.querySelector('.grafico-error').classList.remove('d-none');
+            });
+        });
+    });
+
+    function iniciar(contenedor) {
+        var form = contenedor.querySelector('form');
+        form.addEventListener('change', function () { cargar(contenedor); });
+        form.addEventListener('submit', function (e) {
+            e.preventDefault();
+            cargar(contenedor);
+        });
+        cargar(contenedor);
+    }
+})();
@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+
+from app import app
+from utils import expert_matching
+from utils.api_client import APIClient
+
+
+PERFILES = [
+    {"id": 1, "usuario_email": "ana@ejemplo.com", "nombre": "Ana", "area_expertise": "energía solar"},
+    {"id": 2, "usuario_email": "luis@ejemplo.com", "nombre": "Luis", "area_expertise": "logística de bodegas"},
+]
+
+
+class EditarPerfilExpertosTest(unittest.TestCase):
+    """Editar el perfil cambia los expertos sugeridos sin reconstruir el matcher."""
+
+    def setUp(self):
+        app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, LOGIN_DISABLED=True)
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess["user_email"] = "luis@ejemplo.com"
+
+        patches = [
+            mock.patch.object(expert_matching, "_areas_map", return_value={}),
+            mock.patch.object(APIClient, "iter_pages", lambda self, *a, **k: iter([list(PERFILES)])),
+            mock.patch.object(
+                APIClient, "get_by_id",
+                lambda self, campo, valor: [dict(p) for p in PERFILES if p.get(campo) == valor],
+            ),
+            mock.patch.object(APIClient, "update_by_key", return_value={"ok": True}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        expert_matching._matcher = expert_matching.rebuild()
+        self.addCleanup(setattr, expert_matching, "_matcher", None)
+
+    def test_editar_perfil_actualiza_top_experts(self):
+        texto = "paneles de energía solar para la planta"
+        antes = [e["usuario_email"] for e in expert_matching.get_matcher().top_experts(texto)]
+        self.assertEqual(antes, ["ana@ejemplo.com"])
+
+        respuesta = self.client.post("/perfil/perfil/edit", data={
+            "nombre": "Luis",
+            "area_expertise": "energía solar fotovoltaica",
+        })
+
+        self.assertEqual(respuesta.status_code, 302)
+        APIClient.update_by_key.assert_called_once()
+        despues = [e["usuario_email"] for e in expert_matching.get_matcher().top_experts(texto)]
+        self.assertIn("luis@ejemplo.com", despues)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,11 @@
 # api_client.py - CORREGIDO CON MANEJO SSL
 import requests
 import os
+import threading
+import time
 import urllib3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Deshabilitar advertencias de SSL para desarrollo local
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -9,10 +13,26 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 class APIClient:
     """Cliente genérico para interactuar con la API local de Innovación."""
 
+    # Cantidad máxima de ids por cláusula IN (...) en get_many
+    GET_MANY_CHUNK_SIZE = 200
+    # Mapa de identidad: segundos que vale un registro y registros como
+    # máximo. Otro cliente (u otro worker) puede cambiar el registro, así
+    # que no se guarda para siempre
+    IDENTITY_MAP_TTL = 60
+    IDENTITY_MAP_MAX_SIZE = 2000
+
+    # Operaciones masivas: registros por bloque y bloques en paralelo
+    BULK_CHUNK_SIZE = 100
+    BULK_MAX_WORKERS = 4
+
     def __init__(self, table_name: str, schema: str = "por defecto"):
         self.table_name = table_name
         self.schema = schema
         self.base_url = os.getenv("BACKEND_LOCAL_URL")  # ej: http://localhost:5186/api/sgv
+
+        # Mapa de identidad: (campo_clave, valor) -> (hora, registro ya obtenido)
+        self._identity_map = OrderedDict()
+        self._identity_lock = threading.Lock()
         
         # 🔍 DEBUG: Verificar configuración
         print(f"[DEBUG APIClient] Tabla: {table_name}, Base URL: {self.base_url}")
@@ -80,6 +100,212 @@ class APIClient:
         resp = self._make_request("GET", self.table_name, **kwargs)
         return resp.get("datos", []) if resp else []
 
+    @staticmethod
+    def _sql_literal(value):
+        """Convierte un valor en literal SQL para usarlo dentro de where_condition."""
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, (int, float)):
+            return str(value)
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def get_many(self, key_field, ids, chunk_size=None):
+        """
+        Obtiene varios registros por su clave en una sola consulta IN (...).
+
+        Evita el patrón N+1 de llamar get_by_id/get_by_key por cada elemento:
+        los ids se agrupan en bloques de ``chunk_size`` y cada bloque es una
+        única petición a la API. Los registros obtenidos hace menos de
+        IDENTITY_MAP_TTL segundos se toman del mapa de identidad y los
+        nuevos se guardan en él.
+
+        Parameters
+        ----------
+        key_field : str
+            El nombre del campo clave (e.g., 'codigo_idea', 'usuario_email').
+        ids : iterable
+            Los valores de la clave a buscar. Se ignoran duplicados y None.
+        chunk_size : int, optional
+            Cantidad de ids por consulta (por defecto GET_MANY_CHUNK_SIZE).
+
+        Returns
+        -------
+        dict
+            Diccionario {id: registro}. Los ids sin registro no aparecen.
+        """
+        chunk_size = chunk_size or self.GET_MANY_CHUNK_SIZE
+        result = {}
+        pending = []
+        seen = set()
+        for record_id in ids:
+            if record_id is None or str(record_id) in seen:
+                continue
+            seen.add(str(record_id))
+            cached = self._identity_get((key_field, str(record_id)))
+            if cached is not None:
+                result[record_id] = cached
+            else:
+                pending.append(record_id)
+
+        # Las claves de la respuesta pueden venir con otro tipo (int vs str)
+        requested = {str(record_id): record_id for record_id in pending}
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            values = ", ".join(self._sql_literal(v) for v in chunk)
+            rows = self.get_data(where_condition=f"{key_field} IN ({values})")
+            for row in rows:
+                key = str(row.get(key_field))
+                if key not in requested:
+                    continue
+                self._identity_put((key_field, key), row)
+                result[requested[key]] = row
+        return result
+
+    def iter_pages(self, key_field, where_condition=None, page_size=500, strict=False):
+        """
+        Recorre la tabla por páginas usando paginación por clave (keyset).
+
+        Cada página pide los registros con ``key_field`` mayor que el último
+        visto, ordenados por la clave y limitados a ``page_size``, así que
+        nunca se tiene más de una página en memoria. Si la API ignora el
+        límite y devuelve todo de una vez, se entrega esa respuesta y se
+        termina.
+
+        Parameters
+        ----------
+        key_field : str
+            Campo clave numérico y creciente (e.g., 'codigo_idea').
+        where_condition : str, optional
+            Filtro adicional, con la misma sintaxis que get_data.
+        page_size : int, optional
+            Registros por petición.
+        strict : bool, optional
+            Si es True, un error de la API lanza RuntimeError en lugar de
+            terminar el recorrido como si no hubiera más registros.
+
+        Yields
+        ------
+        list
+            Una lista de registros por página.
+        """
+        last_key = None
+        while True:
+            conditions = [f"({where_condition})"] if where_condition else []
+            if last_key is not None:
+                conditions.append(f"{key_field} > {self._sql_literal(last_key)}")
+            params = {"order_by": key_field, "limit_clause": str(page_size)}
+            if conditions:
+                params["where_condition"] = " AND ".join(conditions)
+            resp = self._make_request("GET", self.table_name, **params)
+            if resp is None and strict:
+                raise RuntimeError(f"La API no respondió al recorrer {self.table_name}")
+            rows = resp.get("datos", []) if resp else []
+            if last_key is not None:
+                rows = [r for r in rows if r.get(key_field) is not None and r.get(key_field) > last_key]
+            if not rows:
+                return
+            yield rows
+            if len(rows) != page_size:
+                return
+            last_key = max(r.get(key_field) for r in rows)
+
+    def get_keyset_page(self, sort_field, key_field, after=None, where_condition=None, limit=20,
+                        predicate=None):
+        """
+        Una página en orden descendente por ``(sort_field, key_field)``.
+
+        La siguiente página se pide con el par de valores del último registro
+        recibido, así que el costo de cada página no depende de cuántas se
+        hayan recorrido antes. Los registros sin ``sort_field`` van al final,
+        ordenados por ``key_field``.
+
+        Parameters
+        ----------
+        sort_field : str
+            Campo de orden (e.g., 'fecha_creacion').
+        key_field : str
+            Campo clave que desempata registros con el mismo ``sort_field``.
+        after : tuple, optional
+            (valor de sort_field, valor de key_field) del último registro de
+            la página anterior; None para la primera página.
+        where_condition : str, optional
+            Filtro adicional, con la misma sintaxis que get_data.
+        limit : int, optional
+            Registros por página.
+        predicate : callable, optional
+            Equivalente en Python de ``where_condition``; se aplica a las
+            filas recibidas por si la API ignora el filtro.
+
+        Returns
+        -------
+        list
+            Registros de la página, del mayor al menor.
+        """
+        conditions = [f"({where_condition})"] if where_condition else []
+        if after is not None:
+            sort_value, key_value = after
+            key_value = self._sql_literal(key_value)
+            if sort_value is None:
+                conditions.append(f"({sort_field} IS NULL AND {key_field} < {key_value})")
+            else:
+                sort_value = self._sql_literal(sort_value)
+                conditions.append(
+                    f"({sort_field} < {sort_value} OR ({sort_field} = {sort_value} AND {key_field} < {key_value})"
+                    f" OR {sort_field} IS NULL)"
+                )
+        params = {
+            "order_by": f"{sort_field} DESC NULLS LAST, {key_field} DESC",
+            "limit_clause": str(limit),
+        }
+        if conditions:
+            params["where_condition"] = " AND ".join(conditions)
+        rows = self.get_data(**params)
+
+        # Si la API ignora el filtro, el orden o el límite, se aplican aquí
+        def sort_key(row):
+            value = row.get(sort_field)
+            return (value is not None, str(value) if value is not None else "", row.get(key_field))
+
+        rows = [r for r in rows if r.get(key_field) is not None]
+        if predicate is not None:
+            rows = [r for r in rows if predicate(r)]
+        if after is not None:
+            cursor = sort_key({sort_field: after[0], key_field: after[1]})
+            rows = [r for r in rows if sort_key(r) < cursor]
+        rows.sort(key=sort_key, reverse=True)
+        return rows[:limit]
+
+    def _identity_get(self, key):
+        with self._identity_lock:
+            entry = self._identity_map.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.IDENTITY_MAP_TTL:
+                del self._identity_map[key]
+                return None
+            return entry[1]
+
+    def _identity_put(self, key, row):
+        with self._identity_lock:
+            self._identity_map[key] = (time.monotonic(), row)
+            self._identity_map.move_to_end(key)
+            # Se descartan los más viejos
+            while len(self._identity_map) > self.IDENTITY_MAP_MAX_SIZE:
+                self._identity_map.popitem(last=False)
+
+    def clear_identity_map(self, key_field=None, record_id=None):
+        """
+        Invalida registros del mapa de identidad.
+
+        Sin argumentos lo vacía por completo; con ``key_field`` y ``record_id``
+        sólo olvida ese registro.
+        """
+        with self._identity_lock:
+            if key_field is None:
+                self._identity_map.clear()
+            else:
+                self._identity_map.pop((key_field, str(record_id)), None)
+
     def get_user_by_email(self, email):
         """Busca un usuario por email."""
         users = self.get_data()
@@ -256,6 +482,7 @@ class APIClient:
         if campos_encriptar:
             params["camposEncriptar"] = campos_encriptar
 
+        self.clear_identity_map(key_name, key_value)
         return self._make_request("PUT", endpoint, payload=json_data, **params)
 
     def get_by_key(self, key_name, key_value):
@@ -301,4 +528,123 @@ class APIClient:
         if schema:
             params["esquema"] = schema
 
+        self.clear_identity_map(key_name, key_value)
         return self._make_request("DELETE", endpoint, **params)
+
+    # ------------------------------------------------------------------
+    # Operaciones masivas
+    # ------------------------------------------------------------------
+    def _run_chunks(self, items, worker, chunk_size=None, max_workers=None):
+        """
+        Divide ``items`` en bloques y ejecuta ``worker(bloque)`` en un pool
+        acotado de hilos. Cada worker devuelve una lista de resultados por
+        registro; el resultado final conserva el orden de ``items``.
+        """
+        items = list(items)
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+        max_workers = max_workers or self.BULK_MAX_WORKERS
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        if not chunks:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+            chunk_results = list(pool.map(worker, chunks))
+
+        # Los cambios masivos invalidan el mapa de identidad una sola vez
+        self.clear_identity_map()
+        return [outcome for outcomes in chunk_results for outcome in outcomes]
+
+    def bulk_insert(self, records, chunk_size=None, max_workers=None):
+        """
+        Inserta muchos registros enviando cada bloque como un arreglo JSON.
+
+        Parameters
+        ----------
+        records : list[dict]
+            Los registros a insertar.
+        chunk_size : int, optional
+            Registros por petición (por defecto BULK_CHUNK_SIZE).
+        max_workers : int, optional
+            Peticiones simultáneas (por defecto BULK_MAX_WORKERS).
+
+        Returns
+        -------
+        list[dict]
+            Un resultado por registro, en el mismo orden:
+            ``{"record": ..., "ok": bool, "response": ...}``.
+        """
+        def worker(chunk):
+            response = self._make_request("POST", self.table_name, payload=self._wrap_payload(chunk))
+            return [{"record": record, "ok": response is not None, "response": response} for record in chunk]
+
+        return self._run_chunks(records, worker, chunk_size, max_workers)
+
+    def bulk_update_by_key(self, key_name, records, chunk_size=None, max_workers=None, schema=None):
+        """
+        Actualiza muchos registros por su campo clave.
+
+        Parameters
+        ----------
+        key_name : str
+            El nombre del campo clave (e.g., 'codigo_idea'). Cada registro
+            debe incluirlo; el resto de campos se envía como datos.
+        records : list[dict]
+            Los registros a actualizar.
+        chunk_size, max_workers : int, optional
+            Igual que en bulk_insert.
+        schema : str, optional
+            Esquema de la base de datos (e.g., 'public').
+
+        Returns
+        -------
+        list[dict]
+            ``{"key": ..., "ok": bool, "response": ...}`` por registro.
+        """
+        params = {"esquema": schema} if schema else {}
+
+        def worker(chunk):
+            outcomes = []
+            for record in chunk:
+                key_value = record.get(key_name)
+                if key_value is None:
+                    outcomes.append({"key": None, "ok": False, "response": None})
+                    continue
+                data = {k: v for k, v in record.items() if k != key_name}
+                endpoint = f"{self.table_name}/{key_name}/{key_value}"
+                response = self._make_request("PUT", endpoint, payload=data, **params)
+                outcomes.append({"key": key_value, "ok": response is not None, "response": response})
+            return outcomes
+
+        return self._run_chunks(records, worker, chunk_size, max_workers)
+
+    def bulk_delete_by_key(self, key_name, key_values, chunk_size=None, max_workers=None, schema=None):
+        """
+        Elimina muchos registros por su campo clave.
+
+        Parameters
+        ----------
+        key_name : str
+            El nombre del campo clave (e.g., 'codigo_idea').
+        key_values : list
+            Los valores de la clave a eliminar.
+        chunk_size, max_workers : int, optional
+            Igual que en bulk_insert.
+        schema : str, optional
+            Esquema de la base de datos (e.g., 'public').
+
+        Returns
+        -------
+        list[dict]
+            ``{"key": ..., "ok": bool, "response": ...}`` por valor.
+        """
+        params = {"esquema": schema} if schema else {}
+
+        def worker(chunk):
+            outcomes = []
+            for key_value in chunk:
+                endpoint = f"{self.table_name}/{key_name}/{key_value}"
+                response = self._make_request("DELETE", endpoint, **params)
+                outcomes.append({"key": key_value, "ok": response is not None, "response": response})
+            return outcomes
+
+        return self._run_chunks(key_values, worker, chunk_size, max_workers)
@@ -0,0 +1,442 @@
+# utils/assets.py
+"""
+Paquetes de CSS y JS con el hash del contenido en el nombre.
+
+``flask construir-assets`` une los archivos de cada paquete de BUNDLES,
+los minifica, copia con hash las fuentes e imágenes a las que apuntan
+los CSS y escribe ``static/dist/manifest.json``. Las plantillas usan
+``asset_tags('base', 'js')`` y la ruta /assets los sirve con caché
+``immutable``: un cambio de contenido cambia el nombre, así que el
+navegador nunca necesita revalidarlos.
+
+Sin manifiesto (p. ej. en desarrollo antes del primer build) se enlazan
+los archivos originales de static uno por uno.
+
+El build también deja junto a cada archivo de texto de static sus
+versiones ``.br`` y ``.gz`` con la compresión máxima, que la ruta de
+estáticos entrega según ``Accept-Encoding``.
+
+Los paquetes de LIBRARIES no se enlazan: ``js/cargador.js`` los pide
+sólo en las páginas (PAGE_LIBRARIES) o acciones que los usan.
+
+Las hojas de ICON_STYLESHEETS se recortan a los iconos que usa la
+aplicación y sus fuentes a esos glifos (ver utils/icon_subset).
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from config_flask import BASE_DIR, PRECOMPRESS_EXTENSIONS, PRECOMPRESS_MIN_SIZE, STATIC_URL
+
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+ASSETS_URL = "/assets/"
+# Caracteres del hash en los nombres
+HASH_LENGTH = 10
+# Codificaciones precomprimidas, en orden de preferencia: (nombre, extensión)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Carpetas de static que se precomprimen: los paquetes y los assets del
+# repositorio, nunca lo que suben los usuarios (static/media, static/uploads)
+PRECOMPRESS_DIRS = [
+    DIST_DIR,
+    *(os.path.join(STATIC_DIR, name) for name in ("css", "js", "libs", "fonts", "styles")),
+]
+# Una versión comprimida que no ahorra al menos esto no se guarda
+MIN_SAVING = 0.1
+
+# Paquetes por layout, en el orden de carga. Las rutas son relativas a static/
+BUNDLES = {
+    "base": {
+        "css": [
+            "css/bootstrap.min.css",
+            "css/icons.min.css",
+            "css/app.min.css",
+            "styles/logo.css",
+        ],
+        "js": [
+            "libs/jquery/jquery.min.js",
+            "libs/bootstrap/js/bootstrap.bundle.min.js",
+            "libs/metismenu/metisMenu.min.js",
+            "libs/simplebar/simplebar.min.js",
+            "libs/node-waves/waves.min.js",
+            "libs/jquery-sparkline/jquery.sparkline.min.js",
+            "js/app.js",
+            "js/ajax.js",
+            "js/palabras_claves.js",
+            "js/cargador.js",
+        ],
+    },
+    "datatables": {
+        "css": [
+            "libs/datatables.net-bs4/css/dataTables.bootstrap4.min.css",
+            "libs/datatables.net-responsive-bs4/css/responsive.bootstrap4.min.css",
+        ],
+        "js": [
+            "libs/datatables.net/js/jquery.dataTables.min.js",
+            "libs/datatables.net-bs4/js/dataTables.bootstrap4.min.js",
+            "libs/datatables.net-responsive/js/dataTables.responsive.min.js",
+            "libs/datatables.net-responsive-bs4/js/responsive.bootstrap4.min.js",
+        ],
+    },
+    "fullcalendar": {
+        "css": ["libs/fullcalendar/fullcalendar.min.css"],
+        "js": [
+            "libs/moment/min/moment.min.js",
+            "libs/jquery-ui/jquery-ui.min.js",
+            "libs/fullcalendar/fullcalendar.min.js",
+        ],
+    },
+    "chartjs": {
+        "js": ["libs/chart.js/Chart.bundle.min.js"],
+    },
+    "editor": {
+        "css": ["libs/summernote/summernote-bs4.min.css"],
+        "js": [
+            "libs/summernote/summernote-bs4.min.js",
+            "libs/summernote/lang/summernote-es-ES.min.js",
+        ],
+    },
+    "pdfmake": {
+        "js": [
+            "libs/pdfmake/build/pdfmake.min.js",
+            "libs/pdfmake/build/vfs_fonts.js",
+        ],
+    },
+}
+
+# Paquetes que no se enlazan en el HTML: los pide js/cargador.js cuando
+# la página o una acción los necesita
+LIBRARIES = ("datatables", "fullcalendar", "chartjs", "editor", "pdfmake")
+# Librerías de cada página (por plantilla): el cargador las pide al
+# cargar la página y el <head> las precarga. Las demás se piden al usarse
+# (el editor al enfocar un <textarea data-editor>, pdfmake al pulsar un
+# elemento con data-libreria="pdfmake")
+PAGE_LIBRARIES = {
+    "list_ideas.html": ["datatables"],
+    "list_soluciones.html": ["datatables"],
+    "list_oportunidades.html": ["datatables"],
+    "detail_ideas.html": ["datatables"],
+    "detail_soluciones.html": ["datatables"],
+    "listar_proyectos.html": ["datatables"],
+    "dashboard.html": ["chartjs"],
+    "estadisticas_ideas.html": ["chartjs"],
+    "calendar.html": ["fullcalendar"],
+}
+
+# Hojas de fuentes de iconos que el build recorta a los iconos usados
+ICON_STYLESHEETS = {"css/icons.min.css"}
+
+_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_IMPORT_RE = re.compile(r"@import\s+[^;]+;")
+_CHARSET_RE = re.compile(r"@charset\s+[^;]+;")
+_SOURCEMAP_RE = re.compile(r"/\*[#@]\s*sourceMappingURL=[^*]*\*/|^//[#@]\s*sourceMappingURL=.*$", re.MULTILINE)
+_COMMENT_RE = re.compile(r"/\*(?!!).*?\*/", re.DOTALL)
+
+_manifest = None
+_manifest_mtime = None
+_manifest_lock = threading.Lock()
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def _hashed_name(name, data):
+    base, ext = os.path.splitext(name)
+    return f"{base}.{_digest(data)}{ext}"
+
+
+def minify_css(text):
+    """Quita comentarios (salvo los ``/*! licencia */``) y espacios sobrantes."""
+    text = _COMMENT_RE.sub("", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r";}", "}", text)
+    return text.strip()
+
+
+def minify_js(text):
+    """Minifica con rjsmin si está instalado; si no, el archivo queda igual."""
+    try:
+        import rjsmin
+    except ImportError:
+        return text
+    return rjsmin.jsmin(text, keep_bang_comments=True)
+
+
+def _css_urls(text, source, copied):
+    """
+    Reescribe los ``url()`` relativos de un CSS: el archivo apuntado se
+    copia a dist con hash y la URL pasa a /assets, así las fuentes e
+    imágenes también se guardan en caché sin revalidar.
+    """
+    folder = os.path.dirname(os.path.join(STATIC_DIR, source))
+
+    def _replace(match):
+        url = match.group(2).strip()
+        if url.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return match.group(0)
+        path, sep, suffix = _split_url(url)
+        target = os.path.normpath(os.path.join(folder, path))
+        if not os.path.isfile(target) or not target.startswith(STATIC_DIR):
+            return match.group(0)
+        relative = os.path.relpath(target, STATIC_DIR).replace(os.sep, "/")
+        if relative not in copied:
+            with open(target, "rb") as f:
+                _store(relative, f.read(), copied)
+        return f'url("{ASSETS_URL}{copied[relative]}{sep}{suffix}")'
+
+    return _URL_RE.sub(_replace, text)
+
+
+def _store(relative, data, copied):
+    """Guarda ``data`` en dist con hash en el nombre y retorna su URL."""
+    hashed = _hashed_name(relative, data)
+    destination = os.path.join(DIST_DIR, *hashed.split("/"))
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with open(destination, "wb") as f:
+        f.write(data)
+    copied[relative] = hashed
+    return ASSETS_URL + hashed
+
+
+def _subset_icons(text, source, name, copied):
+    """
+    Recorta una hoja de iconos (ver utils/icon_subset). Sin fontTools la
+    hoja queda completa.
+    """
+    from utils import icon_subset
+
+    # Caracteres que las demás hojas del paquete piden a las fuentes de iconos
+    extra = set()
+    for other in BUNDLES[name]["css"]:
+        if other != source:
+            extra |= icon_subset.content_codepoints(_read(other))
+    try:
+        text, stats = icon_subset.subset_stylesheet(
+            text,
+            os.path.join(STATIC_DIR, source),
+            lambda relative, data: _store(relative, data, copied),
+            extra_codepoints=extra,
+        )
+    except RuntimeError as e:
+        print(f"[assets] {e}; {source} queda completo")
+        return text
+    print(f"[assets] {source}: {stats['clases']} iconos, {stats['glifos']} glifos, "
+          f"fuentes de {stats['bytes_antes']} a {stats['bytes']} bytes")
+    return text
+
+
+def _split_url(url):
+    for i, char in enumerate(url):
+        if char in "?#":
+            return url[:i], char, url[i + 1:]
+    return url, "", ""
+
+
+def _read(source):
+    with open(os.path.join(STATIC_DIR, source), encoding="utf-8-sig") as f:
+        return _SOURCEMAP_RE.sub("", f.read())
+
+
+def build_bundle(name, kind, copied):
+    """Contenido de un paquete (``kind`` es "css" o "js")."""
+    parts = []
+    if kind == "css":
+        imports = []
+        for source in BUNDLES[name].get("css", []):
+            text = _CHARSET_RE.sub("", _read(source))
+            if source in ICON_STYLESHEETS:
+                text = _subset_icons(text, source, name, copied)
+            # Los @import sólo son válidos al principio de la hoja
+            imports.extend(_IMPORT_RE.findall(text))
+            text = _IMPORT_RE.sub("", text)
+            text = _css_urls(text, source, copied)
+            parts.append(text if source.endswith(".min.css") else minify_css(text))
+        return "\n".join(imports + parts)
+    for source in BUNDLES[name].get("js", []):
+        text = _read(source)
+        text = text if source.endswith(".min.js") else minify_js(text)
+        # ";" por si un archivo no termina su última sentencia
+        parts.append(text.rstrip() + "\n;")
+    return "\n".join(parts)
+
+
+def build():
+    """
+    Construye todos los paquetes y escribe el manifiesto. Se conservan los
+    archivos del build anterior (páginas ya cargadas pueden pedirlos) y se
+    borran los más viejos.
+
+    Returns
+    -------
+    dict
+        Manifiesto {"base.css": "base.1a2b3c4d5e.css", ...}.
+    """
+    os.makedirs(DIST_DIR, exist_ok=True)
+    previous = _read_manifest() or {}
+    manifest, copied = {}, {}
+    for name, kinds in BUNDLES.items():
+        for kind in kinds:
+            data = build_bundle(name, kind, copied).encode("utf-8")
+            hashed = _hashed_name(f"{name}.{kind}", data)
+            with open(os.path.join(DIST_DIR, hashed), "wb") as f:
+                f.write(data)
+            manifest[f"{name}.{kind}"] = hashed
+    for relative, hashed in copied.items():
+        manifest[relative] = hashed
+
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+    _clean(set(manifest.values()) | set(previous.values()))
+    return manifest
+
+
+def _clean(keep):
+    for folder, _, names in os.walk(DIST_DIR):
+        for name in names:
+            path = os.path.join(folder, name)
+            relative = os.path.relpath(path, DIST_DIR).replace(os.sep, "/")
+            original = relative[:-3] if relative.endswith((".br", ".gz")) else relative
+            if original not in keep and path != MANIFEST_PATH:
+                os.remove(path)
+    for folder, _, _ in os.walk(DIST_DIR, topdown=False):
+        if folder != DIST_DIR and not os.listdir(folder):
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+def _read_manifest():
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_manifest():
+    """Manifiesto actual; se vuelve a leer si el build lo reemplazó. None si no hay build."""
+    global _manifest, _manifest_mtime
+    try:
+        mtime = os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        return None
+    if mtime != _manifest_mtime:
+        with _manifest_lock:
+            if mtime != _manifest_mtime:
+                _manifest = _read_manifest()
+                _manifest_mtime = mtime
+    return _manifest
+
+
+def asset_urls(name, kind):
+    """URLs del paquete (una, con hash) o de sus archivos originales si no hay build."""
+    manifest = get_manifest()
+    key = f"{name}.{kind}"
+    if manifest and key in manifest:
+        return [ASSETS_URL + manifest[key]]
+    return [STATIC_URL + source for source in BUNDLES[name].get(kind, [])]
+
+
+def library_urls():
+    """{librería: {"css": [...], "js": [...]}} para el cargador."""
+    return {
+        name: {kind: asset_urls(name, kind) for kind in ("css", "js")}
+        for name in LIBRARIES
+    }
+
+
+def _compress_file(path):
+    """
+    Escribe ``path.br`` y ``path.gz`` (o borra los viejos si no ahorran).
+    Retorna (bytes originales, bytes br) para el resumen.
+    """
+    import brotli
+
+    with open(path, "rb") as f:
+        data = f.read()
+    mode = brotli.MODE_FONT if path.endswith((".ttf", ".eot")) else brotli.MODE_TEXT
+    variants = {
+        ".br": lambda: brotli.compress(data, mode=mode, quality=11),
+        # mtime=0: el mismo archivo da siempre los mismos bytes (y el mismo ETag)
+        ".gz": lambda: gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    sizes = {}
+    for ext, compress in variants.items():
+        target = path + ext
+        compressed = compress()
+        sizes[ext] = len(compressed)
+        if len(compressed) > len(data) * (1 - MIN_SAVING):
+            if os.path.exists(target):
+                os.remove(target)
+            sizes[ext] = len(data)
+            continue
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(compressed)
+        # Misma fecha que el original: si el original cambia, la versión queda vieja y se ignora
+        stat = os.stat(path)
+        os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp, target)
+    return len(data), sizes[".br"]
+
+
+def precompress(roots=None, workers=None):
+    """
+    Genera las versiones .br y .gz de los archivos de texto de ``roots``
+    (por defecto PRECOMPRESS_DIRS) que no las tengan al día, en paralelo.
+
+    Returns
+    -------
+    dict
+        {"archivos", "bytes", "bytes_br"} de los archivos procesados.
+    """
+    pending = []
+    for root in roots or PRECOMPRESS_DIRS:
+        for folder, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(folder, name)
+                if not name.lower().endswith(PRECOMPRESS_EXTENSIONS) or os.path.getsize(path) < PRECOMPRESS_MIN_SIZE:
+                    continue
+                mtime = os.stat(path).st_mtime_ns
+                if all(os.path.exists(path + ext) and os.stat(path + ext).st_mtime_ns == mtime for _, ext in ENCODINGS):
+                    continue
+                pending.append(path)
+
+    stats = {"archivos": 0, "bytes": 0, "bytes_br": 0}
+    if not pending:
+        return stats
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for original, br in pool.map(_compress_file, pending, chunksize=8):
+            stats["archivos"] += 1
+            stats["bytes"] += original
+            stats["bytes_br"] += br
+    return stats
+
+
+def precompressed_variant(path, accept_encodings):
+    """
+    (ruta, codificación) de la mejor versión precomprimida de ``path`` que
+    acepte el cliente y esté al día; (path, None) si no hay.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return path, None
+    for encoding, ext in ENCODINGS:
+        if accept_encodings.quality(encoding) <= 0:
+            continue
+        variant = path + ext
+        try:
+            if os.stat(variant).st_mtime_ns == mtime:
+                return variant, encoding
+        except OSError:
+            continue
+    return path, None
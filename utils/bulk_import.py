@@ -0,0 +1,294 @@
+# utils/bulk_import.py
+import csv
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from werkzeug.datastructures import MultiDict
+
+from forms.formsIdea import IdeaForm
+from forms.formsOportunidades import OportunidadForm
+from forms.formsSoluciones import SolucionForm
+from utils.api_client import APIClient
+from utils.catalogs import ENTITIES, load_catalogs, name_id_map, normalize_name
+from utils import indices
+
+# Registros por lote enviado a bulk_insert
+IMPORT_BATCH_SIZE = 200
+# Errores por fila que se conservan en el estado del trabajo
+MAX_ERRORES = 100
+# Trabajos terminados que se recuerdan para consultar su estado
+MAX_TRABAJOS = 50
+
+ALLOWED_IMPORT_EXTENSIONS = {"csv", "xlsx"}
+
+FORMS = {
+    "ideas": IdeaForm,
+    "soluciones": SolucionForm,
+    "oportunidades": OportunidadForm,
+}
+
+# Encabezados aceptados para las columnas de catálogo
+FOCO_HEADERS = ("foco_innovacion", "foco", "id_foco_innovacion")
+TIPO_HEADERS = ("tipo_innovacion", "tipo", "id_tipo_innovacion")
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+# ----------------------------------
+# Lectura incremental de los archivos
+# ----------------------------------
+def iter_rows(path):
+    """
+    Recorre el archivo fila a fila como diccionarios {encabezado: valor}.
+
+    Los CSV se leen con csv.DictReader (detectando ',' o ';') y los XLSX
+    con openpyxl en modo read_only, así que la memoria no depende del
+    tamaño del archivo.
+    """
+    if path.lower().endswith(".xlsx"):
+        yield from _iter_xlsx(path)
+    else:
+        yield from _iter_csv(path)
+
+
+def _sniff(fh):
+    """Dialecto del CSV (',' o ';'); deja el archivo al principio."""
+    sample = fh.read(4096)
+    fh.seek(0)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;")
+    except csv.Error:
+        return csv.excel
+
+
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.DictReader(fh, dialect=_sniff(fh))
+        reader.fieldnames = [normalize_name(h) for h in (reader.fieldnames or [])]
+        for row in reader:
+            yield row
+
+
+def _iter_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Para importar archivos XLSX se requiere el paquete openpyxl")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [normalize_name(h) for h in next(rows, ())]
+        for values in rows:
+            if not any(v not in (None, "") for v in values):
+                continue
+            yield {h: v for h, v in zip(headers, values) if h}
+    finally:
+        workbook.close()
+
+
+def count_rows(path):
+    """Cuenta las filas de datos sin cargarlas en memoria (para el progreso)."""
+    if path.lower().endswith(".xlsx"):
+        return None
+    # Con csv.reader un campo entre comillas con saltos de línea es una sola fila
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        total = sum(1 for row in csv.reader(fh, dialect=_sniff(fh)) if row)
+    return max(total - 1, 0)
+
+
+# ---------------------
+# Validación de filas
+# ---------------------
+def _first(row, headers):
+    for h in headers:
+        value = row.get(h)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _as_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def build_payload(entity, row, foco_ids, tipo_ids, user_email, form_choices):
+    """
+    Valida una fila con las mismas reglas del formulario de la entidad y
+    construye el payload que usan las vistas de creación.
+
+    Returns
+    -------
+    tuple
+        (payload, None) si la fila es válida, (None, errores) si no.
+    """
+    config = ENTITIES[entity]
+    foco_raw = _first(row, FOCO_HEADERS)
+    tipo_raw = _first(row, TIPO_HEADERS)
+    foco_id = foco_ids.get(normalize_name(_as_text(foco_raw)))
+    tipo_id = tipo_ids.get(normalize_name(_as_text(tipo_raw)))
+
+    errors = []
+    if foco_raw is not None and foco_id is None:
+        errors.append(f"Foco de innovación desconocido: {foco_raw}")
+    if tipo_raw is not None and tipo_id is None:
+        errors.append(f"Tipo de innovación desconocido: {tipo_raw}")
+
+    fecha = row.get("fecha_creacion")
+    if isinstance(fecha, datetime):
+        fecha = fecha.strftime("%Y-%m-%d")
+
+    formdata = MultiDict({
+        "titulo": _as_text(row.get("titulo")),
+        "descripcion": _as_text(row.get("descripcion")),
+        "palabras_claves": _as_text(row.get("palabras_claves")),
+        "recursos_requeridos": _as_text(row.get("recursos_requeridos")),
+        config["foco_field"]: "" if foco_id is None else str(foco_id),
+        config["tipo_field"]: "" if tipo_id is None else str(tipo_id),
+    })
+    if fecha:
+        formdata["fecha_creacion"] = _as_text(fecha)[:10]
+
+    form = FORMS[entity](formdata=formdata, meta={"csrf": False})
+    getattr(form, config["foco_field"]).choices = form_choices["focos"]
+    getattr(form, config["tipo_field"]).choices = form_choices["tipos"]
+    if not form.validate():
+        for field, field_errors in form.errors.items():
+            errors.extend(f"{field}: {e}" for e in field_errors)
+    if errors:
+        return None, errors
+
+    payload = {
+        "id_tipo_innovacion": getattr(form, config["tipo_field"]).data,
+        "id_foco_innovacion": getattr(form, config["foco_field"]).data,
+        "titulo": form.titulo.data.strip(),
+        "descripcion": form.descripcion.data.strip(),
+        "palabras_claves": form.palabras_claves.data.strip(),
+        "recursos_requeridos": form.recursos_requeridos.data or 0,
+        "creador_por": user_email or "",
+        "estado": True,
+    }
+    if entity == "ideas":
+        fecha_creacion = form.fecha_creacion.data or datetime.now()
+        payload["fecha_creacion"] = fecha_creacion.strftime("%Y-%m-%dT%H:%M:%S")
+        payload["archivo_multimedia"] = ""
+    elif entity == "soluciones":
+        payload["archivo_multimedia"] = None
+        payload["desarrollador_por"] = "1"
+        payload["area_unidad_desarrollo"] = "1"
+    else:
+        payload["archivo_multimedia"] = None
+    return payload, None
+
+
+# ----------------------------
+# Trabajos de importación
+# ----------------------------
+def get_job(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job, errores=list(job["errores"])) if job else None
+
+
+def _update_job(job_id, **changes):
+    with _jobs_lock:
+        _jobs[job_id].update(changes)
+
+
+def _add_errors(job_id, errors):
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job["fallidas"] += len(errors)
+        room = MAX_ERRORES - len(job["errores"])
+        if room > 0:
+            job["errores"].extend(errors[:room])
+
+
+def start_import(app, entity, path, user_email):
+    """
+    Lanza la importación de ``path`` en un hilo y devuelve el id del
+    trabajo para consultar su progreso con get_job (sólo quien lo lanzó,
+    ver ``usuario``).
+    """
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "id": job_id,
+            "usuario": user_email,
+            "entidad": entity,
+            "estado": "en_proceso",
+            "total": count_rows(path),
+            "procesadas": 0,
+            "insertadas": 0,
+            "fallidas": 0,
+            "errores": [],
+        }
+        terminados = [k for k, j in _jobs.items() if j["estado"] != "en_proceso"]
+        for old_id in terminados[:max(len(_jobs) - MAX_TRABAJOS, 0)]:
+            del _jobs[old_id]
+
+    thread = threading.Thread(
+        target=_run_import, args=(app, job_id, entity, path, user_email), daemon=True
+    )
+    thread.start()
+    return job_id
+
+
+def _run_import(app, job_id, entity, path, user_email):
+    try:
+        with app.app_context():
+            client = APIClient(ENTITIES[entity]["table"])
+            focos, tipos = load_catalogs(client)
+            foco_ids = name_id_map(focos, "id_foco_innovacion")
+            tipo_ids = name_id_map(tipos, "id_tipo_innovacion")
+            form_choices = {
+                "focos": [(f["id_foco_innovacion"], f.get("name")) for f in focos],
+                "tipos": [(t["id_tipo_innovacion"], t.get("name")) for t in tipos],
+            }
+
+            batch, procesadas, insertados = [], 0, []
+            for line, row in enumerate(iter_rows(path), start=2):
+                procesadas += 1
+                payload, errors = build_payload(entity, row, foco_ids, tipo_ids, user_email, form_choices)
+                if errors:
+                    _add_errors(job_id, [{"fila": line, "errores": errors}])
+                else:
+                    batch.append((line, payload))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    insertados.extend(_flush_batch(client, job_id, batch))
+                    batch = []
+                _update_job(job_id, procesadas=procesadas)
+            if batch:
+                insertados.extend(_flush_batch(client, job_id, batch))
+            indices.on_created(entity, insertados)
+            _update_job(job_id, estado="completado", total=procesadas)
+    except Exception as e:
+        print(f"❌ Error en la importación {job_id}: {e}")
+        _update_job(job_id, estado="error", mensaje=str(e))
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _flush_batch(client, job_id, batch):
+    outcomes = client.bulk_insert([payload for _, payload in batch])
+    insertadas = sum(1 for o in outcomes if o["ok"])
+    errors = [
+        {"fila": line, "errores": ["La API rechazó el registro"]}
+        for (line, _), outcome in zip(batch, outcomes) if not outcome["ok"]
+    ]
+    with _jobs_lock:
+        _jobs[job_id]["insertadas"] += insertadas
+    if errors:
+        _add_errors(job_id, errors)
+    return [outcome["record"] for outcome in outcomes if outcome["ok"]]
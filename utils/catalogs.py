@@ -0,0 +1,68 @@
+# utils/catalogs.py
+import unicodedata
+
+
+# Configuración común de las tres entidades principales
+ENTITIES = {
+    "ideas": {
+        "table": "idea",
+        "key": "codigo_idea",
+        "tipo_field": "id_tipo_innovacion",
+        "foco_field": "id_foco_innovacion",
+    },
+    "soluciones": {
+        "table": "solucion",
+        "key": "codigo_solucion",
+        "tipo_field": "tipo_innovacion",
+        "foco_field": "foco_innovacion",
+    },
+    "oportunidades": {
+        "table": "oportunidad",
+        "key": "codigo_oportunidad",
+        "tipo_field": "tipo_innovacion",
+        "foco_field": "foco_innovacion",
+    },
+}
+
+
+def normalize_name(value):
+    """Minúsculas y sin tildes, para comparar nombres de catálogo."""
+    text = unicodedata.normalize("NFKD", str(value or "").strip().lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def load_catalogs(client):
+    """
+    Obtiene los catálogos de focos y tipos de innovación.
+
+    Returns
+    -------
+    tuple
+        (focos, tipos) tal como los devuelve la API.
+    """
+    focos = client.fetch_endpoint_data("foco_innovacion") or []
+    tipos = client.fetch_endpoint_data("tipo_innovacion") or []
+    return focos, tipos
+
+
+def id_name_map(items, id_field):
+    """Construye {id: nombre} a partir de un catálogo."""
+    return {item.get(id_field): item.get("name") or item.get("nombre") for item in items}
+
+
+def name_id_map(items, id_field):
+    """
+    Construye {nombre normalizado: id} a partir de un catálogo. El id en
+    texto también se acepta como clave, de modo que una celda puede traer
+    el nombre o directamente el id.
+    """
+    result = {}
+    for item in items:
+        item_id = item.get(id_field)
+        if item_id is None:
+            continue
+        result[str(item_id)] = item_id
+        name = item.get("name") or item.get("nombre")
+        if name:
+            result[normalize_name(name)] = item_id
+    return result
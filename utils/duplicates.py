@@ -0,0 +1,365 @@
+# utils/duplicates.py
+import hashlib
+import os
+import pickle
+import random
+import re
+import threading
+from collections import defaultdict
+
+from config_flask import DUPLICATES_INDEX_PATH
+from utils.api_client import APIClient
+from utils.catalogs import normalize_name
+
+# Firma MinHash: NUM_PERM = BANDS * ROWS. Con 16 bandas de 4 filas, dos
+# ideas con similitud de Jaccard 0.6 coinciden en alguna banda con
+# probabilidad ~0.9, y con 0.2 sólo ~0.03.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Similitud estimada mínima para sugerir un duplicado
+DEFAULT_THRESHOLD = 0.5
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20240501)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text):
+    """Conjunto de shingles de ``SHINGLE_SIZE`` palabras del texto normalizado."""
+    words = _WORD_RE.findall(normalize_name(text))
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def signature(text):
+    """Firma MinHash (tupla de NUM_PERM enteros) de un texto."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+        for s in shingles(text)
+    ]
+    if not hashes:
+        return None
+    return tuple(
+        min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def similarity(sig_a, sig_b):
+    """Estimación de la similitud de Jaccard a partir de dos firmas."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def idea_text(idea):
+    return f"{idea.get('titulo') or ''} {idea.get('descripcion') or ''}"
+
+
+class DuplicateIndex:
+    """
+    Índice LSH sobre las firmas MinHash de las ideas.
+
+    Cada firma se divide en BANDS bandas; las ideas que comparten alguna
+    banda son candidatas y sólo a ellas se les calcula la similitud, así
+    que una consulta no recorre todas las ideas.
+    """
+
+    def __init__(self):
+        self.signatures = {}
+        self.titles = {}
+        self.buckets = [defaultdict(set) for _ in range(BANDS)]
+        self.lock = threading.RLock()
+        # Entradas del log escritas desde la última foto completa
+        self.pending = 0
+        # Mientras se carga desde la API: códigos eliminados durante la carga
+        self.tombstones = None
+
+    @staticmethod
+    def _bands(sig):
+        return [hash(sig[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+
+    def add(self, codigo, idea):
+        self.put(codigo, signature(idea_text(idea)), idea.get("titulo"))
+
+    def put(self, codigo, sig, titulo):
+        """Agrega una firma ya calculada (``sig`` None sólo quita la idea)."""
+        with self.lock:
+            self.remove(codigo)
+            if sig is None:
+                return
+            self.signatures[codigo] = sig
+            self.titles[codigo] = titulo
+            for band, key in enumerate(self._bands(sig)):
+                self.buckets[band][key].add(codigo)
+
+    def remove(self, codigo):
+        with self.lock:
+            sig = self.signatures.pop(codigo, None)
+            self.titles.pop(codigo, None)
+            if sig is None:
+                return
+            for band, key in enumerate(self._bands(sig)):
+                bucket = self.buckets[band].get(key)
+                if bucket:
+                    bucket.discard(codigo)
+                    if not bucket:
+                        del self.buckets[band][key]
+
+    def _candidates(self, sig):
+        found = set()
+        for band, key in enumerate(self._bands(sig)):
+            found |= self.buckets[band].get(key, set())
+        return found
+
+    def query(self, text, threshold=DEFAULT_THRESHOLD, limit=5, exclude=None):
+        """
+        Ideas parecidas a ``text``.
+
+        Returns
+        -------
+        list[dict]
+            ``{"codigo_idea", "titulo", "similitud"}`` ordenadas de mayor a
+            menor similitud.
+        """
+        sig = signature(text)
+        if sig is None:
+            return []
+        with self.lock:
+            scored = []
+            for codigo in self._candidates(sig):
+                if codigo == exclude:
+                    continue
+                score = similarity(sig, self.signatures[codigo])
+                if score >= threshold:
+                    scored.append({"codigo_idea": codigo, "titulo": self.titles.get(codigo), "similitud": round(score, 2)})
+        scored.sort(key=lambda item: item["similitud"], reverse=True)
+        return scored[:limit]
+
+    def clusters(self, codigos, threshold=DEFAULT_THRESHOLD):
+        """
+        Agrupa los ``codigos`` dados en grupos de posibles duplicados.
+
+        Returns
+        -------
+        dict
+            {codigo: [otros códigos del mismo grupo]} sólo para las ideas
+            que tienen al menos un posible duplicado.
+        """
+        codigos = [c for c in codigos if c in self.signatures]
+        allowed = set(codigos)
+        parent = {c: c for c in codigos}
+
+        def find(c):
+            while parent[c] != c:
+                parent[c] = parent[parent[c]]
+                c = parent[c]
+            return c
+
+        with self.lock:
+            for codigo in codigos:
+                sig = self.signatures[codigo]
+                for other in self._candidates(sig) & allowed:
+                    if other != codigo and similarity(sig, self.signatures[other]) >= threshold:
+                        parent[find(other)] = find(codigo)
+
+        groups = defaultdict(list)
+        for codigo in codigos:
+            groups[find(codigo)].append(codigo)
+        return {
+            codigo: [c for c in group if c != codigo]
+            for group in groups.values() if len(group) > 1
+            for codigo in group
+        }
+
+    def save(self, path):
+        with self.lock:
+            data = {"num_perm": NUM_PERM, "signatures": dict(self.signatures), "titles": dict(self.titles)}
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(data, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as fh:
+            data = pickle.load(fh)
+        ix = cls()
+        if data.get("num_perm") != NUM_PERM:
+            return ix
+        for codigo, sig in data["signatures"].items():
+            ix.signatures[codigo] = sig
+            ix.titles[codigo] = data["titles"].get(codigo)
+            for band, key in enumerate(cls._bands(sig)):
+                ix.buckets[band][key].add(codigo)
+        return ix
+
+    def replay(self, log_path):
+        """Aplica las altas y bajas del log escritas después de la foto."""
+        try:
+            with open(log_path, "rb") as fh:
+                while True:
+                    try:
+                        entry = pickle.load(fh)
+                    except EOFError:
+                        break
+                    except (pickle.UnpicklingError, ValueError):
+                        # Última entrada a medio escribir
+                        break
+                    if entry[0] == "add":
+                        self.put(*entry[1:])
+                    else:
+                        self.remove(entry[1])
+                    self.pending += 1
+        except FileNotFoundError:
+            pass
+
+
+_index = None
+_index_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+# Altas y bajas desde la última foto: se agregan al final de este archivo
+# en lugar de volver a guardar todo el índice en cada escritura
+LOG_PATH = f"{DUPLICATES_INDEX_PATH}.log"
+# Entradas del log tras las cuales se guarda una foto completa y se vacía
+COMPACT_EVERY = 500
+
+
+def get_index():
+    """
+    Índice en memoria: la foto de disco más su log. Sin foto, el índice
+    arranca vacío y se llena desde la API en un hilo aparte (o con ``flask
+    reindexar-duplicados``), así que la primera petición no espera la
+    carga completa.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                ix = None
+                if os.path.exists(DUPLICATES_INDEX_PATH):
+                    try:
+                        ix = DuplicateIndex.load(DUPLICATES_INDEX_PATH)
+                        ix.replay(LOG_PATH)
+                    except Exception as e:
+                        ix = None
+                        print(f"[duplicates] No se pudo cargar el índice: {e}")
+                if ix is None or not ix.signatures:
+                    ix = DuplicateIndex()
+                    ix.tombstones = set()
+                    threading.Thread(target=_fill, args=(ix,), daemon=True).start()
+                _index = ix
+    return _index
+
+
+def _fill(ix):
+    """Carga todas las ideas de la API en ``ix`` sin pisar lo escrito mientras tanto."""
+    try:
+        for page in APIClient("idea").iter_pages("codigo_idea"):
+            for idea in page:
+                codigo = idea.get("codigo_idea")
+                if codigo is None:
+                    continue
+                sig = signature(idea_text(idea))
+                with ix.lock:
+                    # Lo que las vistas agregaron o quitaron durante la carga es más nuevo
+                    if codigo not in ix.signatures and codigo not in ix.tombstones:
+                        ix.put(codigo, sig, idea.get("titulo"))
+    except Exception as e:
+        print(f"[duplicates] Error cargando las ideas: {e}")
+    finally:
+        with ix.lock:
+            ix.tombstones = None
+    _compact(ix)
+
+
+def rebuild():
+    """Construye el índice con todas las ideas de la API y lo guarda."""
+    ix = DuplicateIndex()
+    for page in APIClient("idea").iter_pages("codigo_idea"):
+        for idea in page:
+            if idea.get("codigo_idea") is not None:
+                ix.add(idea["codigo_idea"], idea)
+    _compact(ix)
+    return ix
+
+
+def _compact(ix):
+    """Guarda la foto completa y vacía el log."""
+    try:
+        os.makedirs(os.path.dirname(DUPLICATES_INDEX_PATH), exist_ok=True)
+        with _log_lock:
+            ix.save(DUPLICATES_INDEX_PATH)
+            open(LOG_PATH, "wb").close()
+            ix.pending = 0
+    except Exception as e:
+        print(f"[duplicates] No se pudo guardar el índice: {e}")
+
+
+def _append(ix, entry):
+    try:
+        data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        with _log_lock:
+            os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+            with open(LOG_PATH, "ab") as fh:
+                fh.write(data)
+            ix.pending += 1
+            # Una foto tomada a mitad de la carga inicial quedaría incompleta
+            compact = ix.pending >= COMPACT_EVERY and ix.tombstones is None
+        if compact:
+            _compact(ix)
+    except Exception as e:
+        print(f"[duplicates] No se pudo registrar el cambio: {e}")
+
+
+def _put(ix, idea):
+    codigo = idea["codigo_idea"]
+    sig = signature(idea_text(idea))
+    ix.put(codigo, sig, idea.get("titulo"))
+    _append(ix, ("add", codigo, sig, idea.get("titulo")))
+
+
+def add_idea(idea):
+    """Registra (o actualiza) una idea en el índice."""
+    try:
+        if idea.get("codigo_idea") is None:
+            return
+        _put(get_index(), idea)
+    except Exception as e:
+        print(f"[duplicates] Error indexando idea: {e}")
+
+
+def remove_idea(codigo_idea):
+    """Quita una idea del índice."""
+    try:
+        ix = get_index()
+        with ix.lock:
+            ix.remove(codigo_idea)
+            if ix.tombstones is not None:
+                ix.tombstones.add(codigo_idea)
+        _append(ix, ("remove", codigo_idea))
+    except Exception as e:
+        print(f"[duplicates] Error eliminando idea {codigo_idea}: {e}")
+
+
+def sync_new_ideas():
+    """Agrega al índice las ideas con código mayor al último conocido."""
+    try:
+        ix = get_index()
+        with ix.lock:
+            if ix.tombstones is not None:
+                # La carga inicial en curso ya las va a traer
+                return
+            last = max(ix.signatures) if ix.signatures else None
+        where = f"codigo_idea > {int(last)}" if last is not None else None
+        for page in APIClient("idea").iter_pages("codigo_idea", where):
+            for idea in page:
+                if idea.get("codigo_idea") is not None:
+                    _put(ix, idea)
+    except Exception as e:
+        print(f"[duplicates] Error sincronizando ideas: {e}")
@@ -0,0 +1,341 @@
+# utils/evaluation.py
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.api_client import APIClient
+
+# Escala de los puntajes por criterio
+MIN_PUNTAJE = 0.0
+MAX_PUNTAJE = 10.0
+# Rankings guardados (uno por combinación de pesos)
+RANKING_CACHE_SIZE = 16
+
+# Criterios usados mientras la tabla criterio_evaluacion esté vacía. Las
+# tablas criterio_evaluacion y evaluacion_idea se crean con
+# sql/evaluacion.sql, que además carga estos criterios (mismos ids) para
+# que sus pesos se puedan guardar.
+DEFAULT_CRITERIOS = [
+    {"id": 1, "nombre": "Novedad", "peso": 1.0},
+    {"id": 2, "nombre": "Viabilidad", "peso": 1.0},
+    {"id": 3, "nombre": "Impacto", "peso": 1.5},
+    {"id": 4, "nombre": "Alineación estratégica", "peso": 1.0},
+]
+
+_INITIAL_CAPACITY = 1024
+
+
+class EvaluationMatrix:
+    """
+    Puntajes de los evaluadores por idea y criterio.
+
+    Cada puntaje es una entrada (idea, evaluador, criterio, valor) guardada
+    en arreglos NumPy paralelos; un evaluador que vuelve a puntuar el mismo
+    criterio reemplaza su valor. A partir de ahí todo se calcula sobre la
+    matriz completa con operaciones vectorizadas:
+
+    1. Normalización por evaluador (z-score), para que un evaluador severo
+       y uno generoso pesen lo mismo.
+    2. Promedio por idea y criterio (matriz ideas × criterios), guardado
+       hasta que cambie algún puntaje.
+    3. Total ponderado por los pesos de los criterios y ranking, guardado
+       por combinación de pesos; cambiar pesos sólo repite este paso.
+    """
+
+    def __init__(self, criterios):
+        self._rankings = OrderedDict()
+        self.set_criterios(criterios)
+        self.ideas = {}
+        self.evaluadores = {}
+        self.positions = {}
+        self.size = 0
+        self.idea_idx = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)
+        self.rev_idx = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)
+        self.crit_idx = np.zeros(_INITIAL_CAPACITY, dtype=np.int32)
+        self.values = np.zeros(_INITIAL_CAPACITY, dtype=np.float32)
+        self.version = 0
+        self._aggregate = None
+        self.lock = threading.RLock()
+
+    def set_criterios(self, criterios):
+        """Criterios y pesos; sólo se pueden cambiar los pesos de los criterios ya cargados."""
+        self.criterios = list(criterios)
+        self.criterio_idx = {c["id"]: i for i, c in enumerate(self.criterios)}
+        self.pesos = np.array([float(c.get("peso") or 0) for c in self.criterios], dtype=np.float64)
+        self._rankings.clear()
+
+    # ----------------------------
+    # Carga y actualización
+    # ----------------------------
+    def _grow(self):
+        capacity = len(self.values) * 2
+        for name in ("idea_idx", "rev_idx", "crit_idx", "values"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def set_score(self, codigo_idea, evaluador, id_criterio, puntaje):
+        """Registra (o reemplaza) un puntaje; los criterios desconocidos se ignoran."""
+        crit = self.criterio_idx.get(id_criterio)
+        if crit is None or puntaje is None:
+            return
+        puntaje = min(max(float(puntaje), MIN_PUNTAJE), MAX_PUNTAJE)
+        with self.lock:
+            idea = self.ideas.setdefault(codigo_idea, len(self.ideas))
+            rev = self.evaluadores.setdefault(evaluador, len(self.evaluadores))
+            key = (idea, rev, crit)
+            pos = self.positions.get(key)
+            if pos is None:
+                if self.size == len(self.values):
+                    self._grow()
+                pos = self.positions[key] = self.size
+                self.size += 1
+                self.idea_idx[pos], self.rev_idx[pos], self.crit_idx[pos] = idea, rev, crit
+            self.values[pos] = puntaje
+            self.version += 1
+            self._aggregate = None
+            self._rankings.clear()
+
+    def load(self, rows):
+        """
+        Carga inicial de muchas filas de evaluacion_idea; si un evaluador
+        puntuó dos veces el mismo criterio gana la última fila.
+        """
+        idea_idx, rev_idx, crit_idx, values = [], [], [], []
+        with self.lock:
+            for row in rows:
+                crit = self.criterio_idx.get(row.get("id_criterio"))
+                if crit is None or row.get("puntaje") is None:
+                    continue
+                idea_idx.append(self.ideas.setdefault(row.get("codigo_idea"), len(self.ideas)))
+                rev_idx.append(self.evaluadores.setdefault(row.get("usuario_email"), len(self.evaluadores)))
+                crit_idx.append(crit)
+                values.append(float(row["puntaje"]))
+            if not values:
+                return
+            ideas = np.array(idea_idx, dtype=np.int64)
+            revs = np.array(rev_idx, dtype=np.int64)
+            crits = np.array(crit_idx, dtype=np.int64)
+            keys = (ideas * len(self.evaluadores) + revs) * len(self.criterios) + crits
+            # np.unique se queda con la primera aparición: se recorre al revés
+            _, first = np.unique(keys[::-1], return_index=True)
+            keep = np.sort(len(keys) - 1 - first)
+
+            n = len(keep)
+            capacity = max(_INITIAL_CAPACITY, 1 << (n - 1).bit_length())
+            self.idea_idx = np.zeros(capacity, dtype=np.int32)
+            self.rev_idx = np.zeros(capacity, dtype=np.int32)
+            self.crit_idx = np.zeros(capacity, dtype=np.int32)
+            self.values = np.zeros(capacity, dtype=np.float32)
+            self.idea_idx[:n], self.rev_idx[:n], self.crit_idx[:n] = ideas[keep], revs[keep], crits[keep]
+            self.values[:n] = np.clip(np.array(values)[keep], MIN_PUNTAJE, MAX_PUNTAJE)
+            self.size = n
+            self.positions = dict(zip(
+                zip(self.idea_idx[:n].tolist(), self.rev_idx[:n].tolist(), self.crit_idx[:n].tolist()),
+                range(n),
+            ))
+            self.version += 1
+            self._aggregate = None
+            self._rankings.clear()
+
+    # -------------
+    # Cálculo
+    # -------------
+    def aggregate(self):
+        """
+        Promedios por idea y criterio, sin normalizar y normalizados.
+
+        Returns
+        -------
+        dict
+            ``{"bruto", "normalizado"}`` (matrices ideas × criterios con NaN
+            donde nadie evaluó), ``"evaluaciones"`` (conteo por celda) y
+            ``"evaluadores"`` (evaluadores distintos por idea).
+        """
+        with self.lock:
+            if self._aggregate is not None:
+                return self._aggregate
+            n = self.size
+            ideas, revs, crits = self.idea_idx[:n], self.rev_idx[:n], self.crit_idx[:n]
+            values = self.values[:n].astype(np.float64)
+            n_ideas, n_revs, n_crits = len(self.ideas), len(self.evaluadores), len(self.criterios)
+
+            # z-score por evaluador sobre todos sus puntajes
+            rev_count = np.bincount(revs, minlength=n_revs)
+            rev_mean = np.bincount(revs, values, minlength=n_revs) / np.maximum(rev_count, 1)
+            rev_var = np.bincount(revs, values ** 2, minlength=n_revs) / np.maximum(rev_count, 1) - rev_mean ** 2
+            rev_std = np.sqrt(np.maximum(rev_var, 0))
+            rev_std[rev_std < 1e-9] = 1.0
+            z = (values - rev_mean[revs]) / rev_std[revs]
+
+            cell = ideas.astype(np.int64) * n_crits + crits
+            counts = np.bincount(cell, minlength=n_ideas * n_crits).reshape(n_ideas, n_crits)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                bruto = np.bincount(cell, values, minlength=n_ideas * n_crits).reshape(n_ideas, n_crits) / counts
+                normalizado = np.bincount(cell, z, minlength=n_ideas * n_crits).reshape(n_ideas, n_crits) / counts
+
+            pares = np.unique(ideas.astype(np.int64) * max(n_revs, 1) + revs)
+            evaluadores = np.bincount(pares // max(n_revs, 1), minlength=n_ideas)
+
+            self._aggregate = {
+                "bruto": bruto,
+                "normalizado": normalizado,
+                "evaluaciones": counts,
+                "evaluadores": evaluadores,
+            }
+            return self._aggregate
+
+    def ranking(self, pesos=None, codigos=None, offset=0, limit=50):
+        """
+        Ideas ordenadas por total ponderado (normalizado).
+
+        Parameters
+        ----------
+        pesos : dict, optional
+            {id_criterio: peso} que reemplazan a los de la tabla.
+        codigos : iterable, optional
+            Restringe el ranking a esa cohorte de ideas.
+        offset, limit : int, optional
+            Porción del ranking que se devuelve con detalle.
+
+        Returns
+        -------
+        dict
+            ``{"total": ideas rankeadas, "filas": [...]}``; cada fila es
+            ``{"codigo_idea", "posicion", "total", "total_bruto",
+            "evaluadores", "criterios": {id_criterio: promedio bruto}}``.
+        """
+        w = self.pesos.copy()
+        for id_criterio, peso in (pesos or {}).items():
+            if id_criterio in self.criterio_idx:
+                w[self.criterio_idx[id_criterio]] = max(float(peso), 0.0)
+
+        with self.lock:
+            key = (self.version, tuple(w))
+            cached = self._rankings.get(key)
+            if cached is None:
+                cached = self._rank(w)
+                self._rankings[key] = cached
+                while len(self._rankings) > RANKING_CACHE_SIZE:
+                    self._rankings.popitem(last=False)
+            else:
+                self._rankings.move_to_end(key)
+            orden, totales, brutos = cached
+            agg = self.aggregate()
+            codigos_por_idx = np.array(list(self.ideas), dtype=object)
+            if codigos is not None:
+                cohorte = np.zeros(len(self.ideas), dtype=bool)
+                cohorte[[self.ideas[c] for c in codigos if c in self.ideas]] = True
+                orden = orden[cohorte[orden]]
+
+        filas = []
+        for posicion, i in enumerate(orden[offset:offset + limit], start=offset + 1):
+            filas.append({
+                "codigo_idea": codigos_por_idx[i],
+                "posicion": posicion,
+                "total": round(float(totales[i]), 4),
+                "total_bruto": round(float(brutos[i]), 2),
+                "evaluadores": int(agg["evaluadores"][i]),
+                "criterios": {
+                    c["id"]: (None if np.isnan(agg["bruto"][i, j]) else round(float(agg["bruto"][i, j]), 2))
+                    for j, c in enumerate(self.criterios)
+                },
+            })
+        return {"total": len(orden), "filas": filas}
+
+    def _rank(self, w):
+        agg = self.aggregate()
+        evaluado = agg["evaluaciones"] > 0
+        # Cada idea reparte el peso sólo entre los criterios que tiene evaluados
+        peso_efectivo = evaluado @ w
+        peso_efectivo[peso_efectivo == 0] = np.nan
+        totales = np.nan_to_num(agg["normalizado"], nan=0.0) @ w / peso_efectivo
+        brutos = np.nan_to_num(agg["bruto"], nan=0.0) @ w / peso_efectivo
+        totales = np.nan_to_num(totales, nan=-np.inf)
+        brutos = np.nan_to_num(brutos, nan=0.0)
+        orden = np.argsort(-totales, kind="stable")
+        orden = orden[np.isfinite(totales[orden])]
+        return orden, totales, brutos
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def load_criterios():
+    try:
+        criterios = APIClient("criterio_evaluacion").get_all() or []
+    except Exception as e:
+        print(f"[evaluation] No se pudieron obtener los criterios: {e}")
+        criterios = []
+    criterios = [c for c in criterios if c.get("id") is not None]
+    return sorted(criterios, key=lambda c: c["id"]) or DEFAULT_CRITERIOS
+
+
+def get_matrix():
+    """Matriz en memoria, cargada desde la API en el primer uso."""
+    global _matrix
+    if _matrix is None:
+        with _matrix_lock:
+            if _matrix is None:
+                _matrix = rebuild()
+    return _matrix
+
+
+def rebuild():
+    matrix = EvaluationMatrix(load_criterios())
+    # Por id ascendente: si hay puntajes repetidos gana el último
+    matrix.load(row for page in APIClient("evaluacion_idea").iter_pages("id") for row in page)
+    return matrix
+
+
+def submit(codigo_idea, evaluador, puntajes):
+    """
+    Guarda los puntajes de un evaluador para una idea.
+
+    Parameters
+    ----------
+    puntajes : dict
+        {id_criterio: puntaje}.
+
+    Returns
+    -------
+    bool
+        True si la API aceptó todos los puntajes.
+    """
+    registros = [
+        {
+            "codigo_idea": codigo_idea,
+            "usuario_email": evaluador,
+            "id_criterio": id_criterio,
+            "puntaje": min(max(float(puntaje), MIN_PUNTAJE), MAX_PUNTAJE),
+        }
+        for id_criterio, puntaje in puntajes.items()
+    ]
+    resultados = APIClient("evaluacion_idea").bulk_insert(registros)
+    matrix = get_matrix()
+    for resultado in resultados:
+        if resultado["ok"]:
+            r = resultado["record"]
+            matrix.set_score(r["codigo_idea"], r["usuario_email"], r["id_criterio"], r["puntaje"])
+    return all(r["ok"] for r in resultados)
+
+
+def save_pesos(pesos):
+    """Guarda nuevos pesos en criterio_evaluacion y recarga los criterios."""
+    client = APIClient("criterio_evaluacion")
+    ok = True
+    for id_criterio, peso in pesos.items():
+        ok = client.update_by_key("id", id_criterio, {"peso": max(float(peso), 0.0)}) is not None and ok
+    global _matrix
+    criterios = load_criterios()
+    matrix = get_matrix()
+    with matrix.lock:
+        if [c["id"] for c in criterios] == [c["id"] for c in matrix.criterios]:
+            matrix.set_criterios(criterios)
+        else:
+            # Cambió la lista de criterios: los índices de la matriz ya no sirven
+            _matrix = rebuild()
+    return ok
@@ -0,0 +1,279 @@
+# utils/expert_matching.py
+import threading
+import time
+
+import numpy as np
+
+from utils.api_client import APIClient
+from utils.catalogs import ENTITIES
+from utils.search_index import SPANISH_ANALYZER
+
+# Expertos sugeridos por defecto
+DEFAULT_TOP_K = 5
+# Registros por bloque de puntajes en las consultas por lote
+BATCH_SIZE = 512
+# Segundos entre sincronizaciones de perfiles nuevos
+EXPERTS_TTL = 300
+
+
+def terms(text):
+    """Raíces (sin tildes ni stopwords) de un texto, con repeticiones."""
+    return [token.text for token in SPANISH_ANALYZER(str(text or ""))]
+
+
+def item_text(record):
+    return " ".join(str(record.get(f) or "") for f in ("titulo", "descripcion", "palabras_claves"))
+
+
+def expert_text(perfil, areas=None):
+    """Texto de experticia de un perfil; los ids de ``areas_expertise`` se traducen a su nombre."""
+    area = str(perfil.get("area_expertise") or "")
+    if areas:
+        area = " ".join(areas.get(part.strip(), part) for part in area.split(","))
+    return f"{area} {perfil.get('descripcion') or ''}"
+
+
+class ExpertMatcher:
+    """
+    Similitud coseno TF-IDF entre la experticia de los usuarios y el texto
+    de soluciones u oportunidades.
+
+    Las frecuencias se guardan dispersas: cada experto con sus términos y,
+    al revés, cada término con los expertos que lo usan (arreglos numpy de
+    filas y frecuencias). El vocabulario es el de los perfiles: los
+    términos de un registro que ningún experto menciona no aportan y se
+    descartan. El puntaje de todos los expertos para un registro se
+    acumula recorriendo sólo las listas de sus términos, así que la
+    memoria crece con los términos de cada perfil y no con usuarios ×
+    vocabulario. Agregar o cambiar un perfil sólo toca sus términos; el
+    IDF y las normas se recalculan de forma perezosa en la siguiente
+    consulta.
+    """
+
+    def __init__(self):
+        self.vocab = {}
+        self.emails = []
+        self.rows = {}
+        self.names = {}
+        # fila -> {columna: frecuencia} y columna -> {fila: frecuencia}
+        self.vectors = {}
+        self.postings = {}
+        self._idf = None
+        self._norms = None
+        self._arrays = None
+        self.synced_at = time.monotonic()
+        self.last_id = None
+        self.lock = threading.RLock()
+
+    # ----------------------------
+    # Actualización incremental
+    # ----------------------------
+    def _clear_row(self, row):
+        for col in self.vectors.pop(row, {}):
+            posting = self.postings[col]
+            posting.pop(row, None)
+            if not posting:
+                del self.postings[col]
+
+    def set_expert(self, email, text, nombre=None):
+        """Agrega o reemplaza el vector de un experto."""
+        counts = {}
+        for term in terms(text):
+            counts[term] = counts.get(term, 0) + 1
+        with self.lock:
+            row = self.rows.get(email)
+            if row is None:
+                row = len(self.emails)
+                self.emails.append(email)
+                self.rows[email] = row
+            self._clear_row(row)
+            vector = {}
+            for term, count in counts.items():
+                col = self.vocab.setdefault(term, len(self.vocab))
+                vector[col] = count
+                self.postings.setdefault(col, {})[row] = count
+            if vector:
+                self.vectors[row] = vector
+            self.names[email] = nombre
+            self._idf = self._norms = self._arrays = None
+
+    def remove_expert(self, email):
+        with self.lock:
+            row = self.rows.get(email)
+            if row is None:
+                return
+            self._clear_row(row)
+            self._idf = self._norms = self._arrays = None
+
+    # -------------
+    # Consultas
+    # -------------
+    def _weights(self):
+        """IDF suavizado y norma TF-IDF de cada experto (en caché hasta el próximo cambio)."""
+        if self._idf is None:
+            n_experts = len(self.emails)
+            df = np.zeros(len(self.vocab), dtype=np.float32)
+            for col, posting in self.postings.items():
+                df[col] = len(posting)
+            idf = np.log((1.0 + n_experts) / (1.0 + df)) + 1.0
+            norms = np.ones(n_experts, dtype=np.float32)
+            for row, vector in self.vectors.items():
+                cols = np.fromiter(vector.keys(), dtype=np.int64, count=len(vector))
+                tf = np.fromiter(vector.values(), dtype=np.float32, count=len(vector))
+                norms[row] = np.sqrt(np.sum(np.square(tf * idf[cols]))) or 1.0
+            self._arrays = {
+                col: (
+                    np.fromiter(posting.keys(), dtype=np.int64, count=len(posting)),
+                    np.fromiter(posting.values(), dtype=np.float32, count=len(posting)),
+                )
+                for col, posting in self.postings.items()
+            }
+            self._idf, self._norms = idf.astype(np.float32), norms
+        return self._idf, self._norms
+
+    def _scores(self, text, idf, norms):
+        counts = {}
+        for term in terms(text):
+            col = self.vocab.get(term)
+            if col is not None and col in self._arrays:
+                counts[col] = counts.get(col, 0.0) + 1.0
+        scores = np.zeros(len(self.emails), dtype=np.float32)
+        if not counts:
+            return scores
+        cols = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        query = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * idf[cols]
+        # Los pesos del experto llevan un IDF y los de la consulta el otro
+        weights = query * idf[cols] / np.linalg.norm(query)
+        for col, weight in zip(cols.tolist(), weights.tolist()):
+            rows, tf = self._arrays[col]
+            scores[rows] += weight * tf
+        return scores / norms
+
+    def top_experts_batch(self, texts, k=DEFAULT_TOP_K, exclude=None):
+        """
+        Mejores ``k`` expertos para cada texto.
+
+        Returns
+        -------
+        list[list[dict]]
+            Para cada texto, ``{"usuario_email", "nombre", "similitud"}`` de
+            mayor a menor similitud, sin los de similitud cero.
+        """
+        with self.lock:
+            if not self.emails or not texts:
+                return [[] for _ in texts]
+            idf, norms = self._weights()
+            emails, names = list(self.emails), dict(self.names)
+            results = []
+            for start in range(0, len(texts), BATCH_SIZE):
+                scores = np.stack([self._scores(text, idf, norms) for text in texts[start:start + BATCH_SIZE]])
+                results.extend(self._top(scores, k, emails, names, exclude))
+            return results
+
+    @staticmethod
+    def _top(scores, k, emails, names, exclude):
+        # Uno de más por si el excluido queda entre los mejores
+        n = min(k + (1 if exclude else 0), scores.shape[1])
+        best = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        results = []
+        for row, cols in enumerate(best):
+            cols = cols[np.argsort(-scores[row, cols])]
+            results.append([
+                {
+                    "usuario_email": emails[col],
+                    "nombre": names.get(emails[col]),
+                    "similitud": round(float(scores[row, col]), 4),
+                }
+                for col in cols
+                if scores[row, col] > 0 and emails[col] != exclude
+            ][:k])
+        return results
+
+    def top_experts(self, text, k=DEFAULT_TOP_K, exclude=None):
+        return self.top_experts_batch([text], k, exclude)[0]
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def _areas_map():
+    try:
+        areas = APIClient("areas_expertise").get_all() or []
+    except Exception as e:
+        print(f"[expert_matching] No se pudieron obtener las áreas de expertise: {e}")
+        areas = []
+    return {str(a.get("id")): a.get("nombre") or "" for a in areas if a.get("id") is not None}
+
+
+def _load_perfiles(matcher, where=None):
+    areas = _areas_map()
+    for page in APIClient("perfil").iter_pages("id", where):
+        for perfil in page:
+            if perfil.get("id") is not None:
+                matcher.last_id = max(matcher.last_id or 0, perfil["id"])
+            if perfil.get("usuario_email") and perfil.get("area_expertise"):
+                matcher.set_expert(perfil["usuario_email"], expert_text(perfil, areas), perfil.get("nombre"))
+
+
+def get_matcher():
+    """
+    Matcher en memoria, construido desde los perfiles en el primer uso.
+    Cada EXPERTS_TTL se agregan los perfiles nuevos.
+    """
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = rebuild()
+    elif time.monotonic() - _matcher.synced_at > EXPERTS_TTL:
+        _matcher.synced_at = time.monotonic()
+        sync_new_experts()
+    return _matcher
+
+
+def rebuild():
+    matcher = ExpertMatcher()
+    _load_perfiles(matcher)
+    return matcher
+
+
+def sync_new_experts():
+    """Agrega los perfiles con id mayor al último cargado."""
+    try:
+        matcher = get_matcher()
+        where = f"id > {int(matcher.last_id)}" if matcher.last_id is not None else None
+        _load_perfiles(matcher, where)
+    except Exception as e:
+        print(f"[expert_matching] Error sincronizando perfiles: {e}")
+
+
+def update_expert(perfil):
+    """
+    Refleja en el matcher un perfil creado o editado (registro y edición de
+    perfil). Si el matcher todavía no se construyó, el perfil entra con la
+    primera carga.
+    """
+    try:
+        matcher = _matcher
+        if matcher is not None and perfil.get("usuario_email"):
+            if perfil.get("area_expertise"):
+                matcher.set_expert(perfil["usuario_email"], expert_text(perfil, _areas_map()), perfil.get("nombre"))
+            else:
+                matcher.remove_expert(perfil["usuario_email"])
+    except Exception as e:
+        print(f"[expert_matching] Error actualizando perfil: {e}")
+
+
+def experts_for(entity, codigo, k=DEFAULT_TOP_K):
+    """
+    Expertos sugeridos para un registro de ``entity``. El creador del
+    registro no se sugiere a sí mismo.
+    """
+    config = ENTITIES[entity]
+    record = APIClient(config["table"]).get_by_id(config["key"], codigo)
+    if not record:
+        return None
+    record = record[0]
+    creador = record.get("usuario_email") or record.get("creador_por")
+    return get_matcher().top_experts(item_text(record), k, exclude=creador)
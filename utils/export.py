@@ -0,0 +1,92 @@
+# utils/export.py
+import csv
+import io
+
+from utils import tag_index
+from utils.api_client import APIClient
+from utils.catalogs import ENTITIES, id_name_map, load_catalogs
+
+EXPORT_COLUMNS = [
+    ("codigo", "Código"),
+    ("titulo", "Título"),
+    ("descripcion", "Descripción"),
+    ("palabras_claves", "Palabras claves"),
+    ("recursos_requeridos", "Recursos requeridos"),
+    ("tipo_innovacion", "Tipo de innovación"),
+    ("foco_innovacion", "Foco de innovación"),
+    ("fecha_creacion", "Fecha de creación"),
+    ("creador_por", "Creado por"),
+    ("estado", "Estado"),
+]
+
+
+def iter_export_rows(entity, args):
+    """
+    Genera las filas a exportar con los nombres de foco y tipo ya
+    resueltos. Los registros salen del modelo de lectura de tag_index con
+    los mismos filtros (tipo_innovacion, foco_innovacion, estado, ``tag``)
+    y el mismo orden que la página de listado; cada registro se copia
+    recién al escribir su fila.
+    """
+    config = ENTITIES[entity]
+    client = APIClient(config["table"])
+    focos, tipos = load_catalogs(client)
+    foco_map = id_name_map(focos, "id_foco_innovacion")
+    tipo_map = id_name_map(tipos, "id_tipo_innovacion")
+
+    ix = tag_index.get_index(entity)
+    codigos = ix.resolve(ix.match(tag_index.parse_filters(args)), by_date=True)
+    for codigo in codigos:
+        record = ix.get(codigo)
+        if record is None:
+            # Eliminado mientras se exportaba
+            continue
+        yield {
+            "codigo": codigo,
+            "titulo": record.get("titulo"),
+            "descripcion": record.get("descripcion"),
+            "palabras_claves": record.get("palabras_claves"),
+            "recursos_requeridos": record.get("recursos_requeridos"),
+            "tipo_innovacion": tipo_map.get(record.get("id_tipo_innovacion"), "Desconocido"),
+            "foco_innovacion": foco_map.get(record.get("id_foco_innovacion"), "Desconocido"),
+            "fecha_creacion": record.get("fecha_creacion"),
+            "creador_por": record.get("creador_por"),
+            "estado": "Aprobado" if tag_index.is_aprobada(record.get("estado")) else "Pendiente",
+        }
+
+
+def stream_csv(rows, flush_every=200):
+    """
+    Convierte las filas en fragmentos de CSV para una respuesta en
+    streaming. Incluye BOM para que Excel detecte UTF-8.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow([label for _, label in EXPORT_COLUMNS])
+    # El encabezado sale de inmediato para que la descarga empiece ya
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([row.get(key) for key, _ in EXPORT_COLUMNS])
+        if count % flush_every == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_xlsx(rows, path):
+    """
+    Escribe las filas en un XLSX usando el modo write_only de openpyxl,
+    que vuelca cada fila a disco sin mantener la hoja en memoria.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([label for _, label in EXPORT_COLUMNS])
+    for row in rows:
+        sheet.append([row.get(key) for key, _ in EXPORT_COLUMNS])
+    workbook.save(path)
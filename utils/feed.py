@@ -0,0 +1,235 @@
+# utils/feed.py
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from datetime import date
+
+import numpy as np
+
+from utils import expert_matching, tag_index
+from utils.api_client import APIClient
+from utils.catalogs import load_catalogs
+
+# Ideas por página del mercado
+PAGE_SIZE = 12
+# Posiciones del ranking que se guardan por usuario en la primera consulta
+FEED_SIZE = 120
+# Vigencia (segundos) del ranking guardado por usuario y del catálogo precalculado
+FEED_CACHE_TTL = 600
+CATALOG_TTL = 300
+# Usuarios con ranking guardado en memoria
+FEED_CACHE_USERS = 1000
+# Días en los que la recencia de una idea cae a la mitad
+RECENCY_HALF_LIFE_DAYS = 30.0
+
+WEIGHTS = {
+    "recencia": 0.35,
+    "aprobada": 0.15,
+    "interaccion": 0.20,
+    "foco": 0.20,
+    "tipo": 0.10,
+}
+
+
+def _age_days(fecha, today):
+    try:
+        return max((today - date.fromisoformat(str(fecha)[:10])).days, 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize(values):
+    top = values.max() if values.size else 0
+    return values / top if top > 0 else values
+
+
+class IdeaCatalog:
+    """
+    Atributos de todas las ideas como arreglos NumPy, calculados en lote.
+
+    La parte del puntaje que no depende del usuario (recencia, aprobación
+    e interacción) se precalcula en ``base``; para un usuario sólo se suma
+    su afinidad por foco y tipo, indexando dos vectores pequeños.
+    """
+
+    def __init__(self, ideas, interacciones):
+        today = date.today()
+        self.records = ideas
+        self.generation = time.monotonic()
+        n = len(ideas)
+
+        # Participaciones (tabla idea_usuario): cantidad por idea e ideas por usuario
+        por_idea = Counter(f.get("codigo_idea") for f in interacciones)
+        self.participaciones = defaultdict(set)
+        for fila in interacciones:
+            # Sin código no hay idea que vincular (y np.fromiter no acepta None)
+            if fila.get("codigo_idea") is not None:
+                self.participaciones[fila.get("usuario_email")].add(fila.get("codigo_idea"))
+
+        self.focos = {}
+        self.tipos = {}
+        foco_idx = np.empty(n, dtype=np.int32)
+        tipo_idx = np.empty(n, dtype=np.int32)
+        ages = np.empty(n, dtype=np.float32)
+        aprobada = np.zeros(n, dtype=np.float32)
+        interaccion = np.zeros(n, dtype=np.float32)
+        self.codigos = np.empty(n, dtype=np.int64)
+        self.creadores = np.empty(n, dtype=object)
+        for i, idea in enumerate(ideas):
+            foco_idx[i] = self.focos.setdefault(idea.get("id_foco_innovacion"), len(self.focos))
+            tipo_idx[i] = self.tipos.setdefault(idea.get("id_tipo_innovacion"), len(self.tipos))
+            age = _age_days(idea.get("fecha_creacion"), today)
+            ages[i] = age if age is not None else 10 * RECENCY_HALF_LIFE_DAYS
+            aprobada[i] = 1.0 if idea.get("estado") in (True, 1, "1") else 0.0
+            interaccion[i] = por_idea.get(idea.get("codigo_idea"), 0)
+            self.codigos[i] = idea.get("codigo_idea") or 0
+            self.creadores[i] = idea.get("usuario_email") or idea.get("creador_por")
+
+        self.foco_idx, self.tipo_idx = foco_idx, tipo_idx
+        recencia = np.exp2(-ages / RECENCY_HALF_LIFE_DAYS)
+        self.base = (
+            WEIGHTS["recencia"] * recencia
+            + WEIGHTS["aprobada"] * aprobada
+            + WEIGHTS["interaccion"] * _normalize(np.log1p(interaccion))
+        ).astype(np.float32)
+
+    def scores(self, foco_aff, tipo_aff):
+        return self.base + WEIGHTS["foco"] * foco_aff[self.foco_idx] + WEIGHTS["tipo"] * tipo_aff[self.tipo_idx]
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_feeds = OrderedDict()
+_feeds_lock = threading.Lock()
+
+
+def _load_interacciones():
+    try:
+        return APIClient("idea_usuario").get_all() or []
+    except Exception as e:
+        print(f"[feed] No se pudieron obtener las interacciones: {e}")
+        return []
+
+
+def get_catalog():
+    """Catálogo precalculado; se reconstruye pasado CATALOG_TTL o tras ``invalidate``."""
+    global _catalog
+    catalog = _catalog
+    if catalog is None or time.monotonic() - catalog.generation > CATALOG_TTL:
+        with _catalog_lock:
+            # Otro hilo pudo reconstruirlo mientras tanto; si ``invalidate``
+            # lo descartó, queda en None y hay que construirlo aquí
+            if _catalog is None or _catalog is catalog:
+                modelo = tag_index.get_index("ideas")
+                ideas = modelo.fetch(modelo.all, by_date=True)
+                _catalog = IdeaCatalog(ideas, _load_interacciones())
+            catalog = _catalog
+    return catalog
+
+
+def invalidate():
+    """Descarta el catálogo y los rankings guardados (tras crear o modificar ideas)."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+    with _feeds_lock:
+        _feeds.clear()
+
+
+def _affinity(catalog, email):
+    """
+    Afinidad del usuario por cada foco y tipo, en [0, 1]: ideas que creó o
+    en las que participa, más los focos y tipos cuyo nombre aparece en su
+    área de expertise.
+    """
+    foco_aff = np.zeros(len(catalog.focos), dtype=np.float32)
+    tipo_aff = np.zeros(len(catalog.tipos), dtype=np.float32)
+    if not email:
+        return foco_aff, tipo_aff
+
+    propias = np.fromiter(catalog.participaciones.get(email, ()), dtype=np.int64)
+    mask = (catalog.creadores == email) | np.isin(catalog.codigos, propias)
+    np.add.at(foco_aff, catalog.foco_idx[mask], 1)
+    np.add.at(tipo_aff, catalog.tipo_idx[mask], 1)
+
+    try:
+        perfil = APIClient("perfil").get_many("usuario_email", [email]).get(email)
+        expertise = set(expert_matching.terms(perfil.get("area_expertise"))) if perfil else set()
+        focos, tipos = load_catalogs(APIClient("idea")) if expertise else ([], [])
+    except Exception as e:
+        print(f"[feed] No se pudo obtener la expertise de {email}: {e}")
+        expertise, focos, tipos = set(), [], []
+    for items, id_field, ids, aff in (
+        (focos, "id_foco_innovacion", catalog.focos, foco_aff),
+        (tipos, "id_tipo_innovacion", catalog.tipos, tipo_aff),
+    ):
+        for item in items:
+            idx = ids.get(item.get(id_field))
+            if idx is not None and expertise & set(expert_matching.terms(item.get("name") or item.get("nombre"))):
+                aff[idx] += 1
+    return _normalize(foco_aff), _normalize(tipo_aff)
+
+
+def _ranking(email, upto):
+    """
+    Índices del catálogo ordenados por puntaje para el usuario, al menos
+    hasta la posición ``upto``. Se guardan por usuario; si se pide más allá
+    de lo guardado se vuelve a seleccionar con el doble de posiciones.
+    """
+    catalog = get_catalog()
+    with _feeds_lock:
+        entry = _feeds.get(email)
+        if entry and (entry["generation"] != catalog.generation or time.monotonic() - entry["at"] > FEED_CACHE_TTL):
+            entry = None
+        if entry:
+            _feeds.move_to_end(email)
+    total = len(catalog.records)
+    if entry and (len(entry["orden"]) >= min(upto, total)):
+        return catalog, entry["orden"]
+
+    if entry:
+        foco_aff, tipo_aff = entry["afinidad"]
+        size = max(upto, 2 * len(entry["orden"]))
+    else:
+        foco_aff, tipo_aff = _affinity(catalog, email)
+        size = max(upto, FEED_SIZE)
+    scores = catalog.scores(foco_aff, tipo_aff)
+    size = min(size, total)
+    if size < total:
+        top = np.argpartition(-scores, size - 1)[:size]
+    else:
+        top = np.arange(total)
+    orden = top[np.argsort(-scores[top], kind="stable")].tolist()
+
+    with _feeds_lock:
+        _feeds[email] = {
+            "generation": catalog.generation,
+            "at": time.monotonic(),
+            "afinidad": (foco_aff, tipo_aff),
+            "orden": orden,
+        }
+        _feeds.move_to_end(email)
+        while len(_feeds) > FEED_CACHE_USERS:
+            _feeds.popitem(last=False)
+    return catalog, orden
+
+
+def page(email, cursor=0, size=PAGE_SIZE):
+    """
+    Una página del mercado personalizado.
+
+    Parameters
+    ----------
+    cursor : int
+        Posición en el ranking del usuario donde empieza la página.
+
+    Returns
+    -------
+    tuple
+        (ideas de la página, cursor de la siguiente página o None).
+    """
+    cursor = max(int(cursor or 0), 0)
+    catalog, orden = _ranking(email, cursor + size)
+    ideas = [dict(catalog.records[i]) for i in orden[cursor:cursor + size]]
+    siguiente = cursor + size if cursor + size < len(catalog.records) else None
+    return ideas, siguiente
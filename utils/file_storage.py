@@ -1,14 +1,375 @@
+# utils/file_storage.py
+import hashlib
 import os
+import posixpath
+import tempfile
+
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 
-UPLOAD_FOLDER = "app/static/uploads"
+from config_flask import BASE_DIR, BLOB_ROOT, BLOB_URL, MEDIA_ROOT, MEDIA_URL, STAGING_ROOT
+from utils import storage, thumbnails
+from utils.api_client import APIClient
+from utils.catalogs import ENTITIES
+
+# Bytes leídos por iteración al guardar un archivo
+CHUNK_SIZE = 1024 * 1024
+# Segundos en los que un blob escrito o reutilizado no se borra aunque se
+# quede sin referencias: puede pertenecer a un registro que se está creando
+ORPHAN_GRACE = 3600
+
+_HEX = set("0123456789abcdef")
+# Derivados que ya se sabe que están en el backend remoto
+_published = set()
+
+
+def _extension(filename):
+    ext = os.path.splitext(secure_filename(filename or ""))[1].lower()
+    return ext if ext[1:].isalnum() else ""
+
+
+def blob_key(digest, ext=""):
+    """Clave del blob en el backend: dos niveles de carpetas con los primeros caracteres del hash."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def blob_path(digest, ext=""):
+    """
+    Ruta local del blob. Con el backend local es el archivo guardado; con
+    uno remoto, la copia temporal para generar miniaturas.
+    """
+    return os.path.join(BLOB_ROOT, digest[:2], digest[2:4], digest + ext)
+
+
+def _key_from_path(path):
+    return os.path.relpath(path, BLOB_ROOT).replace(os.sep, "/")
+
+
+def blob_url(digest, ext=""):
+    return f"{BLOB_URL}{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def parse_blob_url(url):
+    """
+    (hash, extensión) de una URL de blob.
+
+    Returns
+    -------
+    tuple or None
+        None si la URL no es de un blob (archivos anteriores, URLs externas).
+    """
+    url = str(url or "")
+    if not url.startswith(BLOB_URL):
+        return None
+    name = url.rsplit("/", 1)[-1]
+    digest, ext = name[:64], name[64:]
+    if len(digest) != 64 or not set(digest) <= _HEX:
+        return None
+    return digest, ext
+
+
+def media_file(ruta):
+    """
+    Archivo local que corresponde a ``MEDIA_URL + ruta``.
+
+    ``blobs/...`` son blobs por contenido; ``uploads/...`` son las subidas
+    anteriores de static/uploads y el resto se busca en MEDIA_ROOT y en
+    static/media.
+
+    Returns
+    -------
+    tuple
+        (ruta local, nombre del blob con su extensión si es un blob) o
+        (None, None) si no existe.
+    """
+    # Sin "." ni ".." que esquiven los prefijos de abajo (/media/./blobs/...)
+    if "\\" in ruta:
+        return None, None
+    ruta = posixpath.normpath(ruta)
+    if ruta.startswith(("/", "..")):
+        return None, None
+    parsed = parse_blob_url(MEDIA_URL + ruta)
+    if parsed and storage.get_backend().remote:
+        # Se descargan directo del backend (ver remote_url)
+        return None, None
+    if parsed:
+        # Las miniaturas que falten se generan aquí, en la primera petición
+        path = thumbnails.ensure(blob_path(*parsed))
+        return (path, parsed[0] + parsed[1]) if path else (None, None)
+    if ruta == "blobs" or ruta.startswith("blobs/"):
+        # Dentro de BLOB_ROOT sólo se sirven blobs con nombre válido
+        return None, None
+    if ruta.startswith("uploads/"):
+        roots, ruta = [os.path.join(BASE_DIR, "static", "uploads")], ruta[len("uploads/"):]
+    else:
+        roots = [MEDIA_ROOT, os.path.join(BASE_DIR, "static", "media")]
+    for root in roots:
+        path = safe_join(str(root), ruta)
+        if path and os.path.isfile(path):
+            return path, None
+    return None, None
+
+
+def remote_url(ruta):
+    """
+    URL de descarga directa (firmada o pública) del blob de ``MEDIA_URL +
+    ruta`` cuando el backend es remoto; None si no aplica o no existe. Las
+    miniaturas que falten se generan antes de responder.
+    """
+    backend = storage.get_backend()
+    parsed = parse_blob_url(MEDIA_URL + ruta)
+    if not backend.remote or not parsed:
+        return None
+    key = blob_key(*parsed)
+    if "." in parsed[1][1:] and key not in _published and not _publish_missing(backend, key):
+        # Derivado (``.w320.jpg``) que no se pudo generar
+        return None
+    return backend.url(key)
+
+
+def _publish_missing(backend, key):
+    """Genera y sube un derivado que aún no está en el backend remoto."""
+    if backend.exists(key):
+        _published.add(key)
+        return True
+    parsed = thumbnails.parse_derivative(
+        os.path.join(BLOB_ROOT, *key.split("/")),
+        exists=lambda path: backend.exists(_key_from_path(path)),
+    )
+    if not parsed:
+        return False
+    original = parsed[0]
+    try:
+        if not os.path.isfile(original):
+            os.makedirs(os.path.dirname(original), exist_ok=True)
+            tmp = f"{original}.{os.getpid()}.tmp"
+            backend.download(_key_from_path(original), tmp)
+            os.replace(tmp, original)
+        future = thumbnails.schedule(original, task=publish_derivatives)
+        future.result(timeout=thumbnails.RENDER_TIMEOUT)
+    except Exception as e:
+        print(f"[file_storage] Error generando {key}: {e}")
+        return False
+    if backend.exists(key):
+        _published.add(key)
+        return True
+    return False
+
+
+def publish_derivatives(original):
+    """
+    Genera las miniaturas de una copia local y las sube al backend remoto;
+    después borra las copias locales. Se ejecuta en el pool de thumbnails.
+    """
+    thumbnails.render(original)
+    # Backend propio: el cliente del proceso padre no se comparte entre procesos
+    backend = storage.create_backend()
+    for path in thumbnails.derivatives(original):
+        if os.path.exists(path):
+            backend.put_file(path, _key_from_path(path))
+            os.remove(path)
+    if os.path.exists(original):
+        os.remove(original)
+    return original
+
+
+def public_url(value):
+    """
+    URL de ``archivo_multimedia`` servida por la ruta de media. Acepta los
+    formatos anteriores (``/static/media/...``, ``/static/uploads/...`` o
+    sólo el nombre del archivo); las URLs externas no cambian.
+    """
+    value = str(value or "").strip()
+    if not value or "://" in value or value.startswith(MEDIA_URL):
+        return value
+    name = value.lstrip("/")
+    for prefix, target in (("static/media/", ""), ("static/uploads/", "uploads/")):
+        if name.startswith(prefix):
+            return MEDIA_URL + target + name[len(prefix):]
+    if "/" not in name:
+        return MEDIA_URL + name
+    return value
+
+
+def thumbnail_url(url, width, fmt=None):
+    """URL de la miniatura de ``width`` px de una imagen subida; la URL original si no tiene."""
+    parsed = parse_blob_url(url)
+    if not parsed or not thumbnails.is_image(parsed[1]):
+        return public_url(url)
+    name = thumbnails.derivative_path(parsed[0] + parsed[1], width, fmt)
+    return blob_url(parsed[0], name[len(parsed[0]):])
+
+
+def srcset(url, fmt=None):
+    """Valor de ``srcset`` con los anchos de thumbnails.WIDTHS, o "" si la URL no es una imagen subida."""
+    parsed = parse_blob_url(url)
+    if not parsed or not thumbnails.is_image(parsed[1]):
+        return ""
+    return ", ".join(f"{thumbnail_url(url, w, fmt)} {w}w" for w in thumbnails.WIDTHS)
+
+
+def store_stream(stream, filename):
+    """
+    Guarda el contenido de ``stream`` calculando su SHA-256 mientras se
+    escribe. Si ya existe un blob con el mismo contenido se descarta la
+    copia y se reutiliza el existente.
+
+    Returns
+    -------
+    str
+        URL pública del blob.
+    """
+    tmp_dir = os.path.join(STAGING_ROOT, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+        return commit_blob(tmp, digest.hexdigest(), filename)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def commit_blob(tmp, digest, filename):
+    """
+    Guarda un archivo temporal ya hasheado en el backend (o lo descarta si
+    el blob ya existe). En S3 los archivos grandes se suben por partes en
+    paralelo.
+    """
+    ext = _extension(filename)
+    key = blob_key(digest, ext)
+    backend = storage.get_backend()
+    if backend.exists(key):
+        # Reutilizado: se renueva la fecha para el periodo de gracia
+        backend.touch(key)
+        return blob_url(digest, ext)
+
+    backend.put_file(tmp, key)
+    if thumbnails.is_image(key):
+        if backend.remote:
+            path = blob_path(digest, ext)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+            thumbnails.schedule(path, task=publish_derivatives)
+        else:
+            thumbnails.schedule(backend.local_path(key))
+    return blob_url(digest, ext)
+
 
 def save_file(file):
-    """Guarda un archivo subido en el servidor y retorna la ruta relativa."""
-    if not file:
-        return None
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(UPLOAD_FOLDER, filename)
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    file.save(filepath)
-    return f"/static/uploads/{filename}"
+    """Guarda un archivo subido en el almacenamiento por contenido y retorna su URL."""
+    if not file or not file.filename:
+        return None
+    return store_stream(file.stream, file.filename)
+
+
+def save_path(path):
+    """Guarda un archivo local en el almacenamiento por contenido y retorna su URL."""
+    with open(path, "rb") as source:
+        return store_stream(source, os.path.basename(path))
+
+
+def copy_to_backend(target, source=None):
+    """
+    Copia al backend ``target`` los blobs que le falten de ``source`` (por
+    defecto el configurado), p. ej. del disco a S3 al pasar a varios nodos.
+
+    Returns
+    -------
+    dict
+        {"copiados", "existentes", "errores"}.
+    """
+    source = source or storage.get_backend()
+    stats = {"copiados": 0, "existentes": 0, "errores": 0}
+    for key, _, _ in source.iter_keys():
+        parsed = parse_blob_url(BLOB_URL + key)
+        if not parsed or blob_key(*parsed) != key:
+            # Temporales y subidas por partes
+            continue
+        if target.exists(key):
+            stats["existentes"] += 1
+            continue
+        path = source.local_path(key)
+        tmp = None
+        try:
+            if path is None or not target.remote:
+                # El backend local mueve el archivo: se le entrega una copia
+                tmp_dir = os.path.join(STAGING_ROOT, "tmp")
+                os.makedirs(tmp_dir, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+                os.close(fd)
+                source.download(key, tmp)
+                path = tmp
+            target.put_file(path, key)
+            stats["copiados"] += 1
+        except Exception as e:
+            print(f"[file_storage] Error copiando {key}: {e}")
+            stats["errores"] += 1
+        finally:
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+    return stats
+
+
+# ----------------------------
+# Migración de archivos anteriores
+# ----------------------------
+def legacy_path(url):
+    """Ruta local de un archivo guardado antes del almacenamiento por contenido, o None."""
+    url = str(url or "").strip()
+    if not url or parse_blob_url(url) or "://" in url:
+        return None
+    name = url.lstrip("/")
+    candidates = [os.path.join(BASE_DIR, name)]
+    if name.startswith("media/"):
+        candidates.append(os.path.join(MEDIA_ROOT, name[len("media/"):]))
+        candidates.append(os.path.join(BASE_DIR, "static", name))
+    elif "/" not in name:
+        # Soluciones: sólo el nombre, servido desde static/media
+        candidates.append(os.path.join(BASE_DIR, "static", "media", name))
+        candidates.append(os.path.join(MEDIA_ROOT, name))
+    for path in candidates:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def migrate_legacy(entity):
+    """
+    Pasa al almacenamiento por contenido los archivos de los registros de
+    ``entity`` que aún apuntan a una ruta anterior y actualiza el registro.
+    Los archivos anteriores no se borran.
+
+    Returns
+    -------
+    dict
+        {"migrados", "sin_archivo", "errores"}.
+    """
+    config = ENTITIES[entity]
+    client = APIClient(config["table"])
+    stats = {"migrados": 0, "sin_archivo": 0, "errores": 0}
+    for page in client.iter_pages(config["key"]):
+        for record in page:
+            url = record.get("archivo_multimedia")
+            if not url or parse_blob_url(url):
+                continue
+            path = legacy_path(url)
+            if not path:
+                stats["sin_archivo"] += 1
+                continue
+            try:
+                nueva = save_path(path)
+                if client.update_by_key(config["key"], record[config["key"]], {"archivo_multimedia": nueva}) is None:
+                    raise RuntimeError("la API no confirmó la actualización")
+                stats["migrados"] += 1
+            except Exception as e:
+                print(f"[file_storage] Error migrando {url}: {e}")
+                stats["errores"] += 1
+    return stats
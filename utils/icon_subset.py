@@ -0,0 +1,281 @@
+# utils/icon_subset.py
+"""
+Recorte de las fuentes de iconos a los glifos que la aplicación usa.
+
+``css/icons.min.css`` trae Material Design Icons, Font Awesome (sólida,
+regular y marcas), dripicons, ionicons, themify y typicons: varios MB de
+fuentes para unas pocas decenas de iconos. Al construir los paquetes se
+buscan las clases de iconos en las plantillas y en static/js, se dejan
+sólo sus reglas en la hoja y cada fuente se recorta (WOFF2) a los glifos
+de esas clases. Las fuentes que no conservan ningún glifo se quitan.
+
+Una clase armada al vuelo (p. ej. ``'mdi-' + nombre``) no aparece en la
+búsqueda: se agrega a EXTRA_ICONS.
+
+Requiere fontTools (y brotli para escribir WOFF2).
+"""
+import io
+import logging
+import os
+import re
+
+from config_flask import BASE_DIR
+
+# Carpetas donde se buscan las clases de iconos
+SCAN_DIRS = [
+    os.path.join(BASE_DIR, "templates"),
+    os.path.join(BASE_DIR, "static", "js"),
+]
+SCAN_EXTENSIONS = (".html", ".js")
+# Clases que no aparecen literalmente en el código
+EXTRA_ICONS = set()
+
+_TOKEN_RE = re.compile(r"[A-Za-z_][\w-]*")
+# ``.fa-edit:before`` o ``.mdi-settings::before``
+_ICON_SELECTOR_RE = re.compile(r"^\.(-?[A-Za-z_][\w-]*)::?(?:before|after)$")
+_CONTENT_RE = re.compile(r"""^content:\s*(["'])(.*?)\1(?:\s*!important)?$""", re.DOTALL)
+_CONTENT_ANY_RE = re.compile(r"""content:\s*(["'])(.*?)\1""", re.DOTALL)
+_ESCAPE_RE = re.compile(r"\\([0-9a-fA-F]{1,6})\s?|\\(.)|(.)", re.DOTALL)
+_URL_FORMAT_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)(?:\s*format\(\s*['"]?([\w-]+)['"]?\s*\))?""")
+# Formatos de origen que fontTools lee, en orden de preferencia
+_SOURCE_FORMATS = ("truetype", "woff2", "woff")
+
+
+def _require_fonttools():
+    try:
+        from fontTools import subset  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Recortar las fuentes de iconos requiere fontTools: pip install fonttools brotli")
+
+
+def split_rules(text):
+    """
+    Divide una hoja de estilos en sus reglas de primer nivel (``sel{...}``,
+    ``@media ...{...}``, ``@charset ...;``), respetando cadenas y comentarios.
+    """
+    rules, depth, start, i, n = [], 0, 0, 0, len(text)
+    while i < n:
+        char = text[i]
+        if char in "\"'":
+            end = i + 1
+            while end < n and text[end] != char:
+                end += 2 if text[end] == "\\" else 1
+            i = end + 1
+            continue
+        if text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            # Un comentario entre reglas (p. ej. la licencia) va aparte
+            if depth == 0 and not text[start:i].strip():
+                rules.append(text[i:end])
+                start = end
+            i = end
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append(text[start:i + 1].strip())
+                start = i + 1
+        elif char == ";" and depth == 0:
+            rules.append(text[start:i + 1].strip())
+            start = i + 1
+        i += 1
+    tail = text[start:].strip()
+    if tail:
+        rules.append(tail)
+    return [rule for rule in rules if rule]
+
+
+def _split_rule(rule):
+    brace = rule.find("{")
+    return rule[:brace].strip(), rule[brace + 1:-1].strip()
+
+
+def _declarations(body):
+    return [d.strip() for d in body.split(";") if d.strip()]
+
+
+def codepoints(value):
+    """Caracteres de un valor ``content`` de CSS (``"\\f044"`` -> {0xf044})."""
+    result = set()
+    for hex_value, escaped, literal in _ESCAPE_RE.findall(value):
+        if hex_value:
+            result.add(int(hex_value, 16))
+        else:
+            result.add(ord(escaped or literal))
+    return result
+
+
+def content_codepoints(text):
+    """Caracteres de todos los ``content`` de una hoja (flechas del menú, casillas...)."""
+    result = set()
+    for _, value in _CONTENT_ANY_RE.findall(text):
+        result |= codepoints(value)
+    return result
+
+
+def icon_classes(text):
+    """
+    Clases de iconos de la hoja: las de reglas ``.clase:before{content:...}``.
+
+    Returns
+    -------
+    dict
+        {clase: set de caracteres}.
+    """
+    icons = {}
+    for rule in split_rules(text):
+        if rule.startswith("@") or "{" not in rule:
+            continue
+        selector, body = _split_rule(rule)
+        declarations = _declarations(body)
+        match = _CONTENT_RE.match(declarations[0]) if len(declarations) == 1 else None
+        if not match:
+            continue
+        selectors = [_ICON_SELECTOR_RE.match(s.strip()) for s in selector.split(",")]
+        if all(selectors):
+            for s in selectors:
+                icons.setdefault(s.group(1), set()).update(codepoints(match.group(2)))
+    return icons
+
+
+def used_tokens(dirs=None):
+    """Palabras con forma de clase CSS que aparecen en las plantillas y el JS."""
+    tokens = set(EXTRA_ICONS)
+    for root in dirs or SCAN_DIRS:
+        for folder, _, names in os.walk(root):
+            for name in names:
+                if not name.endswith(SCAN_EXTENSIONS):
+                    continue
+                try:
+                    with open(os.path.join(folder, name), encoding="utf-8", errors="ignore") as f:
+                        tokens.update(_TOKEN_RE.findall(f.read()))
+                except OSError as e:
+                    print(f"[icon_subset] Error leyendo {name}: {e}")
+    return tokens
+
+
+def _font_source(body, folder):
+    """Archivo local de la fuente de un @font-face, en el primer formato que fontTools lee."""
+    found = {}
+    for declaration in _declarations(body):
+        if not declaration.startswith("src"):
+            continue
+        for _, url, fmt in _URL_FORMAT_RE.findall(declaration):
+            path = os.path.normpath(os.path.join(folder, re.split(r"[?#]", url)[0]))
+            if fmt and os.path.isfile(path):
+                found.setdefault(fmt, path)
+    for fmt in _SOURCE_FORMATS:
+        if fmt in found:
+            return found[fmt]
+    return None
+
+
+def _web_size(path):
+    # Lo que descargaba el navegador: el woff2 (o woff) junto a la fuente de origen
+    base = os.path.splitext(path)[0]
+    for ext in (".woff2", ".woff", ".ttf"):
+        if os.path.isfile(base + ext):
+            return os.path.getsize(base + ext)
+    return 0
+
+
+def subset_font(path, unicodes):
+    """
+    WOFF2 de la fuente ``path`` con sólo los caracteres de ``unicodes``
+    que contiene; None si no tiene ninguno.
+    """
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    # fontTools avisa de cada tabla que no sabe recortar (FFTM, ...)
+    logging.getLogger("fontTools").setLevel(logging.ERROR)
+    # Sin recalcular la fecha de "head": la misma entrada da el mismo archivo (y el mismo hash)
+    font = TTFont(path, recalcTimestamp=False)
+    present = set(font.getBestCmap()) & set(unicodes)
+    if not present:
+        return None
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=present)
+    subsetter.subset(font)
+    out = io.BytesIO()
+    font.flavor = "woff2"
+    font.save(out)
+    return out.getvalue()
+
+
+def subset_stylesheet(text, source_path, store, used=None, extra_codepoints=()):
+    """
+    Recorta una hoja de iconos a las clases usadas y sus fuentes a los
+    glifos de esas clases.
+
+    Parameters
+    ----------
+    text : str
+        Contenido de la hoja.
+    source_path : str
+        Ruta de la hoja, para resolver los ``url()`` de las fuentes.
+    store : callable
+        ``store(nombre, bytes)`` guarda una fuente recortada
+        (``fonts/<fuente>.subset.woff2``) y retorna su URL.
+    used : set, optional
+        Palabras usadas por la aplicación; por defecto ``used_tokens()``.
+    extra_codepoints : iterable
+        Caracteres que otras hojas piden a estas fuentes con ``content``.
+
+    Returns
+    -------
+    tuple
+        (hoja recortada, resumen {"clases", "glifos", "bytes_antes", "bytes"}).
+    """
+    _require_fonttools()
+    used = used_tokens() if used is None else used
+    icons = icon_classes(text)
+    kept = {name for name in icons if name in used}
+    unicodes = set(extra_codepoints)
+    for name in kept:
+        unicodes |= icons[name]
+
+    folder = os.path.dirname(source_path)
+    stats = {"clases": len(kept), "glifos": 0, "bytes_antes": 0, "bytes": 0}
+    output, subsets = [], {}
+    for rule in split_rules(text):
+        if rule.startswith("@font-face"):
+            _, body = _split_rule(rule)
+            path = _font_source(body, folder)
+            if path is None:
+                output.append(rule)
+                continue
+            if path not in subsets:
+                stats["bytes_antes"] += _web_size(path)
+                data = subset_font(path, unicodes)
+                subsets[path] = None
+                if data:
+                    name = os.path.splitext(os.path.basename(path))[0]
+                    subsets[path] = store(f"fonts/{name}.subset.woff2", data)
+                    stats["bytes"] += len(data)
+            if subsets[path] is None:
+                continue
+            declarations = [d for d in _declarations(body) if not d.startswith("src")]
+            declarations.append(f'src:url({subsets[path]}) format("woff2")')
+            output.append("@font-face{" + ";".join(declarations) + "}")
+        elif rule.startswith("@") or "{" not in rule:
+            output.append(rule)
+        else:
+            # Sin los selectores de iconos que nadie usa (también en las
+            # reglas compartidas como ``.ion,.ion-md-add:before{...}``)
+            selector, body = _split_rule(rule)
+            selectors = []
+            for s in selector.split(","):
+                match = _ICON_SELECTOR_RE.match(s.strip())
+                if not match or match.group(1) not in icons or match.group(1) in kept:
+                    selectors.append(s.strip())
+            if selectors:
+                output.append(",".join(selectors) + "{" + body + "}")
+    stats["glifos"] = len(unicodes)
+    return "\n".join(output), stats
@@ -0,0 +1,49 @@
+# utils/indices.py
+"""
+Punto único para mantener al día los índices locales (búsqueda, duplicados,
+palabras claves, tags, rollups) cuando las vistas crean, actualizan o
+eliminan registros.
+"""
+from utils import duplicates, feed, keywords, rollups, search_index, tag_index
+from utils.catalogs import ENTITIES
+
+
+def on_created(entity, payloads):
+    """
+    Registros nuevos. ``payloads`` puede ser un dict o una lista (importación
+    masiva); como la API no siempre devuelve el código asignado, los
+    índices por código se sincronizan pidiendo lo posterior al último
+    código conocido.
+    """
+    payloads = payloads if isinstance(payloads, list) else [payloads]
+    search_index.sync_new_records(entity)
+    tag_index.sync_new_records(entity)
+    if entity == "ideas":
+        duplicates.sync_new_ideas()
+        feed.invalidate()
+    for payload in payloads:
+        rollups.add_record(entity, payload)
+        keywords.update_text(None, payload.get("palabras_claves"))
+
+
+def on_updated(entity, old, new):
+    """Registro actualizado: ``old`` es el registro previo, ``new`` el resultado."""
+    search_index.index_record(entity, new)
+    tag_index.add_record(entity, new)
+    rollups.update_record(entity, old, new)
+    if entity == "ideas":
+        duplicates.add_idea(new)
+        feed.invalidate()
+    keywords.update_text(old.get("palabras_claves"), new.get("palabras_claves"))
+
+
+def on_deleted(entity, old):
+    """Registro eliminado; ``old`` es el registro tal como estaba."""
+    codigo = old.get(ENTITIES[entity]["key"])
+    search_index.remove_record(entity, codigo)
+    tag_index.remove_record(entity, codigo)
+    rollups.remove_record(entity, old)
+    if entity == "ideas":
+        duplicates.remove_idea(codigo)
+        feed.invalidate()
+    keywords.update_text(old.get("palabras_claves"), None)
@@ -0,0 +1,174 @@
+# utils/keywords.py
+import re
+import threading
+from collections import Counter
+
+from utils.api_client import APIClient
+from utils.catalogs import ENTITIES, normalize_name
+
+# Sugerencias máximas guardadas por nodo del trie
+TOP_K = 10
+
+_SEPARATORS_RE = re.compile(r"[,;\n|#]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def split_keywords(text):
+    """
+    Separa un campo ``palabras_claves`` en palabras claves individuales.
+
+    Returns
+    -------
+    list[tuple]
+        Pares (clave normalizada, forma original), sin repetidos.
+    """
+    result, seen = [], set()
+    for raw in _SEPARATORS_RE.split(text or ""):
+        display = _SPACES_RE.sub(" ", raw).strip(" .-_")
+        key = normalize_name(display)
+        if key and key not in seen:
+            seen.add(key)
+            result.append((key, display))
+    return result
+
+
+class _Node:
+    __slots__ = ("children", "count", "forms", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.count = 0
+        self.forms = None
+        self.top = None
+
+
+class KeywordTrie:
+    """
+    Trie de palabras claves normalizadas con su frecuencia.
+
+    Cada nodo guarda las TOP_K palabras más frecuentes de su subárbol, de
+    modo que una consulta por prefijo sólo recorre los caracteres del
+    prefijo. Durante la carga inicial las listas no se mantienen; ``finalize``
+    las calcula una vez de abajo hacia arriba y desde entonces cada
+    modificación actualiza sólo los nodos de su camino.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.lock = threading.RLock()
+        self.ready = False
+
+    def _path(self, key, create):
+        node, path = self.root, [self.root]
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    @staticmethod
+    def _recompute(node, word):
+        best = []
+        if node.count > 0:
+            display = node.forms.most_common(1)[0][0] if node.forms else word
+            best.append((node.count, word, display))
+        for child in node.children.values():
+            best.extend(child.top or ())
+        best.sort(key=lambda item: (-item[0], item[1]))
+        node.top = best[:TOP_K]
+
+    def add(self, key, display, delta=1):
+        with self.lock:
+            path = self._path(key, create=delta > 0)
+            if path is None:
+                return
+            node = path[-1]
+            node.count = max(node.count + delta, 0)
+            if node.forms is None:
+                node.forms = Counter()
+            node.forms[display] += delta
+            node.forms = +node.forms
+            if self.ready:
+                for depth in range(len(path) - 1, -1, -1):
+                    self._recompute(path[depth], key[:depth])
+
+    def add_text(self, text, delta=1):
+        for key, display in split_keywords(text):
+            self.add(key, display, delta)
+
+    def finalize(self):
+        """Calcula las listas TOP_K de todos los nodos (post-orden)."""
+        with self.lock:
+            stack = [(self.root, "", False)]
+            while stack:
+                node, word, visited = stack.pop()
+                if visited:
+                    self._recompute(node, word)
+                    continue
+                stack.append((node, word, True))
+                for char, child in node.children.items():
+                    stack.append((child, word + char, False))
+            self.ready = True
+
+    def suggest(self, prefix, limit=TOP_K):
+        """
+        Palabras claves que empiezan por ``prefix``, de la más a la menos
+        usada.
+
+        Returns
+        -------
+        list[dict]
+            ``{"palabra", "frecuencia"}``.
+        """
+        key = normalize_name(prefix)
+        with self.lock:
+            if not self.ready:
+                self.finalize()
+            path = self._path(key, create=False)
+            if path is None:
+                return []
+            return [
+                {"palabra": display, "frecuencia": count}
+                for count, _, display in (path[-1].top or [])[:limit]
+            ]
+
+
+_trie = None
+_trie_lock = threading.Lock()
+
+
+def get_trie():
+    """Trie en memoria, construido desde la API en el primer uso."""
+    global _trie
+    if _trie is None:
+        with _trie_lock:
+            if _trie is None:
+                _trie = rebuild()
+    return _trie
+
+
+def rebuild():
+    trie = KeywordTrie()
+    for config in ENTITIES.values():
+        client = APIClient(config["table"])
+        for page in client.iter_pages(config["key"]):
+            for record in page:
+                trie.add_text(record.get("palabras_claves"))
+    trie.finalize()
+    return trie
+
+
+def update_text(old_text, new_text):
+    """Refleja en el trie el cambio de un campo palabras_claves."""
+    try:
+        trie = get_trie()
+        if old_text:
+            trie.add_text(old_text, delta=-1)
+        if new_text:
+            trie.add_text(new_text)
+    except Exception as e:
+        print(f"[keywords] Error actualizando palabras claves: {e}")
@@ -0,0 +1,308 @@
+# utils/media_gc.py
+"""
+Recolector de archivos huérfanos. Recorre los registros de todas las
+entidades en la API (por páginas, en paralelo por entidad) para saber qué
+archivos se usan y recorre en paralelo el almacenamiento: los blobs del
+backend (por carpeta de hash) y las carpetas anteriores (static/uploads,
+static/media y MEDIA_ROOT).
+
+Un archivo es huérfano si ningún registro lo referencia y no se modificó
+en el último ORPHAN_GRACE; los blobs de subidas por partes que aún no
+vencieron (UPLOAD_EXPIRY) cuentan como referenciados, y las miniaturas
+siguen a su imagen. Los
+duplicados son archivos anteriores cuyo contenido ya está en un blob o
+en otro archivo anterior: se informan y, si nadie los referencia, se
+eliminan como cualquier huérfano (``flask migrar-archivos`` pasa a blobs
+los que aún se usan).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config_flask import BASE_DIR, BLOB_ROOT, MEDIA_ROOT, STAGING_ROOT
+from utils import file_storage, storage, uploads
+from utils.api_client import APIClient
+from utils.catalogs import ENTITIES
+
+# Hilos para recorrer el almacenamiento y calcular hashes
+SCAN_WORKERS = 8
+# Archivos que se detallan en el informe (los totales incluyen todos)
+MAX_DETALLE = 200
+# Último informe, para consultarlo desde la aplicación (fuera de
+# MEDIA_ROOT: lista rutas de archivos y no debe servirse por /media)
+REPORT_PATH = os.path.join(STAGING_ROOT, "limpieza_archivos.json")
+# Evita que varios workers del mismo servidor limpien a la vez; un
+# candado más viejo que esto se considera abandonado
+LOCK_PATH = os.path.join(STAGING_ROOT, "limpieza_archivos.lock")
+LOCK_STALE = 6 * 3600
+
+_running = threading.Lock()
+
+
+def legacy_roots():
+    """Carpetas de los archivos guardados antes del almacenamiento por contenido."""
+    return [
+        os.path.join(BASE_DIR, "static", "uploads"),
+        os.path.join(BASE_DIR, "static", "media"),
+        str(MEDIA_ROOT),
+    ]
+
+
+def _norm(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def collect_references():
+    """
+    Hashes de blobs y rutas de archivos anteriores referenciados por
+    ``archivo_multimedia`` en la API. Lanza RuntimeError si la API falla:
+    con una lista incompleta se borrarían archivos en uso.
+
+    Returns
+    -------
+    tuple
+        (set de hashes, set de rutas normalizadas, registros recorridos).
+    """
+    def _entity(entity):
+        config = ENTITIES[entity]
+        client = APIClient(config["table"])
+        blobs, legacy, total = set(), set(), 0
+        for page in client.iter_pages(config["key"], strict=True):
+            for record in page:
+                total += 1
+                url = record.get("archivo_multimedia")
+                parsed = file_storage.parse_blob_url(url)
+                if parsed:
+                    blobs.add(parsed[0])
+                    continue
+                path = file_storage.legacy_path(url)
+                if path:
+                    legacy.add(_norm(path))
+        return blobs, legacy, total
+
+    blobs, legacy, total = set(), set(), 0
+    with ThreadPoolExecutor(max_workers=len(ENTITIES)) as pool:
+        for found_blobs, found_legacy, count in pool.map(_entity, ENTITIES):
+            blobs |= found_blobs
+            legacy |= found_legacy
+            total += count
+    return blobs, legacy, total
+
+
+def _scan_blobs(backend, pool):
+    """(clave, tamaño, fecha) de los blobs y miniaturas; una tarea por carpeta de primer nivel."""
+    prefixes = [f"{i:02x}/" for i in range(256)]
+    for keys in pool.map(lambda prefix: list(backend.iter_keys(prefix)), prefixes):
+        yield from keys
+
+
+def _scan_legacy():
+    blob_root = _norm(BLOB_ROOT)
+    seen = set()
+    for root in legacy_roots():
+        for folder, dirs, names in os.walk(root):
+            # Los blobs locales están dentro de MEDIA_ROOT
+            dirs[:] = [d for d in dirs if _norm(os.path.join(folder, d)) != blob_root]
+            for name in names:
+                path = _norm(os.path.join(folder, name))
+                if path in seen:
+                    continue
+                seen.add(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(file_storage.CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_derivative(key):
+    # ``<hash>.w320.jpg``: las miniaturas tienen dos extensiones
+    return key.rsplit("/", 1)[-1].count(".") == 2
+
+
+def _detalle(report, lista, ruta, size, mtime, now):
+    report[lista + "_total"] += 1
+    report[lista + "_bytes"] += size
+    if len(report[lista]) < MAX_DETALLE:
+        report[lista].append({"ruta": ruta, "bytes": size, "dias": round((now - mtime) / 86400, 1)})
+
+
+def run(delete=False, now=None):
+    """
+    Busca (y con ``delete`` elimina) archivos huérfanos. También descarta
+    las subidas por partes vencidas.
+
+    Returns
+    -------
+    dict
+        Informe con totales, bytes y detalle de huérfanos, duplicados y
+        blobs referenciados que no existen.
+    """
+    now = now or time.time()
+    started = time.time()
+    backend = storage.get_backend()
+    referenced_blobs, referenced_legacy, registros = collect_references()
+    # Subidas terminadas cuyo formulario todavía puede enviarse
+    referenced_blobs |= uploads.pending_blobs(now)
+
+    report = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "eliminar": bool(delete),
+        "registros": registros,
+        "blobs": 0,
+        "blobs_bytes": 0,
+        "huerfanos": [], "huerfanos_total": 0, "huerfanos_bytes": 0,
+        "duplicados": [], "duplicados_total": 0, "duplicados_bytes": 0,
+        "faltantes": 0,
+        "eliminados": 0,
+        "bytes_liberados": 0,
+        "subidas_vencidas": 0,
+        "errores": 0,
+    }
+    borrar = []
+
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+        # Blobs: las miniaturas se conservan mientras exista su original referenciado
+        originales, derivados = [], []
+        for key, size, mtime in _scan_blobs(backend, pool):
+            report["blobs"] += 1
+            report["blobs_bytes"] += size
+            (derivados if _is_derivative(key) else originales).append((key, size, mtime))
+        blob_digests, huerfanos = set(), set()
+        for key, size, mtime in originales:
+            digest = key.rsplit("/", 1)[-1][:64]
+            blob_digests.add(digest)
+            if digest not in referenced_blobs and now - mtime > file_storage.ORPHAN_GRACE:
+                _detalle(report, "huerfanos", file_storage.BLOB_URL + key, size, mtime, now)
+                borrar.append(("blob", key, size))
+                huerfanos.add(digest)
+        for key, size, mtime in derivados:
+            digest = key.rsplit("/", 1)[-1][:64]
+            sin_original = digest not in blob_digests and now - mtime > file_storage.ORPHAN_GRACE
+            if digest in huerfanos or sin_original:
+                _detalle(report, "huerfanos", file_storage.BLOB_URL + key, size, mtime, now)
+                borrar.append(("blob", key, size))
+        report["faltantes"] = len(referenced_blobs - blob_digests)
+
+        # Archivos anteriores: huérfanos si nadie los referencia; el
+        # contenido se compara con los blobs para detectar duplicados
+        legacy = list(_scan_legacy())
+        hashes = pool.map(lambda item: _safe_hash(item[0]), legacy)
+        vistos = set()
+        for (path, size, mtime), digest in zip(legacy, hashes):
+            relativa = os.path.relpath(path, BASE_DIR).replace(os.sep, "/")
+            if digest and (digest in blob_digests or digest in vistos):
+                _detalle(report, "duplicados", relativa, size, mtime, now)
+            if digest:
+                vistos.add(digest)
+            if path not in referenced_legacy and now - mtime > file_storage.ORPHAN_GRACE:
+                _detalle(report, "huerfanos", relativa, size, mtime, now)
+                borrar.append(("local", path, size))
+
+    if delete:
+        for kind, target, size in borrar:
+            try:
+                if kind == "blob":
+                    backend.delete(target)
+                elif os.path.exists(target):
+                    os.remove(target)
+                report["eliminados"] += 1
+                report["bytes_liberados"] += size
+            except Exception as e:
+                print(f"[media_gc] Error eliminando {target}: {e}")
+                report["errores"] += 1
+        report["subidas_vencidas"] = uploads.purge_expired(now)
+
+    report["segundos"] = round(time.time() - started, 1)
+    _save_report(report)
+    return report
+
+
+def _safe_hash(path):
+    try:
+        return _sha256(path)
+    except OSError as e:
+        print(f"[media_gc] Error leyendo {path}: {e}")
+        return None
+
+
+def _save_report(report):
+    try:
+        os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+        tmp = f"{REPORT_PATH}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, REPORT_PATH)
+    except OSError as e:
+        print(f"[media_gc] Error guardando el informe: {e}")
+
+
+def last_report():
+    """Último informe guardado, o None."""
+    try:
+        with open(REPORT_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _acquire_lock():
+    os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+    try:
+        if time.time() - os.path.getmtime(LOCK_PATH) > LOCK_STALE:
+            os.remove(LOCK_PATH)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+def run_locked(delete=False):
+    """run() si ningún otro proceso del servidor está limpiando; None si ya hay uno."""
+    if not _running.acquire(blocking=False):
+        return None
+    try:
+        if not _acquire_lock():
+            return None
+        try:
+            return run(delete)
+        finally:
+            if os.path.exists(LOCK_PATH):
+                os.remove(LOCK_PATH)
+    except Exception as e:
+        print(f"[media_gc] Error en la limpieza de archivos: {e}")
+        return None
+    finally:
+        _running.release()
+
+
+def start(interval, delete=True):
+    """
+    Lanza un hilo que limpia cada ``interval`` segundos (el primero tras
+    un intervalo, para no cargar el arranque).
+    """
+    def _loop():
+        while True:
+            time.sleep(interval)
+            report = run_locked(delete)
+            if report:
+                print(f"[media_gc] {report['eliminados']} archivos eliminados, {report['bytes_liberados']} bytes liberados")
+
+    thread = threading.Thread(target=_loop, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,30 @@
+# utils/pagination.py
+import base64
+import json
+
+
+def encode_cursor(*values):
+    """Convierte los valores del último registro de una página en un token para la URL."""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, size=2):
+    """
+    Recupera los valores de un token de ``encode_cursor``.
+
+    Returns
+    -------
+    tuple or None
+        None si el token falta o no es válido (se vuelve a la primera página).
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return tuple(values)
@@ -0,0 +1,287 @@
+# utils/rollups.py
+import threading
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+
+from utils import tag_index
+from utils.catalogs import ENTITIES
+
+# Eventos agregados: creación del registro y su aprobación (estado verdadero)
+EVENTS = ("creacion", "aprobacion")
+GRANULARITIES = ("dia", "semana", "mes")
+# "total" agrega todo en un solo valor ("")
+DIMENSIONS = ("total", "foco", "tipo", "creador")
+# Periodos mostrados cuando no se indica ``desde``
+DEFAULT_SPAN = {"dia": 90, "semana": 52, "mes": 24}
+# Máximo de periodos por serie
+MAX_PERIODS = 1500
+# Series mostradas al desglosar por una dimensión sin indicar el valor
+DEFAULT_SERIES_LIMIT = 5
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+# (entidad, código) → fecha ISO de las aprobaciones confirmadas en este
+# proceso. Los registros de la API no traen la fecha de aprobación, así
+# que se recuerda aquí y sobrevive a las reconstrucciones de los rollups.
+_approved_on = {}
+
+
+def _day(value):
+    """Días desde 1970-01-01 de una fecha ISO (o datetime), o None."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal() - _EPOCH
+    except ValueError:
+        return None
+
+
+def _bucket(granularidad, days):
+    """
+    Periodo de uno o varios días (entero o arreglo NumPy): el mismo día,
+    el lunes de su semana o el mes contado desde 1970-01.
+    """
+    if granularidad == "dia":
+        return days
+    if granularidad == "semana":
+        # 1970-01-01 fue jueves
+        return days - (days + 3) % 7
+    if isinstance(days, np.ndarray):
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    dia = date.fromordinal(int(days) + _EPOCH)
+    return (dia.year - 1970) * 12 + dia.month - 1
+
+
+def bucket_label(granularidad, bucket):
+    if granularidad == "mes":
+        return f"{1970 + bucket // 12:04d}-{bucket % 12 + 1:02d}"
+    return date.fromordinal(bucket + _EPOCH).isoformat()
+
+
+def parse_bucket(granularidad, value):
+    """Periodo de un texto ``AAAA-MM-DD`` o ``AAAA-MM``; None si no es válido."""
+    value = str(value or "").strip()
+    if len(value) == 7:
+        value += "-01"
+    days = _day(value)
+    return _bucket(granularidad, days) if days is not None else None
+
+
+def _aprobado(record):
+    return record.get("estado") in (True, 1, "1", "True", "true")
+
+
+def record_events(record, entity):
+    """
+    Eventos de un registro: (evento, día, atributos por dimensión).
+
+    La aprobación se fecha con ``fecha_aprobacion`` si existe; si no, con
+    el día en que se confirmó en este proceso y, para las aprobaciones
+    anteriores, con la creación. Nunca con la última modificación: una
+    edición posterior movería la aprobación a otro periodo.
+    """
+    # Los registros de las tres entidades traen los ids; foco_field/tipo_field
+    # de ENTITIES son los nombres de los campos del formulario
+    attrs = {
+        "total": "",
+        "foco": "" if record.get("id_foco_innovacion") is None else str(record["id_foco_innovacion"]),
+        "tipo": "" if record.get("id_tipo_innovacion") is None else str(record["id_tipo_innovacion"]),
+        "creador": str(record.get("usuario_email") or record.get("creador_por") or ""),
+    }
+    events = []
+    creacion = _day(record.get("fecha_creacion"))
+    if creacion is not None:
+        events.append(("creacion", creacion, attrs))
+    if _aprobado(record):
+        confirmada = _approved_on.get((entity, record.get(ENTITIES[entity]["key"])))
+        aprobacion = _day(record.get("fecha_aprobacion") or confirmada)
+        if aprobacion is None:
+            aprobacion = creacion
+        if aprobacion is not None:
+            events.append(("aprobacion", aprobacion, attrs))
+    return events
+
+
+class RollupStore:
+    """
+    Conteos de eventos por periodo (día, semana, mes) y por foco, tipo y
+    creador de una entidad.
+
+    ``counts[(evento, granularidad, dimension)][valor][periodo]`` guarda
+    la cantidad. La carga inicial agrupa toda la historia con NumPy (un
+    ``np.unique`` por evento, granularidad y dimensión); después cada alta,
+    cambio o baja suma o resta sus eventos en los 12 contadores que le
+    corresponden. Una serie se lee recorriendo sólo los periodos pedidos.
+    """
+
+    def __init__(self, source=None):
+        self.source = source
+        self.counts = {
+            (evento, granularidad, dimension): defaultdict(dict)
+            for evento in EVENTS
+            for granularidad in GRANULARITIES
+            for dimension in DIMENSIONS
+        }
+        self.lock = threading.RLock()
+
+    def load(self, records, entity):
+        """Carga en lote la historia completa de la entidad."""
+        rows = {evento: ([], {d: [] for d in DIMENSIONS}) for evento in EVENTS}
+        for record in records:
+            for evento, day, attrs in record_events(record, entity):
+                days, values = rows[evento]
+                days.append(day)
+                for dimension in DIMENSIONS:
+                    values[dimension].append(attrs[dimension])
+
+        with self.lock:
+            for evento, (days, values) in rows.items():
+                if not days:
+                    continue
+                days = np.asarray(days, dtype=np.int64)
+                codes = {}
+                for dimension in DIMENSIONS:
+                    ids = {}
+                    idx = np.fromiter(
+                        (ids.setdefault(v, len(ids)) for v in values[dimension]),
+                        dtype=np.int64, count=len(days),
+                    )
+                    codes[dimension] = (idx, list(ids))
+                for granularidad in GRANULARITIES:
+                    buckets = _bucket(granularidad, days)
+                    first = int(buckets.min())
+                    width = int(buckets.max()) - first + 1
+                    for dimension, (idx, names) in codes.items():
+                        keys, totals = np.unique(idx * width + (buckets - first), return_counts=True)
+                        target = self.counts[(evento, granularidad, dimension)]
+                        for key, total in zip(keys.tolist(), totals.tolist()):
+                            target[names[key // width]][first + key % width] = total
+
+    def apply(self, record, entity, delta=1):
+        """Suma (``delta=1``) o resta (``delta=-1``) los eventos de un registro."""
+        with self.lock:
+            for evento, day, attrs in record_events(record, entity):
+                for granularidad in GRANULARITIES:
+                    bucket = _bucket(granularidad, day)
+                    for dimension in DIMENSIONS:
+                        serie = self.counts[(evento, granularidad, dimension)][attrs[dimension]]
+                        total = serie.get(bucket, 0) + delta
+                        if total > 0:
+                            serie[bucket] = total
+                        else:
+                            serie.pop(bucket, None)
+
+    def series(self, evento, granularidad, dimension="total", valores=None,
+               desde=None, hasta=None, limite=DEFAULT_SERIES_LIMIT):
+        """
+        Series de conteos con los periodos sin eventos en cero.
+
+        Parameters
+        ----------
+        valores : list, optional
+            Valores de la dimensión a graficar; si no se indican se toman
+            los ``limite`` con más eventos en el rango.
+        desde, hasta : int, optional
+            Periodos (ver ``parse_bucket``); por defecto los últimos
+            DEFAULT_SPAN periodos hasta hoy.
+
+        Returns
+        -------
+        dict
+            ``{"periodos": [etiquetas], "series": [{"valor", "total", "datos"}]}``.
+        """
+        # Las semanas se identifican por el día de su lunes
+        step = 7 if granularidad == "semana" else 1
+        if hasta is None:
+            hasta = _bucket(granularidad, date.today().toordinal() - _EPOCH)
+        if desde is None:
+            desde = hasta - step * (DEFAULT_SPAN[granularidad] - 1)
+        desde = max(desde, hasta - step * (MAX_PERIODS - 1))
+        periodos = list(range(desde, hasta + 1, step))
+
+        with self.lock:
+            por_valor = self.counts[(evento, granularidad, dimension)]
+            if dimension == "total":
+                valores = [""]
+            elif valores is None:
+                totales = []
+                for valor, serie in por_valor.items():
+                    total = sum(c for b, c in serie.items() if desde <= b <= hasta)
+                    if total:
+                        totales.append((total, valor))
+                totales.sort(key=lambda item: (-item[0], item[1]))
+                valores = [valor for _, valor in totales[:limite]]
+            resultado = []
+            for valor in valores:
+                serie = por_valor.get(valor, {})
+                datos = [serie.get(b, 0) for b in periodos]
+                resultado.append({"valor": valor, "total": sum(datos), "datos": datos})
+        return {
+            "periodos": [bucket_label(granularidad, b) for b in periodos],
+            "series": resultado,
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(entity):
+    """
+    Rollups de la entidad, construidos desde el modelo de lectura de
+    tag_index; cuando ese modelo se reconstruye, los rollups también.
+    """
+    modelo = tag_index.get_index(entity)
+    store = _stores.get(entity)
+    if store is None or store.source is not modelo:
+        with _stores_lock:
+            store = _stores.get(entity)
+            if store is None or store.source is not modelo:
+                store = RollupStore(modelo)
+                store.load(modelo.fetch(modelo.all), entity)
+                _stores[entity] = store
+    return store
+
+
+def add_record(entity, record):
+    """
+    Suma los eventos de un registro nuevo. Sólo toca rollups ya
+    construidos: uno que se construya después ya lo incluye.
+    """
+    try:
+        store = _stores.get(entity)
+        if store is not None:
+            record = dict(record)
+            record.setdefault("fecha_creacion", date.today().isoformat())
+            store.apply(record, entity)
+    except Exception as e:
+        print(f"[rollups] Error agregando registro de {entity}: {e}")
+
+
+def update_record(entity, old, new):
+    """Reemplaza los eventos de ``old`` por los de ``new``."""
+    try:
+        codigo = new.get(ENTITIES[entity]["key"], old.get(ENTITIES[entity]["key"]))
+        if _aprobado(new) and not _aprobado(old) and codigo is not None:
+            # Aprobado en este cambio (confirmación): se fecha hoy aunque
+            # los rollups aún no se hayan construido
+            _approved_on[(entity, codigo)] = date.today().isoformat()
+        store = _stores.get(entity)
+        if store is None:
+            return
+        new = dict(old, **new)
+        store.apply(old, entity, -1)
+        store.apply(new, entity)
+    except Exception as e:
+        print(f"[rollups] Error actualizando registro de {entity}: {e}")
+
+
+def remove_record(entity, old):
+    try:
+        store = _stores.get(entity)
+        if store is not None:
+            store.apply(old, entity, -1)
+    except Exception as e:
+        print(f"[rollups] Error eliminando registro de {entity}: {e}")
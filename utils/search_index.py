@@ -0,0 +1,226 @@
+# utils/search_index.py
+import os
+import threading
+
+from whoosh import index, sorting
+from whoosh.analysis import CharsetFilter, LowercaseFilter, RegexTokenizer, StemFilter, StopFilter
+from whoosh.fields import ID, NUMERIC, STORED, TEXT, Schema
+from whoosh.qparser import MultifieldParser, OrGroup
+from whoosh.query import And, Term
+from whoosh.scoring import BM25F
+from whoosh.support.charset import accent_map
+from whoosh.writing import CLEAR, AsyncWriter
+
+from config_flask import SEARCH_INDEX_DIR
+from utils.api_client import APIClient
+from utils.catalogs import ENTITIES
+
+# Análisis en español: minúsculas, stopwords, plegado de tildes y stemming.
+# Las tildes se pliegan antes del stemming para que "energía" y "energia"
+# lleguen a la misma raíz.
+SPANISH_ANALYZER = (
+    RegexTokenizer()
+    | LowercaseFilter()
+    | StopFilter(lang="es")
+    | CharsetFilter(accent_map)
+    | StemFilter(lang="es")
+)
+
+SCHEMA = Schema(
+    doc_id=ID(unique=True, stored=True),
+    entidad=ID(stored=True),
+    codigo=NUMERIC(stored=True, sortable=True),
+    titulo=TEXT(analyzer=SPANISH_ANALYZER, stored=True, field_boost=3.0),
+    descripcion=TEXT(analyzer=SPANISH_ANALYZER),
+    palabras_claves=TEXT(analyzer=SPANISH_ANALYZER, field_boost=2.0),
+    foco=ID(stored=True, sortable=True),
+    tipo=ID(stored=True, sortable=True),
+    estado=ID(stored=True, sortable=True),
+    fecha_creacion=STORED,
+)
+
+SEARCH_FIELDS = ["titulo", "descripcion", "palabras_claves"]
+FACET_FIELDS = ("entidad", "foco", "tipo", "estado")
+
+_index = None
+_index_lock = threading.Lock()
+# Entidades cuya carga inicial está corriendo en segundo plano
+_syncing = set()
+_syncing_lock = threading.Lock()
+
+
+def get_index():
+    """Abre (o crea la primera vez) el índice persistente en SEARCH_INDEX_DIR."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                os.makedirs(SEARCH_INDEX_DIR, exist_ok=True)
+                if index.exists_in(SEARCH_INDEX_DIR):
+                    _index = index.open_dir(SEARCH_INDEX_DIR)
+                else:
+                    _index = index.create_in(SEARCH_INDEX_DIR, SCHEMA)
+    return _index
+
+
+def _estado(value):
+    return "1" if value in (True, 1, "1") else "0"
+
+
+def _document(entity, record):
+    codigo = record.get(ENTITIES[entity]["key"])
+    return {
+        "doc_id": f"{entity}:{codigo}",
+        "entidad": entity,
+        "codigo": int(codigo),
+        "titulo": record.get("titulo") or "",
+        "descripcion": record.get("descripcion") or "",
+        "palabras_claves": record.get("palabras_claves") or "",
+        "foco": str(record.get("id_foco_innovacion") or ""),
+        "tipo": str(record.get("id_tipo_innovacion") or ""),
+        "estado": _estado(record.get("estado")),
+        "fecha_creacion": record.get("fecha_creacion"),
+    }
+
+
+# ----------------------------
+# Actualización incremental
+# ----------------------------
+def index_record(entity, record):
+    """Agrega o reemplaza un registro en el índice."""
+    try:
+        if record.get(ENTITIES[entity]["key"]) is None:
+            return
+        writer = AsyncWriter(get_index())
+        writer.update_document(**_document(entity, record))
+        writer.commit()
+    except Exception as e:
+        print(f"[search_index] Error indexando {entity}: {e}")
+
+
+def remove_record(entity, codigo):
+    """Elimina un registro del índice."""
+    try:
+        writer = AsyncWriter(get_index())
+        writer.delete_by_term("doc_id", f"{entity}:{codigo}")
+        writer.commit()
+    except Exception as e:
+        print(f"[search_index] Error eliminando {entity}:{codigo}: {e}")
+
+
+def sync_new_records(entity):
+    """
+    Indexa los registros creados después del mayor código ya indexado.
+
+    Se usa tras las altas, porque la API no siempre devuelve el código del
+    registro creado. Si la entidad todavía no tiene nada indexado, la
+    carga completa corre en un hilo aparte (o con ``flask
+    reindexar-busqueda``) para no recorrer la tabla dentro de la petición.
+    """
+    try:
+        ix = get_index()
+        with ix.searcher() as searcher:
+            hits = searcher.search(
+                Term("entidad", entity), limit=1, sortedby="codigo", reverse=True
+            )
+            last = hits[0]["codigo"] if hits else None
+    except Exception as e:
+        print(f"[search_index] Error sincronizando {entity}: {e}")
+        return
+
+    if last is not None:
+        _index_after(entity, last)
+        return
+    with _syncing_lock:
+        if entity in _syncing:
+            return
+        _syncing.add(entity)
+    print(f"[search_index] {entity} sin indexar: carga completa en segundo plano")
+    threading.Thread(target=_initial_sync, args=(entity,), daemon=True).start()
+
+
+def _initial_sync(entity):
+    try:
+        _index_after(entity, None)
+    finally:
+        with _syncing_lock:
+            _syncing.discard(entity)
+
+
+def _index_after(entity, last):
+    try:
+        config = ENTITIES[entity]
+        where = f"{config['key']} > {int(last)}" if last is not None else None
+        writer = AsyncWriter(get_index())
+        for page in APIClient(config["table"]).iter_pages(config["key"], where):
+            for record in page:
+                writer.update_document(**_document(entity, record))
+        writer.commit()
+    except Exception as e:
+        print(f"[search_index] Error sincronizando {entity}: {e}")
+
+
+def rebuild():
+    """Reconstruye el índice completo recorriendo la API por páginas."""
+    ix = get_index()
+    writer = ix.writer(limitmb=128)
+    writer.mergetype = CLEAR
+    total = 0
+    for entity, config in ENTITIES.items():
+        for page in APIClient(config["table"]).iter_pages(config["key"]):
+            for record in page:
+                writer.add_document(**_document(entity, record))
+                total += 1
+    writer.commit(optimize=True)
+    return total
+
+
+# -------------
+# Búsqueda
+# -------------
+def search(text, entidad=None, foco=None, tipo=None, estado=None, page=1, per_page=20):
+    """
+    Busca ``text`` en título, descripción y palabras claves (ranking BM25F).
+
+    Returns
+    -------
+    dict
+        ``{"total", "resultados": [...], "facetas": {campo: {valor: n}}}``.
+        Las facetas se calculan sobre todos los documentos que coinciden.
+    """
+    ix = get_index()
+    parser = MultifieldParser(SEARCH_FIELDS, schema=ix.schema, group=OrGroup.factory(0.9))
+    query = parser.parse(text or "")
+
+    filters = [
+        Term(field, str(value))
+        for field, value in (("entidad", entidad), ("foco", foco), ("tipo", tipo), ("estado", estado))
+        if value not in (None, "")
+    ]
+    filter_query = And(filters) if filters else None
+
+    with ix.searcher(weighting=BM25F()) as searcher:
+        facets = sorting.Facets()
+        for field in FACET_FIELDS:
+            facets.add_field(field)
+        hits = searcher.search_page(
+            query, page, pagelen=per_page, filter=filter_query, groupedby=facets
+        )
+        resultados = [
+            {
+                "entidad": hit["entidad"],
+                "codigo": hit["codigo"],
+                "titulo": hit["titulo"],
+                "foco": hit["foco"],
+                "tipo": hit["tipo"],
+                "estado": hit["estado"],
+                "fecha_creacion": hit.get("fecha_creacion"),
+                "score": round(hit.score, 4),
+            }
+            for hit in hits
+        ]
+        facetas = {
+            field: {value: len(docs) for value, docs in hits.results.groups(field).items()}
+            for field in FACET_FIELDS
+        }
+        return {"total": hits.total, "resultados": resultados, "facetas": facetas}
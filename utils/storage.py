@@ -0,0 +1,267 @@
+# utils/storage.py
+"""
+Backends de almacenamiento de los blobs (ver file_storage). Los blobs se
+identifican con una clave relativa (``aa/bb/<hash>.ext``) y cada backend
+decide dónde viven:
+
+- ``LocalStorage``: una carpeta del disco (BLOB_ROOT); el archivo se
+  sirve por la ruta de media.
+- ``S3Storage``: un bucket S3 o compatible (MinIO, Ceph, R2...); las
+  subidas grandes van en partes enviadas en paralelo y las descargas se
+  hacen directo del bucket con URLs firmadas, sin pasar por Flask.
+
+Con un backend remoto varios nodos de la aplicación comparten los
+mismos archivos.
+"""
+import os
+import shutil
+import threading
+
+import config_flask
+
+
+class StorageBackend:
+    """Interfaz común de los backends."""
+
+    # True si los archivos están en otro servidor (no hay ruta local)
+    remote = False
+
+    def put_file(self, source, key, content_type=None):
+        """Guarda el archivo local ``source`` con la clave ``key``."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def touch(self, key):
+        """Renueva la fecha de modificación (periodo de gracia de los blobs reutilizados)."""
+        raise NotImplementedError
+
+    def mtime(self, key):
+        """Fecha de modificación (epoch) o None si no existe."""
+        raise NotImplementedError
+
+    def download(self, key, target):
+        """Copia el archivo a la ruta local ``target``."""
+        raise NotImplementedError
+
+    def local_path(self, key):
+        """Ruta local del archivo, o None en backends remotos."""
+        return None
+
+    def url(self, key):
+        """URL de descarga directa, o None si el archivo se sirve por la ruta de media."""
+        return None
+
+    def iter_keys(self, prefix=""):
+        """Genera (clave, tamaño, fecha de modificación) de los archivos guardados."""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root):
+        self.root = str(root)
+
+    def local_path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def put_file(self, source, key, content_type=None):
+        target = self.local_path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.abspath(source) != os.path.abspath(target):
+            os.replace(source, target)
+
+    def exists(self, key):
+        return os.path.isfile(self.local_path(key))
+
+    def delete(self, key):
+        path = self.local_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def touch(self, key):
+        os.utime(self.local_path(key))
+
+    def mtime(self, key):
+        path = self.local_path(key)
+        return os.path.getmtime(path) if os.path.exists(path) else None
+
+    def download(self, key, target):
+        if os.path.abspath(self.local_path(key)) != os.path.abspath(target):
+            shutil.copyfile(self.local_path(key), target)
+
+    def iter_keys(self, prefix=""):
+        base = self.local_path(prefix) if prefix else self.root
+        for folder, _, names in os.walk(base):
+            for name in names:
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                yield key, stat.st_size, stat.st_mtime
+
+
+class S3Storage(StorageBackend):
+    """
+    Bucket S3 o compatible. Requiere el paquete boto3; ``endpoint`` permite
+    apuntar a MinIO u otro servicio local.
+    """
+
+    remote = True
+    # S3 no permite cambiar la fecha de un objeto: la reutilización de un
+    # blob se anota con un objeto vacío bajo este prefijo, en lugar de
+    # copiar el blob sobre sí mismo
+    TOUCH_PREFIX = "reutilizados/"
+
+    def __init__(self, bucket, endpoint=None, region=None, access_key=None, secret_key=None,
+                 prefix="", public_url="", url_expiry=3600, part_size=16 * 1024 * 1024, concurrency=8):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError:
+            raise RuntimeError("Para STORAGE_BACKEND='s3' se requiere el paquete boto3")
+
+        if not bucket:
+            raise RuntimeError("Falta STORAGE_S3_BUCKET")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = public_url.rstrip("/")
+        self.url_expiry = url_expiry
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint or None,
+            region_name=region or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+            # Un pool de conexiones por cada parte que se envía en paralelo
+            config=Config(signature_version="s3v4", max_pool_connections=max(10, concurrency * 2)),
+        )
+        # Sobre part_size la subida es multiparte, con ``concurrency`` partes a la vez
+        self.transfer = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=concurrency,
+            use_threads=True,
+        )
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def put_file(self, source, key, content_type=None):
+        import mimetypes
+
+        content_type = content_type or mimetypes.guess_type(key)[0] or "application/octet-stream"
+        self.client.upload_file(
+            str(source), self.bucket, self._key(key),
+            ExtraArgs={
+                "ContentType": content_type,
+                # El nombre cambia con el contenido: se puede guardar en caché un año
+                "CacheControl": f"public, max-age={config_flask.MEDIA_IMMUTABLE_MAX_AGE}, immutable",
+            },
+            Config=self.transfer,
+        )
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(self.TOUCH_PREFIX + key))
+
+    def touch(self, key):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(self.TOUCH_PREFIX + key), Body=b"")
+
+    def mtime(self, key):
+        head = self._head(key)
+        if head is None:
+            return None
+        touched = self._head(self.TOUCH_PREFIX + key)
+        mtime = head["LastModified"].timestamp()
+        return max(mtime, touched["LastModified"].timestamp()) if touched else mtime
+
+    def download(self, key, target):
+        self.client.download_file(self.bucket, self._key(key), str(target), Config=self.transfer)
+
+    def url(self, key):
+        if self.public_url:
+            return f"{self.public_url}/{self._key(key)}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(key)},
+            ExpiresIn=self.url_expiry,
+        )
+
+    def _list(self, prefix):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get("Contents", ()):
+                yield item["Key"][len(self.prefix):], item["Size"], item["LastModified"].timestamp()
+
+    def iter_keys(self, prefix=""):
+        # La fecha de cada blob es la más reciente entre la suya y la de su marca de reutilización
+        touched = {
+            key[len(self.TOUCH_PREFIX):]: mtime
+            for key, _, mtime in self._list(self.TOUCH_PREFIX + prefix)
+        }
+        for key, size, mtime in self._list(prefix):
+            if key.startswith(self.TOUCH_PREFIX):
+                continue
+            yield key, size, max(mtime, touched.get(key, 0))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name=None):
+    """Crea el backend ``name`` (por defecto STORAGE_BACKEND) con la configuración de config_flask."""
+    name = (name or config_flask.STORAGE_BACKEND or "local").lower()
+    if name == "local":
+        return LocalStorage(config_flask.BLOB_ROOT)
+    if name == "s3":
+        return S3Storage(
+            config_flask.STORAGE_S3_BUCKET,
+            endpoint=config_flask.STORAGE_S3_ENDPOINT,
+            region=config_flask.STORAGE_S3_REGION,
+            access_key=config_flask.STORAGE_S3_ACCESS_KEY,
+            secret_key=config_flask.STORAGE_S3_SECRET_KEY,
+            prefix=config_flask.STORAGE_S3_PREFIX,
+            public_url=config_flask.STORAGE_S3_PUBLIC_URL,
+            url_expiry=config_flask.STORAGE_S3_URL_EXPIRY,
+            part_size=config_flask.STORAGE_S3_PART_SIZE,
+            concurrency=config_flask.STORAGE_S3_CONCURRENCY,
+        )
+    raise RuntimeError(f"STORAGE_BACKEND no válido: {name}")
+
+
+def get_backend():
+    """Backend configurado (uno por proceso)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Reemplaza el backend del proceso (p. ej. al migrar entre backends)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
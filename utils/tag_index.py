@@ -0,0 +1,402 @@
+# utils/tag_index.py
+import threading
+import time
+from collections import defaultdict
+
+from utils.api_client import APIClient
+from utils.catalogs import ENTITIES
+from utils.keywords import split_keywords
+
+# Campos indexados: palabras claves (tags) y los filtros de las páginas de listado
+FIELDS = ("tag", "tipo", "foco", "estado")
+# Tags mostrados en la barra de facetas
+FACET_TAG_LIMIT = 20
+# Segundos tras los cuales el modelo se reconstruye en segundo plano, para
+# recoger cambios hechos fuera de esta aplicación
+READ_MODEL_TTL = 300
+# Segundos entre consultas a la API por registros nuevos (creados por otro
+# proceso o directamente en la API); acota lo que un listado puede quedar
+# sin mostrarlos
+NEW_RECORDS_INTERVAL = 15
+
+# Posiciones de los bits encendidos en cada valor de byte
+_BYTE_BITS = [tuple(i for i in range(8) if byte >> i & 1) for byte in range(256)]
+
+
+def bitmap_slots(bitmap):
+    """Posiciones (en orden ascendente) de los bits encendidos de un entero."""
+    slots = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        if byte:
+            base = offset * 8
+            slots.extend(base + bit for bit in _BYTE_BITS[byte])
+    return slots
+
+
+# Campos donde los registros traen el id de tipo y de foco, en orden de preferencia
+TIPO_ID_FIELDS = ("id_tipo_innovacion", "tipo_id", "id_tipo")
+FOCO_ID_FIELDS = ("id_foco_innovacion", "foco_id", "id_foco")
+
+
+def is_aprobada(value):
+    """Si el ``estado`` de un registro cuenta como aprobado (booleano, número o texto)."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return int(value) == 1
+    if isinstance(value, str):
+        return value.strip().lower() in ("aprobada", "aprobado", "approved", "true", "1", "si", "sí")
+    return False
+
+
+def _estado(value):
+    return "1" if is_aprobada(value) else "0"
+
+
+def _first_id(record, fields):
+    for field in fields:
+        value = record.get(field)
+        if value is not None:
+            return {str(value)}
+    return set()
+
+
+def record_values(record):
+    """Valores de cada campo indexado para un registro."""
+    return {
+        "tag": {key for key, _ in split_keywords(record.get("palabras_claves"))},
+        "tipo": _first_id(record, TIPO_ID_FIELDS),
+        "foco": _first_id(record, FOCO_ID_FIELDS),
+        "estado": {_estado(record.get("estado"))},
+    }
+
+
+def _date_key(record, codigo):
+    # Las fechas llegan de la API como texto ISO, que ordena igual que la fecha
+    return (str(record.get("fecha_creacion") or "")[:19], codigo)
+
+
+class TagIndex:
+    """
+    Modelo de lectura de una entidad: los registros más un índice
+    invertido valor → registros.
+
+    Cada registro ocupa una posición fija (slot) y cada lista de
+    ocurrencias es un bitmap guardado en un entero de Python, de modo que
+    combinar filtros es un AND bit a bit y contar una faceta es contar
+    bits, sin recorrer los registros. El orden por fecha de creación se
+    precalcula como un rango por slot y sólo se recalcula tras una
+    modificación.
+    """
+
+    def __init__(self):
+        self.slots = {}
+        self.codigos = []
+        self.values = []
+        self.records = []
+        self.postings = {field: defaultdict(int) for field in FIELDS}
+        self.labels = {}
+        self.all = 0
+        self.date_rank = None
+        self.built_at = time.monotonic()
+        self.synced_at = self.built_at
+        self.lock = threading.RLock()
+        # Mientras otro modelo se reconstruye: escrituras a repetir en él
+        self.journal = None
+        # Modelo que reemplazó a éste; las escrituras tardías van a ese
+        self.successor = None
+
+    def add(self, codigo, record):
+        """Agrega o reemplaza un registro; un registro existente conserva su slot."""
+        values = record_values(record)
+        with self.lock:
+            successor = self.successor
+            if successor is None:
+                self._add(codigo, record, values)
+                if self.journal is not None:
+                    self.journal.append((codigo, dict(record)))
+        if successor is not None:
+            successor.add(codigo, record)
+
+    def _add(self, codigo, record, values):
+        slot = self.slots.get(codigo)
+        if slot is None:
+            slot = len(self.codigos)
+            self.codigos.append(codigo)
+            self.values.append(None)
+            self.records.append(None)
+            self.slots[codigo] = slot
+        else:
+            self._clear(slot)
+        self.codigos[slot] = codigo
+        self.values[slot] = values
+        self.records[slot] = dict(record)
+        self.date_rank = None
+        bit = 1 << slot
+        self.all |= bit
+        for field, field_values in values.items():
+            for value in field_values:
+                self.postings[field][value] |= bit
+        for key, display in split_keywords(record.get("palabras_claves")):
+            self.labels.setdefault(key, display)
+
+    def _clear(self, slot):
+        mask = ~(1 << slot)
+        self.all &= mask
+        for field, field_values in (self.values[slot] or {}).items():
+            postings = self.postings[field]
+            for value in field_values:
+                postings[value] &= mask
+                if not postings[value]:
+                    del postings[value]
+        self.values[slot] = None
+
+    def remove(self, codigo):
+        with self.lock:
+            successor = self.successor
+            if successor is None:
+                if self.journal is not None:
+                    self.journal.append((codigo, None))
+                self._remove(codigo)
+        if successor is not None:
+            successor.remove(codigo)
+
+    def _remove(self, codigo):
+        slot = self.slots.pop(codigo, None)
+        if slot is None:
+            return
+        self._clear(slot)
+        self.codigos[slot] = None
+        self.records[slot] = None
+        self.date_rank = None
+
+    def match(self, filters):
+        """
+        Bitmap de los registros que cumplen todos los filtros.
+
+        Parameters
+        ----------
+        filters : dict
+            {campo: [valores]}; todos los valores deben cumplirse.
+        """
+        with self.lock:
+            bitmap = self.all
+            for field, values in filters.items():
+                postings = self.postings[field]
+                for value in values:
+                    bitmap &= postings.get(value, 0)
+                    if not bitmap:
+                        return 0
+            return bitmap
+
+    def _ranks(self):
+        if self.date_rank is None:
+            order = sorted(
+                (slot for slot in range(len(self.codigos)) if self.records[slot] is not None),
+                key=lambda slot: _date_key(self.records[slot], self.codigos[slot]),
+                reverse=True,
+            )
+            rank = [0] * len(self.codigos)
+            for position, slot in enumerate(order):
+                rank[slot] = position
+            self.date_rank = rank
+        return self.date_rank
+
+    def resolve(self, bitmap, by_date=False):
+        """
+        Códigos de los registros de un bitmap, en orden de slot o, con
+        ``by_date``, del más reciente al más antiguo.
+        """
+        with self.lock:
+            slots = bitmap_slots(bitmap)
+            if by_date:
+                slots.sort(key=self._ranks().__getitem__)
+            return [self.codigos[slot] for slot in slots]
+
+    def fetch(self, bitmap, by_date=False):
+        """Copias de los registros de un bitmap (ver ``resolve``)."""
+        with self.lock:
+            return [dict(self.records[self.slots[codigo]]) for codigo in self.resolve(bitmap, by_date)]
+
+    def get(self, codigo):
+        """Copia del registro con ese código, o None."""
+        with self.lock:
+            slot = self.slots.get(codigo)
+            return dict(self.records[slot]) if slot is not None else None
+
+    def facets(self, bitmap, field, limit=None):
+        """
+        Cuántos registros del bitmap tiene cada valor de ``field``.
+
+        Returns
+        -------
+        list[tuple]
+            (valor, cantidad) de mayor a menor cantidad, sin los ceros.
+        """
+        with self.lock:
+            counts = [
+                (value, (posting & bitmap).bit_count())
+                for value, posting in self.postings[field].items()
+            ]
+        counts = [item for item in counts if item[1]]
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts[:limit] if limit else counts
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+_refreshing = set()
+
+
+def get_index(entity):
+    """
+    Índice en memoria de la entidad, construido desde la API en el primer
+    uso. Cada NEW_RECORDS_INTERVAL se piden a la API los registros
+    posteriores al último código, y pasado READ_MODEL_TTL (para
+    ediciones y bajas hechas fuera) se sigue sirviendo mientras un hilo lo
+    reconstruye.
+    """
+    ix = _indexes.get(entity)
+    if ix is None:
+        with _indexes_lock:
+            ix = _indexes.get(entity)
+            if ix is None:
+                ix = _indexes[entity] = rebuild(entity)
+    elif time.monotonic() - ix.built_at > READ_MODEL_TTL:
+        with _indexes_lock:
+            if entity not in _refreshing:
+                _refreshing.add(entity)
+                threading.Thread(target=_refresh, args=(entity,), daemon=True).start()
+    if time.monotonic() - ix.synced_at > NEW_RECORDS_INTERVAL:
+        _sync(entity, ix)
+    return ix
+
+
+def _refresh(entity):
+    old = _indexes[entity]
+    with old.lock:
+        old.journal = []
+    try:
+        ix = rebuild(entity)
+        with old.lock:
+            # Lo que esta aplicación escribió mientras se leía la API
+            for codigo, record in old.journal:
+                if record is None:
+                    ix.remove(codigo)
+                else:
+                    ix.add(codigo, record)
+            old.successor = ix
+            _indexes[entity] = ix
+    except Exception as e:
+        print(f"[tag_index] Error reconstruyendo {entity}: {e}")
+    finally:
+        with old.lock:
+            old.journal = None
+        with _indexes_lock:
+            _refreshing.discard(entity)
+
+
+def rebuild(entity):
+    config = ENTITIES[entity]
+    ix = TagIndex()
+    for page in APIClient(config["table"]).iter_pages(config["key"]):
+        for record in page:
+            if record.get(config["key"]) is not None:
+                ix.add(record[config["key"]], record)
+    return ix
+
+
+def add_record(entity, record):
+    """Registra (o actualiza) un registro en el índice."""
+    try:
+        codigo = record.get(ENTITIES[entity]["key"])
+        if codigo is not None:
+            get_index(entity).add(codigo, record)
+    except Exception as e:
+        print(f"[tag_index] Error indexando {entity}: {e}")
+
+
+def remove_record(entity, codigo):
+    try:
+        get_index(entity).remove(codigo)
+    except Exception as e:
+        print(f"[tag_index] Error eliminando {entity}:{codigo}: {e}")
+
+
+def sync_new_records(entity):
+    """Agrega los registros con código mayor al último indexado."""
+    ix = _indexes.get(entity)
+    if ix is None:
+        # Se construye completo: ya incluye los nuevos
+        get_index(entity)
+        return
+    _sync(entity, ix)
+
+
+def _sync(entity, ix):
+    try:
+        config = ENTITIES[entity]
+        with ix.lock:
+            ix.synced_at = time.monotonic()
+            last = max(ix.slots) if ix.slots else None
+        where = f"{config['key']} > {int(last)}" if last is not None else None
+        for page in APIClient(config["table"]).iter_pages(config["key"], where):
+            for record in page:
+                if record.get(config["key"]) is not None:
+                    ix.add(record[config["key"]], record)
+    except Exception as e:
+        print(f"[tag_index] Error sincronizando {entity}: {e}")
+
+
+def parse_filters(args):
+    """
+    Traduce los parámetros de las páginas de listado (tipo_innovacion,
+    foco_innovacion, estado y uno o varios ``tag``) a filtros del índice.
+    """
+    filters = {}
+    tipo = (args.get("tipo_innovacion") or "").strip()
+    foco = (args.get("foco_innovacion") or "").strip()
+    estado = (args.get("estado") or "").strip()
+    if tipo:
+        filters["tipo"] = [tipo]
+    if foco:
+        filters["foco"] = [foco]
+    if estado:
+        filters["estado"] = [_estado(estado)]
+    tags = []
+    for raw in args.getlist("tag"):
+        tags.extend(key for key, _ in split_keywords(raw))
+    if tags:
+        filters["tag"] = list(dict.fromkeys(tags))
+    return filters
+
+
+def query(entity, args):
+    """
+    Filtra una entidad con los parámetros de su página de listado.
+
+    Returns
+    -------
+    dict
+        ``{"registros": [...], "tags": [tags seleccionados],
+        "facetas": {"tag": [{"tag", "nombre", "cantidad"}], campo: {valor: n}}}``.
+        Los registros van del más reciente al más antiguo.
+    """
+    ix = get_index(entity)
+    filters = parse_filters(args)
+    bitmap = ix.match(filters)
+    facetas = {
+        field: dict(ix.facets(bitmap, field)) for field in ("tipo", "foco", "estado")
+    }
+    facetas["tag"] = [
+        {"tag": key, "nombre": ix.labels.get(key, key), "cantidad": count}
+        for key, count in ix.facets(bitmap, "tag", FACET_TAG_LIMIT)
+    ]
+    return {
+        "registros": ix.fetch(bitmap, by_date=True),
+        "tags": filters.get("tag", []),
+        "facetas": facetas,
+    }
@@ -0,0 +1,149 @@
+# utils/thumbnails.py
+"""
+Miniaturas y tamaños responsivos de las imágenes subidas.
+
+Cada imagen original ``<hash>.jpg`` tiene derivados ``<hash>.w320.jpg``,
+``<hash>.w320.webp``, etc. en la misma carpeta. Se generan en un pool de
+procesos al subir la imagen y, si falta alguno, en la primera petición;
+las peticiones simultáneas por la misma imagen esperan un único render.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Anchos generados (px); nunca se amplía una imagen más chica
+WIDTHS = (320, 640, 1280)
+# Extensiones de imagen con derivados (los GIF pueden ser animados y se dejan como están)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+# Procesos para generar derivados
+THUMBNAIL_WORKERS = 2
+# Segundos máximos que una petición espera un derivado
+RENDER_TIMEOUT = 30
+
+_pool = None
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def is_image(path):
+    return str(path or "").lower().endswith(IMAGE_EXTENSIONS)
+
+
+def derivative_path(original, width, fmt=None):
+    """Ruta del derivado de ``width`` px; ``fmt="webp"`` para la versión WebP."""
+    base, ext = os.path.splitext(original)
+    ext = ".webp" if fmt == "webp" else (".jpg" if ext.lower() == ".jpeg" else ext.lower())
+    return f"{base}.w{width}{ext}"
+
+
+def parse_derivative(path, exists=os.path.isfile):
+    """
+    (ruta de la imagen original, ancho) de un derivado, o None. ``exists``
+    indica si una ruta original existe (en otro backend puede no estar en
+    el disco).
+    """
+    folder, name = os.path.split(path)
+    parts = name.split(".")
+    if len(parts) != 3 or not parts[1].startswith("w") or not parts[1][1:].isdigit():
+        return None
+    width = int(parts[1][1:])
+    if width not in WIDTHS:
+        return None
+    for ext in IMAGE_EXTENSIONS:
+        original = os.path.join(folder, parts[0] + ext)
+        if path in derivatives(original) and exists(original):
+            return original, width
+    return None
+
+
+def derivatives(original):
+    """Rutas de todos los derivados de una imagen original."""
+    return [derivative_path(original, w, fmt) for w in WIDTHS for fmt in (None, "webp")]
+
+
+def render(original):
+    """
+    Genera los derivados que falten de una imagen (se ejecuta en el pool).
+    La imagen se decodifica una sola vez y cada tamaño se reduce a partir
+    del anterior, de mayor a menor.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(original) as source:
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA", "P")
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        for width in sorted(WIDTHS, reverse=True):
+            if image.width > width:
+                image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            for fmt in (None, "webp"):
+                target = derivative_path(original, width, fmt)
+                if os.path.exists(target):
+                    continue
+                tmp = f"{target}.{os.getpid()}.tmp"
+                if fmt == "webp":
+                    image.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+                elif target.endswith(".png"):
+                    image.save(tmp, "PNG", optimize=True)
+                else:
+                    image.convert("RGB").save(tmp, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                os.replace(tmp, target)
+    return original
+
+
+def schedule(original, task=None):
+    """
+    Encola la generación de derivados de una imagen. Retorna el future (el
+    mismo si ya había uno en curso) o None si no es una imagen.
+
+    ``task`` reemplaza a ``render`` (p. ej. para además publicar los
+    derivados en un backend remoto); debe ser una función de módulo para
+    que el pool de procesos la pueda ejecutar.
+    """
+    global _pool
+    if not is_image(original):
+        return None
+    with _pending_lock:
+        future = _pending.get(original)
+        if future is not None:
+            return future
+        try:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+            future = _pending[original] = _pool.submit(task or render, original)
+        except Exception as e:
+            print(f"[thumbnails] No se pudo encolar {original}: {e}")
+            return None
+    future.add_done_callback(lambda f: _done(original, f))
+    return future
+
+
+def _done(original, future):
+    with _pending_lock:
+        if _pending.get(original) is future:
+            del _pending[original]
+    if future.exception():
+        print(f"[thumbnails] Error generando derivados de {original}: {future.exception()}")
+
+
+def ensure(path):
+    """
+    Ruta del derivado pedido, generándolo si falta (una sola vez aunque
+    lleguen varias peticiones). None si no es un derivado válido o falló.
+    """
+    if os.path.isfile(path):
+        return path
+    parsed = parse_derivative(path)
+    if not parsed:
+        return None
+    future = schedule(parsed[0])
+    if future is None:
+        return None
+    try:
+        future.result(timeout=RENDER_TIMEOUT)
+    except Exception as e:
+        print(f"[thumbnails] Error esperando {path}: {e}")
+        return None
+    return path if os.path.isfile(path) else None
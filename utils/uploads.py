@@ -0,0 +1,252 @@
+# utils/uploads.py
+"""
+Subidas por partes y reanudables (al estilo tus): se crea la subida con
+su tamaño total, el cliente envía partes indicando el desplazamiento y,
+si la conexión se corta, pregunta el desplazamiento actual y sigue desde
+ahí. Cada parte se escribe directo a disco, así que la memoria no
+depende del tamaño del archivo y ninguna petición retiene a un worker
+más de lo que tarda una parte.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from config_flask import MAX_UPLOAD_SIZE, STAGING_ROOT, UPLOAD_EXTENSIONS
+from utils import file_storage
+
+UPLOAD_DIR = os.path.join(STAGING_ROOT, "subidas")
+# Segundos tras los que una subida sin terminar (o terminada y sin usar) se descarta
+UPLOAD_EXPIRY = 24 * 3600
+# Bytes leídos del cuerpo de la petición por iteración
+READ_SIZE = 64 * 1024
+
+# Primeros bytes esperados según la extensión
+SIGNATURES = {
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "jpg": (b"\xff\xd8\xff",),
+    "jpeg": (b"\xff\xd8\xff",),
+    "gif": (b"GIF87a", b"GIF89a"),
+    "pdf": (b"%PDF-",),
+    "zip": (b"PK\x03\x04", b"PK\x05\x06"),
+    "docx": (b"PK\x03\x04",),
+}
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """Error de una subida; ``status`` es el código HTTP a responder."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _lock(upload_id):
+    with _locks_lock:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def _paths(upload_id):
+    base = os.path.join(UPLOAD_DIR, upload_id)
+    return base + ".json", base + ".part"
+
+
+def _save_meta(meta):
+    meta_path, _ = _paths(meta["id"])
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path)
+
+
+def _valid_id(upload_id):
+    return isinstance(upload_id, str) and len(upload_id) == 32 and upload_id.isalnum()
+
+
+def _signature_ok(extension, head):
+    if extension == "mp4":
+        return head[4:8] == b"ftyp"
+    signatures = SIGNATURES.get(extension)
+    return not signatures or any(head.startswith(sig) for sig in signatures)
+
+
+def create(entidad, filename, length, owner):
+    """
+    Registra una subida nueva después de validar extensión y tamaño.
+
+    Returns
+    -------
+    dict
+        Metadatos de la subida (``id``, ``offset``, ``length``...).
+    """
+    if entidad not in UPLOAD_EXTENSIONS:
+        raise UploadError("Entidad no válida", 404)
+    extension = os.path.splitext(str(filename or ""))[1].lower().lstrip(".")
+    if extension not in UPLOAD_EXTENSIONS[entidad]:
+        raise UploadError(f"Formato no permitido ({', '.join(UPLOAD_EXTENSIONS[entidad])}).", 415)
+    try:
+        length = int(length)
+    except (TypeError, ValueError):
+        raise UploadError("Tamaño no válido.")
+    if length <= 0 or length > MAX_UPLOAD_SIZE:
+        raise UploadError(f"El archivo supera el máximo de {MAX_UPLOAD_SIZE // (1024 * 1024)} MB.", 413)
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    meta = {
+        "id": uuid.uuid4().hex,
+        "entidad": entidad,
+        "nombre": os.path.basename(str(filename)),
+        "extension": extension,
+        "length": length,
+        "owner": owner,
+        "created": time.time(),
+        "url": None,
+    }
+    open(_paths(meta["id"])[1], "wb").close()
+    _save_meta(meta)
+    meta["offset"] = 0
+    return meta
+
+
+def load(upload_id, owner=None):
+    """Metadatos y desplazamiento actual de una subida, o None si no existe (o es de otro usuario)."""
+    if not _valid_id(upload_id):
+        return None
+    meta_path, part_path = _paths(upload_id)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if owner is not None and meta.get("owner") != owner:
+        return None
+    if meta.get("url"):
+        meta["offset"] = meta["length"]
+    elif os.path.exists(part_path):
+        meta["offset"] = os.path.getsize(part_path)
+    else:
+        return None
+    return meta
+
+
+def append(meta, offset, stream, content_length):
+    """
+    Escribe una parte en ``offset``. La parte se copia del cuerpo de la
+    petición en bloques de READ_SIZE; al completar el tamaño se calcula el
+    hash y el archivo pasa al almacenamiento por contenido.
+
+    Returns
+    -------
+    dict
+        Metadatos actualizados (``url`` deja de ser None al completar).
+    """
+    if meta.get("url"):
+        raise UploadError("La subida ya está completa.", 409)
+    if content_length is None:
+        raise UploadError("Falta Content-Length.", 411)
+    _, part_path = _paths(meta["id"])
+    with _lock(meta["id"]):
+        # Otra petición pudo completar (o cancelar) la subida mientras ésta
+        # esperaba el candado: se vuelve a leer el estado ya con el candado
+        fresh = load(meta["id"])
+        if fresh is not None and fresh.get("url"):
+            raise UploadError("La subida ya está completa.", 409)
+        try:
+            current = os.path.getsize(part_path)
+        except FileNotFoundError:
+            current = None
+        if fresh is None or current is None:
+            raise UploadError("La subida ya no está disponible.", 409)
+        meta.update(fresh)
+        if offset != current:
+            raise UploadError(f"Desplazamiento incorrecto: se esperaba {current}.", 409)
+        if offset + content_length > meta["length"]:
+            raise UploadError("La parte excede el tamaño declarado.", 413)
+
+        written = 0
+        with open(part_path, "ab") as out:
+            while written < content_length:
+                chunk = stream.read(min(READ_SIZE, content_length - written))
+                if not chunk:
+                    break
+                if offset == 0 and written == 0 and not _signature_ok(meta["extension"], chunk):
+                    raise UploadError("El contenido no corresponde al tipo de archivo.", 415)
+                out.write(chunk)
+                written += len(chunk)
+        meta["offset"] = offset + written
+        if meta["offset"] == meta["length"]:
+            _finish(meta, part_path)
+    return meta
+
+
+def _finish(meta, part_path):
+    digest = hashlib.sha256()
+    with open(part_path, "rb") as f:
+        for chunk in iter(lambda: f.read(file_storage.CHUNK_SIZE), b""):
+            digest.update(chunk)
+    meta["url"] = file_storage.commit_blob(part_path, digest.hexdigest(), meta["nombre"])
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    _save_meta({k: v for k, v in meta.items() if k != "offset"})
+
+
+def cancel(meta):
+    for path in _paths(meta["id"]):
+        if os.path.exists(path):
+            os.remove(path)
+    with _locks_lock:
+        _locks.pop(meta["id"], None)
+
+
+def resolve(upload_id, owner, entidad):
+    """
+    URL del archivo de una subida completa del usuario, para guardarla en
+    ``archivo_multimedia`` de un registro de ``entidad``; None si no aplica.
+    La subida se conserva hasta UPLOAD_EXPIRY, por si el formulario se
+    vuelve a enviar tras un error de la API.
+    """
+    meta = load(upload_id, owner)
+    if not meta or not meta.get("url") or meta.get("entidad") != entidad:
+        return None
+    return meta["url"]
+
+
+def pending_blobs(now=None):
+    """
+    Hashes de los blobs de subidas completas que todavía no vencieron: aún
+    pueden guardarse en un registro, así que la limpieza no los borra.
+    """
+    now = now or time.time()
+    digests = set()
+    if not os.path.isdir(UPLOAD_DIR):
+        return digests
+    for name in os.listdir(UPLOAD_DIR):
+        if not name.endswith(".json"):
+            continue
+        meta = load(name[:-5])
+        if meta and meta.get("url") and now - meta.get("created", 0) <= UPLOAD_EXPIRY:
+            parsed = file_storage.parse_blob_url(meta["url"])
+            if parsed:
+                digests.add(parsed[0])
+    return digests
+
+
+def purge_expired(now=None):
+    """Elimina las subidas más antiguas que UPLOAD_EXPIRY. Retorna cuántas eliminó."""
+    now = now or time.time()
+    removed = 0
+    if not os.path.isdir(UPLOAD_DIR):
+        return removed
+    for name in os.listdir(UPLOAD_DIR):
+        if not name.endswith(".json"):
+            continue
+        meta = load(name[:-5])
+        if meta and now - meta.get("created", 0) > UPLOAD_EXPIRY:
+            cancel(meta)
+            removed += 1
+    return removed
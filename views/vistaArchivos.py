@@ -0,0 +1,107 @@
+# app/views/vistaArchivos.py
+from flask import Blueprint, abort, current_app, jsonify, request, session, url_for
+from flask_login import current_user, login_required
+
+from config_flask import MAX_CONTENT_LENGTH, UPLOAD_CHUNK_SIZE
+from utils import media_gc, uploads
+
+archivos_bp = Blueprint(
+    "archivos",
+    __name__,
+    template_folder="templates",
+    url_prefix="/archivos"
+)
+
+TUS_VERSION = "1.0.0"
+
+
+def _headers(meta=None):
+    headers = {"Tus-Resumable": TUS_VERSION, "Cache-Control": "no-store"}
+    if meta:
+        headers["Upload-Offset"] = str(meta["offset"])
+        headers["Upload-Length"] = str(meta["length"])
+    return headers
+
+
+def _estado(meta):
+    return {
+        "id": meta["id"],
+        "offset": meta["offset"],
+        "length": meta["length"],
+        "completa": bool(meta.get("url")),
+        "url": url_for("archivos.subida", upload_id=meta["id"]),
+        "tamano_parte": min(UPLOAD_CHUNK_SIZE, current_app.config.get("MAX_CONTENT_LENGTH") or MAX_CONTENT_LENGTH),
+    }
+
+
+def _error(e):
+    return jsonify({"error": str(e)}), e.status, _headers()
+
+
+@archivos_bp.route("/subidas", methods=["POST"])
+@login_required
+def crear_subida():
+    """
+    Crea una subida por partes. JSON: ``entidad``, ``nombre`` y ``tamano``
+    (o el encabezado ``Upload-Length``). La extensión y el tamaño se
+    validan aquí, antes de recibir el primer byte.
+    """
+    datos = request.get_json(silent=True) or {}
+    try:
+        meta = uploads.create(
+            datos.get("entidad"),
+            datos.get("nombre"),
+            datos.get("tamano") or request.headers.get("Upload-Length"),
+            session.get("user_email"),
+        )
+    except uploads.UploadError as e:
+        return _error(e)
+    headers = _headers(meta)
+    headers["Location"] = url_for("archivos.subida", upload_id=meta["id"])
+    return jsonify(_estado(meta)), 201, headers
+
+
+@archivos_bp.route("/subidas/<upload_id>", methods=["HEAD", "GET", "PATCH", "DELETE"])
+@login_required
+def subida(upload_id):
+    """
+    ``HEAD``/``GET``: desplazamiento actual, para reanudar.
+    ``PATCH``: agrega una parte; requiere ``Upload-Offset`` y
+    ``Content-Type: application/offset+octet-stream``.
+    ``DELETE``: cancela la subida.
+    """
+    meta = uploads.load(upload_id, session.get("user_email"))
+    if meta is None:
+        return jsonify({"error": "Subida no encontrada"}), 404, _headers()
+
+    if request.method == "DELETE":
+        uploads.cancel(meta)
+        return "", 204, _headers()
+
+    if request.method == "PATCH":
+        if request.mimetype != "application/offset+octet-stream":
+            return jsonify({"error": "Content-Type no válido"}), 415, _headers()
+        offset = request.headers.get("Upload-Offset", type=int)
+        if offset is None:
+            return jsonify({"error": "Falta Upload-Offset"}), 400, _headers()
+        try:
+            meta = uploads.append(meta, offset, request.stream, request.content_length)
+        except uploads.UploadError as e:
+            return _error(e)
+        except Exception as e:
+            print(f"[ERROR] Error guardando parte de la subida {upload_id}: {e}")
+            return jsonify({"error": "No fue posible guardar la parte"}), 500, _headers()
+
+    return jsonify(_estado(meta)), 200, _headers(meta)
+
+
+@archivos_bp.route("/limpieza", methods=["GET"])
+@login_required
+def limpieza():
+    """Último informe de la limpieza de archivos huérfanos (sólo personal administrativo)."""
+    if not getattr(current_user, "is_staff", False):
+        abort(403)
+    report = media_gc.last_report()
+    if report is None:
+        return jsonify({"error": "Aún no hay informes"}), 404
+    return jsonify(report)
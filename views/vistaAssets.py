@@ -0,0 +1,117 @@
+# app/views/vistaAssets.py
+import mimetypes
+import os
+
+from flask import Blueprint, abort, before_render_template, current_app, g, request, send_file
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup, escape
+from werkzeug.security import safe_join
+
+from config_flask import MEDIA_IMMUTABLE_MAX_AGE
+from utils import assets
+
+assets_bp = Blueprint(
+    "assets",
+    __name__,
+    url_prefix="/assets"
+)
+
+
+@assets_bp.app_template_global("asset_tags")
+def asset_tags(name, kind):
+    """``<link>`` o ``<script>`` del paquete ``name`` (ver utils/assets.BUNDLES)."""
+    if kind == "css":
+        tag = '<link href="{}" rel="stylesheet" type="text/css" />'
+    else:
+        tag = '<script src="{}"></script>'
+    return Markup("\n".join(tag.format(escape(url)) for url in assets.asset_urls(name, kind)))
+
+
+@assets_bp.app_template_global("asset_url")
+def asset_url(path):
+    """URL con hash de un archivo del build, o la de static si no está en el manifiesto."""
+    manifest = assets.get_manifest() or {}
+    if path in manifest:
+        return assets.ASSETS_URL + manifest[path]
+    return assets.STATIC_URL + path
+
+
+def _page_libraries(app, template, context, **extra):
+    # Una petición puede renderizar varias plantillas (parciales): se suman
+    libraries = g.setdefault("page_libraries", [])
+    for name in assets.PAGE_LIBRARIES.get(template.name, []):
+        if name not in libraries:
+            libraries.append(name)
+
+
+@assets_bp.record_once
+def _connect(state):
+    before_render_template.connect(_page_libraries, state.app)
+
+
+@assets_bp.app_template_global("page_libraries")
+def page_libraries():
+    """Librerías de la página actual (ver utils/assets.PAGE_LIBRARIES), separadas por espacios."""
+    return " ".join(g.get("page_libraries", []))
+
+
+@assets_bp.app_template_global("library_preloads")
+def library_preloads():
+    """``<link rel="preload">`` de las librerías de la página, para que se descarguen desde el <head>."""
+    urls = assets.library_urls()
+    tags = []
+    for name in g.get("page_libraries", []):
+        tags += [f'<link rel="preload" href="{escape(url)}" as="style">' for url in urls[name]["css"]]
+        tags += [f'<link rel="preload" href="{escape(url)}" as="script">' for url in urls[name]["js"]]
+    return Markup("\n".join(tags))
+
+
+@assets_bp.app_template_global("library_manifest")
+def library_manifest():
+    """URLs de todas las librerías para js/cargador.js."""
+    return Markup(
+        '<script type="application/json" id="librerias">{}</script>'.format(
+            htmlsafe_json_dumps(assets.library_urls())
+        )
+    )
+
+
+def send_precompressed(directory, filename, max_age):
+    """
+    Envía ``directory/filename`` eligiendo según ``Accept-Encoding`` su
+    versión .br o .gz si existe. Cada versión es otro archivo, así que su
+    ETag también es otro; ``Vary: Accept-Encoding`` evita que un caché
+    intermedio entregue una codificación a quien no la pidió.
+    """
+    path = safe_join(str(directory), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    variant, encoding = assets.precompressed_variant(path, request.accept_encodings)
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    response = send_file(variant, mimetype=mimetype, conditional=True, max_age=max_age)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if path.endswith(assets.PRECOMPRESS_EXTENSIONS):
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def servir_estatico(filename):
+    """Reemplaza a la vista ``static`` de Flask para entregar las versiones precomprimidas."""
+    return send_precompressed(
+        current_app.static_folder, filename, current_app.get_send_file_max_age(filename)
+    )
+
+
+@assets_bp.route("/<path:filename>", methods=["GET", "HEAD"])
+def servir(filename):
+    """
+    Archivos del build. El nombre lleva el hash del contenido, así que se
+    guardan en caché un año sin revalidar.
+    """
+    if filename == "manifest.json":
+        abort(404)
+    response = send_precompressed(assets.DIST_DIR, filename, MEDIA_IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
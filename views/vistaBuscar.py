@@ -0,0 +1,77 @@
+# app/views/vistaBuscar.py
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+
+from utils import expert_matching, keywords, search_index
+from utils.catalogs import ENTITIES
+
+buscar_bp = Blueprint(
+    "buscar",
+    __name__,
+    url_prefix="/buscar"
+)
+
+
+@buscar_bp.route("/", methods=["GET"])
+@login_required
+def buscar():
+    """
+    Búsqueda de texto completo sobre ideas, soluciones y oportunidades.
+
+    Parámetros: ``q`` (texto), ``entidad``, ``foco``, ``tipo``, ``estado``,
+    ``page`` y ``per_page``. Responde con los resultados ordenados por
+    relevancia y los conteos por faceta.
+    """
+    q = request.args.get("q", "").strip()
+    if not q:
+        return jsonify({"total": 0, "resultados": [], "facetas": {}})
+
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 20, type=int), 1), 100)
+    try:
+        resultado = search_index.search(
+            q,
+            entidad=request.args.get("entidad"),
+            foco=request.args.get("foco"),
+            tipo=request.args.get("tipo"),
+            estado=request.args.get("estado"),
+            page=page,
+            per_page=per_page,
+        )
+    except Exception as e:
+        print(f"[ERROR] Error en la búsqueda: {e}")
+        return jsonify({"error": "No fue posible realizar la búsqueda"}), 500
+    return jsonify(resultado)
+
+
+@buscar_bp.route("/palabras-claves", methods=["GET"])
+@login_required
+def autocompletar_palabras_claves():
+    """Sugiere palabras claves existentes que empiezan por ``q``."""
+    q = request.args.get("q", "").strip()
+    if not q:
+        return jsonify({"sugerencias": []})
+    limite = min(max(request.args.get("limite", 10, type=int), 1), keywords.TOP_K)
+    try:
+        sugerencias = keywords.get_trie().suggest(q, limite)
+    except Exception as e:
+        print(f"[ERROR] Error en el autocompletado: {e}")
+        sugerencias = []
+    return jsonify({"sugerencias": sugerencias})
+
+
+@buscar_bp.route("/expertos/<entidad>/<int:codigo>", methods=["GET"])
+@login_required
+def expertos_sugeridos(entidad, codigo):
+    """Expertos cuya área de expertise se parece más al registro (TF-IDF)."""
+    if entidad not in ENTITIES:
+        return jsonify({"error": "Entidad no válida"}), 404
+    limite = min(max(request.args.get("limite", expert_matching.DEFAULT_TOP_K, type=int), 1), 50)
+    try:
+        expertos = expert_matching.experts_for(entidad, codigo, limite)
+    except Exception as e:
+        print(f"[ERROR] Error sugiriendo expertos: {e}")
+        return jsonify({"error": "No fue posible sugerir expertos"}), 500
+    if expertos is None:
+        return jsonify({"error": "Registro no encontrado"}), 404
+    return jsonify({"expertos": expertos})
@@ -0,0 +1,69 @@
+# app/views/vistaEstadisticas.py
+from flask import Blueprint, jsonify, request
+from flask_login import login_required
+
+from utils import rollups
+from utils.api_client import APIClient
+from utils.catalogs import ENTITIES, id_name_map, load_catalogs
+
+estadisticas_bp = Blueprint(
+    "estadisticas",
+    __name__,
+    template_folder="templates",
+    url_prefix="/estadisticas"
+)
+
+
+def _etiquetas(dimension):
+    """Nombres de los valores de foco y tipo; los creadores se muestran por email."""
+    if dimension not in ("foco", "tipo"):
+        return {}
+    try:
+        focos, tipos = load_catalogs(APIClient("idea"))
+    except Exception as e:
+        print(f"[ERROR] Error obteniendo catálogos: {e}")
+        return {}
+    if dimension == "foco":
+        nombres = id_name_map(focos, "id_foco_innovacion")
+    else:
+        nombres = id_name_map(tipos, "id_tipo_innovacion")
+    return {str(k): v for k, v in nombres.items()}
+
+
+@estadisticas_bp.route("/series/<entidad>", methods=["GET"])
+@login_required
+def series(entidad):
+    """
+    Serie temporal de creaciones o aprobaciones para los gráficos de tendencia.
+
+    Parámetros: ``evento`` (creacion, aprobacion), ``periodo`` (dia, semana,
+    mes), ``dimension`` (total, foco, tipo, creador), ``valor`` (repetible;
+    sin él se muestran los de más eventos), ``desde``/``hasta``
+    (AAAA-MM-DD o AAAA-MM) y ``limite``.
+    """
+    if entidad not in ENTITIES:
+        return jsonify({"error": "Entidad no válida"}), 404
+    evento = request.args.get("evento", "creacion")
+    periodo = request.args.get("periodo", "mes")
+    dimension = request.args.get("dimension", "total")
+    if evento not in rollups.EVENTS or periodo not in rollups.GRANULARITIES or dimension not in rollups.DIMENSIONS:
+        return jsonify({"error": "Parámetros no válidos"}), 400
+    desde = rollups.parse_bucket(periodo, request.args.get("desde"))
+    hasta = rollups.parse_bucket(periodo, request.args.get("hasta"))
+    limite = min(max(request.args.get("limite", rollups.DEFAULT_SERIES_LIMIT, type=int), 1), 20)
+    valores = request.args.getlist("valor") or None
+
+    try:
+        resultado = rollups.get_store(entidad).series(evento, periodo, dimension, valores, desde, hasta, limite)
+    except Exception as e:
+        print(f"[ERROR] Error calculando series de {entidad}: {e}")
+        return jsonify({"error": "No fue posible calcular la serie"}), 500
+
+    nombres = _etiquetas(dimension)
+    for serie in resultado["series"]:
+        if dimension == "total":
+            serie["etiqueta"] = "Total"
+        else:
+            serie["etiqueta"] = nombres.get(serie["valor"]) or serie["valor"] or "Sin asignar"
+    resultado.update(evento=evento, periodo=periodo, dimension=dimension)
+    return jsonify(resultado)
@@ -0,0 +1,69 @@
+# app/views/vistaExportar.py
+import os
+import tempfile
+from datetime import datetime
+
+from flask import (
+    Blueprint, Response, request, abort, send_file, stream_with_context, after_this_request, url_for
+)
+from flask_login import login_required
+
+from utils.catalogs import ENTITIES
+from utils.export import iter_export_rows, stream_csv, write_xlsx
+
+exportar_bp = Blueprint(
+    "exportar",
+    __name__,
+    template_folder="templates",
+    url_prefix="/exportar"
+)
+
+
+@exportar_bp.app_template_global("export_url")
+def export_url(entidad, formato=None):
+    """
+    URL de exportación con los filtros del listado actual. ``entidad`` y
+    ``formato`` de la query no se reenvían: chocarían con los argumentos
+    de url_for.
+    """
+    filtros = {k: v for k, v in request.args.items() if k not in ("entidad", "formato")}
+    if formato:
+        filtros["formato"] = formato
+    return url_for("exportar.exportar", entidad=entidad, **filtros)
+
+
+@exportar_bp.route("/<entidad>", methods=["GET"])
+@login_required
+def exportar(entidad):
+    """
+    Exporta ideas, soluciones u oportunidades con los mismos filtros de los
+    listados (tipo_innovacion, foco_innovacion, estado, ``tag``).
+
+    ``formato=csv`` (por defecto) se envía en streaming fila por fila;
+    ``formato=xlsx`` se escribe en modo write_only a un archivo
+    temporal y luego se envía.
+    """
+    if entidad not in ENTITIES:
+        abort(404)
+
+    formato = request.args.get("formato", "csv").lower()
+    nombre = f"{entidad}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    filas = iter_export_rows(entidad, request.args)
+
+    if formato == "xlsx":
+        fd, path = tempfile.mkstemp(suffix=".xlsx", prefix="exportar_")
+        os.close(fd)
+        write_xlsx(filas, path)
+
+        @after_this_request
+        def _borrar_temporal(response):
+            response.call_on_close(lambda: os.remove(path))
+            return response
+
+        return send_file(path, as_attachment=True, download_name=f"{nombre}.xlsx")
+
+    return Response(
+        stream_with_context(stream_csv(filas)),
+        mimetype="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={nombre}.csv"},
+    )
@@ -1,13 +1,13 @@
 # app/views/ideas.py
 from flask import (
-    Blueprint, render_template, request, redirect, url_for, flash, session, current_app
+    Blueprint, render_template, request, redirect, url_for, flash, session, current_app, jsonify, abort
 )
-from flask_login import login_required
+from flask_login import current_user, login_required
 from datetime import datetime
-from werkzeug.utils import secure_filename
 from utils.api_client import APIClient
+from utils.pagination import decode_cursor, encode_cursor
 from forms.formsIdea import IdeaForm
-import os
+from utils import duplicates, evaluation, feed, file_storage, indices, tag_index, uploads
 
 ideas_bp = Blueprint(
     "ideas",
@@ -17,57 +17,20 @@ ideas_bp = Blueprint(
 )
 
 idea_client = APIClient("idea")
-
-UPLOAD_FOLDER = os.path.join("static", "uploads")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+perfil_client = APIClient("perfil")
 
 
 @ideas_bp.route("/", methods=["GET"])
 @login_required
 def list_ideas():
     try:
-        # Obtener todas las ideas
-        ideas = idea_client.get_all()
         focos = idea_client.fetch_endpoint_data("foco_innovacion")
         tipos = idea_client.fetch_endpoint_data("tipo_innovacion")
 
-        # ✅ OBTENER PARÁMETROS DE FILTRADO DE LA URL
-        tipo_filtro = request.args.get("tipo_innovacion", "").strip()
-        foco_filtro = request.args.get("foco_innovacion", "").strip()
-        estado_filtro = request.args.get("estado", "").strip()
-
-        # ✅ APLICAR FILTROS
-        ideas_filtradas = ideas
-
-        # Filtrar por tipo de innovación
-        if tipo_filtro:
-            ideas_filtradas = [
-                idea for idea in ideas_filtradas 
-                if str(idea.get("id_tipo_innovacion", "")) == tipo_filtro
-            ]
-
-        # Filtrar por foco de innovación
-        if foco_filtro:
-            ideas_filtradas = [
-                idea for idea in ideas_filtradas 
-                if str(idea.get("id_foco_innovacion", "")) == foco_filtro
-            ]
-
-        # Filtrar por estado
-        if estado_filtro:
-            # Convertir el filtro a booleano
-            if estado_filtro == "1":
-                # Ideas aprobadas (estado = True)
-                ideas_filtradas = [
-                    idea for idea in ideas_filtradas 
-                    if idea.get("estado") is True or idea.get("estado") == 1 or idea.get("estado") == "1"
-                ]
-            elif estado_filtro == "0":
-                # Ideas pendientes (estado = False)
-                ideas_filtradas = [
-                    idea for idea in ideas_filtradas 
-                    if idea.get("estado") is False or idea.get("estado") == 0 or idea.get("estado") == "0"
-                ]
+        # ✅ APLICAR FILTROS (tipo, foco, estado y palabras claves) sobre el modelo
+        # de lectura en memoria; el resultado ya viene ordenado por fecha
+        resultado = tag_index.query("ideas", request.args)
+        ideas_filtradas = resultado["registros"]
 
         # Preparar el formulario
         form = IdeaForm()
@@ -78,6 +41,7 @@ def list_ideas():
         current_app.logger.exception("Error al obtener ideas")
         flash(f"Error al obtener las ideas: {e}", "danger")
         ideas_filtradas, focos, tipos = [], [], []
+        resultado = {"tags": [], "facetas": {"tag": []}}
         form = IdeaForm()
 
     # ✅ PASAR LAS IDEAS FILTRADAS AL TEMPLATE
@@ -86,7 +50,13 @@ def list_ideas():
         ideas=ideas_filtradas,
         focos=focos, 
         tipos=tipos, 
-        form=form
+        form=form,
+        selected_tipo=request.args.get("tipo_innovacion", ""),
+        selected_foco=request.args.get("foco_innovacion", ""),
+        selected_estado=request.args.get("estado", ""),
+        tags_seleccionados=resultado["tags"],
+        tag_facetas=resultado["facetas"]["tag"],
+        endpoint="ideas.list_ideas"
     )
 
 
@@ -139,7 +109,8 @@ def update_idea(codigo_idea):
             "recursos_requeridos": form.recursos_requeridos.data,
             "fecha_creacion": form.fecha_creacion.data.strftime("%Y-%m-%d")
         }
-        idea_client.update("codigo_idea", codigo_idea, payload)
+        idea_client.update_by_key("codigo_idea", codigo_idea, payload)
+        indices.on_updated("ideas", idea[0], dict(idea[0], **payload, codigo_idea=codigo_idea))
         flash("Idea actualizada correctamente", "success")
         return redirect(url_for("ideas.list_ideas"))
 
@@ -154,7 +125,8 @@ def delete_idea(codigo_idea):
         return redirect(url_for("ideas.list_ideas"))
 
     if request.method == "POST":
-        idea_client.delete("codigo_idea", codigo_idea)
+        idea_client.delete_by_key("codigo_idea", codigo_idea)
+        indices.on_deleted("ideas", idea[0])
         flash("Idea eliminada correctamente", "success")
         return redirect(url_for("ideas.list_ideas"))
 
@@ -170,7 +142,10 @@ def confirmar_idea(codigo_idea):
         return redirect(url_for("ideas.list_ideas"))
 
     if request.method == "POST" and request.form.get("confirmar"):
-        idea_client.confirm("codigo_idea", codigo_idea)
+        if idea_client.confirm("codigo_idea", codigo_idea) is None:
+            flash("No se pudo confirmar la idea", "error")
+            return redirect(url_for("ideas.list_ideas"))
+        indices.on_updated("ideas", idea[0], dict(idea[0], estado=True))
         flash("Idea confirmada exitosamente", "success")
         return redirect(url_for("ideas.list_ideas"))
 
@@ -205,16 +180,16 @@ def create_idea():
         archivo_url = ""  # ✅ String vacío en lugar de None
         if form.archivo_multimedia.data:
             archivo = form.archivo_multimedia.data
-            filename = secure_filename(archivo.filename)
-            path = os.path.join(UPLOAD_FOLDER, filename)
-            print(f"📁 Guardando archivo en: {path}")
+            print(f"📁 Guardando archivo: {archivo.filename}")
             try:
-                archivo.save(path)
-                archivo_url = f"/{path}"
+                archivo_url = file_storage.save_file(archivo) or ""
                 print(f"✅ Archivo guardado correctamente en {archivo_url}")
             except Exception as e:
                 print(f"❌ Error al guardar archivo: {e}")
                 flash("Error al guardar el archivo.", "danger")
+        elif request.form.get("archivo_subido"):
+            # Archivo enviado antes por partes (/archivos/subidas)
+            archivo_url = uploads.resolve(request.form["archivo_subido"], session.get("user_email"), "ideas") or ""
 
         # ----- Construir payload -----
         # ✅ CORREGIDO: Manejar valores None y campos opcionales
@@ -258,6 +233,7 @@ def create_idea():
                 print(f"📦 Respuesta procesada (dict): estado={estado}, mensaje={mensaje}")
 
                 if estado in (200, 201) or "creada" in mensaje.lower() or "success" in mensaje.lower():
+                    indices.on_created("ideas", payload)
                     flash("Idea creada exitosamente ✅", "success")
                     print("✅ Idea creada correctamente.")
                     return redirect(url_for("ideas.list_ideas"))
@@ -270,6 +246,7 @@ def create_idea():
             elif hasattr(response, "status_code"):
                 print(f"📦 Respuesta HTTP: {response.status_code} - {response.text}")
                 if response.status_code in (200, 201):
+                    indices.on_created("ideas", payload)
                     flash("Idea creada exitosamente ✅", "success")
                     print("✅ Idea creada correctamente.")
                     return redirect(url_for("ideas.list_ideas"))
@@ -302,17 +279,117 @@ def create_idea():
     return render_template("create_ideas.html", form=form)
 
 
+@ideas_bp.route("/duplicados", methods=["GET"])
+@login_required
+def posibles_duplicados():
+    """
+    Sugiere ideas parecidas a la que se está escribiendo (MinHash/LSH).
+
+    Parámetros: ``titulo``, ``descripcion`` y opcionalmente ``codigo_idea``
+    para excluir la propia idea al editarla.
+    """
+    texto = f"{request.args.get('titulo', '')} {request.args.get('descripcion', '')}".strip()
+    if len(texto) < 10:
+        return jsonify({"duplicados": []})
+    try:
+        similares = duplicates.get_index().query(
+            texto, exclude=request.args.get("codigo_idea", type=int)
+        )
+    except Exception:
+        current_app.logger.exception("Error al buscar ideas duplicadas")
+        similares = []
+    return jsonify({"duplicados": similares})
+
+
 
 # Secciones extra
+def _pesos_de(args):
+    """Pesos enviados como peso_<id_criterio>; los vacíos o inválidos se ignoran."""
+    pesos = {}
+    for campo, valor in args.items():
+        if campo.startswith("peso_") and campo[5:].isdigit() and valor.strip():
+            try:
+                pesos[int(campo[5:])] = float(valor)
+            except ValueError:
+                continue
+    return pesos
+
+
 @ideas_bp.route('/matriz-evaluacion')
+@login_required
 def matriz_evaluacion():
-    return render_template('templatesIdeas/matriz_evaluacion.html')
+    """
+    Ranking de ideas según los puntajes de los evaluadores por criterio.
+    Acepta pesos temporales (peso_<id>) y los filtros de la lista de ideas
+    (tipo_innovacion, foco_innovacion, estado, tag) para acotar la cohorte.
+    """
+    pagina = max(request.args.get("page", 1, type=int), 1)
+    por_pagina = 50
+    pesos = _pesos_de(request.args)
+    try:
+        matriz = evaluation.get_matrix()
+        modelo = tag_index.get_index("ideas")
+        filtros = tag_index.parse_filters(request.args)
+        cohorte = modelo.resolve(modelo.match(filtros)) if filtros else None
+        ranking = matriz.ranking(pesos, cohorte, (pagina - 1) * por_pagina, por_pagina)
+        for fila in ranking["filas"]:
+            fila["idea"] = modelo.get(fila["codigo_idea"]) or {}
+        criterios = matriz.criterios
+    except Exception as e:
+        current_app.logger.exception("Error al calcular la matriz de evaluación")
+        flash(f"Error al calcular la matriz de evaluación: {e}", "danger")
+        ranking, criterios = {"total": 0, "filas": []}, []
+
+    return render_template(
+        'matriz_evaluacion.html',
+        ranking=ranking,
+        criterios=criterios,
+        pesos=pesos,
+        pagina=pagina,
+        paginas=max((ranking["total"] + por_pagina - 1) // por_pagina, 1),
+        max_puntaje=evaluation.MAX_PUNTAJE
+    )
+
+
+@ideas_bp.route('/matriz-evaluacion/evaluar', methods=['POST'])
+@login_required
+def evaluar_idea():
+    """Guarda los puntajes por criterio del usuario actual para una idea."""
+    codigo_idea = request.form.get("codigo_idea", type=int)
+    puntajes = {}
+    for campo, valor in request.form.items():
+        if campo.startswith("criterio_") and campo[9:].isdigit() and valor.strip():
+            try:
+                puntajes[int(campo[9:])] = float(valor)
+            except ValueError:
+                continue
+    if not codigo_idea or not puntajes:
+        flash("Indique la idea y al menos un puntaje", "warning")
+    elif evaluation.submit(codigo_idea, session.get("user_email"), puntajes):
+        flash("Evaluación registrada exitosamente", "success")
+    else:
+        flash("No se pudieron guardar todos los puntajes", "danger")
+    return redirect(url_for("ideas.matriz_evaluacion"))
+
+
+@ideas_bp.route('/matriz-evaluacion/pesos', methods=['POST'])
+@login_required
+def guardar_pesos():
+    """Guarda los pesos de los criterios de evaluación (sólo personal administrativo)."""
+    if not getattr(current_user, "is_staff", False):
+        abort(403)
+    pesos = _pesos_de(request.form)
+    if pesos and evaluation.save_pesos(pesos):
+        flash("Pesos actualizados exitosamente", "success")
+    else:
+        flash("No se pudieron actualizar los pesos", "danger")
+    return redirect(url_for("ideas.matriz_evaluacion"))
 
 @ideas_bp.route('/estadisticas', methods=['GET'])
 @login_required
 def estadisticas():
     """
-    Genera las métricas que usa templatesIdeas/estadisticas.html:
+    Genera las métricas que usa estadisticas_ideas.html:
     - total_ideas
     - ideas_aprobadas
     - ideas_pendientes
@@ -320,7 +397,6 @@ def estadisticas():
     - ideas_por_foco (lista de tuplas (nombre_foco, cantidad))
     """
     try:
-        ideas = idea_client.get_all() or []
         tipos = idea_client.fetch_endpoint_data("tipo_innovacion") or []
         focos = idea_client.fetch_endpoint_data("foco_innovacion") or []
 
@@ -331,68 +407,49 @@ def estadisticas():
             tid = t.get("id_tipo_innovacion") or t.get("id") or t.get("id_tipo")
             tname = t.get("name") or t.get("nombre") or t.get("tipo") or str(tid)
             if tid is not None:
-                tipo_map[tid] = tname
+                tipo_map[str(tid)] = tname
 
         foco_map = {}
         for f in focos:
             fid = f.get("id_foco_innovacion") or f.get("id") or f.get("id_foco")
             fname = f.get("name") or f.get("nombre") or f.get("foco") or str(fid)
             if fid is not None:
-                foco_map[fid] = fname
-
-        
-        def tipo_label(idea):
-            
-            for k in ("tipo_innovacion", "tipo_nombre", "tipo", "tipo_name"):
-                v = idea.get(k)
-                if v:
-                    return str(v)
-            
-            tid = idea.get("id_tipo_innovacion") or idea.get("tipo_id") or idea.get("id_tipo")
-            if tid is not None and tid in tipo_map:
-                return tipo_map[tid]
-            return "Desconocido"
-
-        def foco_label(idea):
-            for k in ("foco_innovacion", "foco_nombre", "foco", "foco_name"):
-                v = idea.get(k)
-                if v:
-                    return str(v)
-            fid = idea.get("id_foco_innovacion") or idea.get("foco_id") or idea.get("id_foco")
-            if fid is not None and fid in foco_map:
-                return foco_map[fid]
-            return "Desconocido"
-
-        
-        def is_aprobada(idea):
-            e = idea.get("estado")
-            
-            if isinstance(e, bool):
-                return bool(e)
-            if isinstance(e, (int, float)):
-                return int(e) == 1
-            if isinstance(e, str):
-                return e.lower() in ("aprobada", "aprobado", "approved", "true", "1", "si", "sí")
-            return False
-
-        total_ideas = len(ideas)
-        ideas_aprobadas = sum(1 for i in ideas if is_aprobada(i))
+                foco_map[str(fid)] = fname
+
+        # Los conteos salen de los bitmaps del modelo de lectura (tipo, foco,
+        # estado), sin recorrer las ideas
+        modelo = tag_index.get_index("ideas")
+        por_estado = dict(modelo.facets(modelo.all, "estado"))
+        total_ideas = sum(por_estado.values())
+        ideas_aprobadas = por_estado.get("1", 0)
         ideas_pendientes = total_ideas - ideas_aprobadas
 
-        # Agrupaciones
-        por_tipo = Counter(tipo_label(i) for i in ideas)
-        por_foco = Counter(foco_label(i) for i in ideas)
+        def agrupar(campo, nombres, campos_nombre):
+            # Las ideas con un id del catálogo se cuentan por bitmap; el resto
+            # toma el nombre que traiga el registro (o "Desconocido")
+            conteo = Counter()
+            con_nombre = 0
+            for valor, cantidad in modelo.facets(modelo.all, campo):
+                if valor in nombres:
+                    conteo[nombres[valor]] += cantidad
+                    con_nombre |= modelo.match({campo: [valor]})
+            for idea in modelo.fetch(modelo.all & ~con_nombre):
+                etiqueta = next((str(idea[k]) for k in campos_nombre if idea.get(k)), "Desconocido")
+                conteo[etiqueta] += 1
+            return sorted(conteo.items(), key=lambda x: x[1], reverse=True)
 
         # Convertir a listas ordenadas (nombre, cantidad)
-        ideas_por_tipo = sorted(por_tipo.items(), key=lambda x: x[1], reverse=True)
-        ideas_por_foco = sorted(por_foco.items(), key=lambda x: x[1], reverse=True)
+        ideas_por_tipo = agrupar("tipo", tipo_map, ("tipo_innovacion", "tipo_nombre", "tipo", "tipo_name"))
+        ideas_por_foco = agrupar("foco", foco_map, ("foco_innovacion", "foco_nombre", "foco", "foco_name"))
 
         # Opcional: Top generadores (10 primeros)
         creador_key_candidates = lambda idea: idea.get("creador_por") or idea.get("usuario") or idea.get("autor") or idea.get("user_email")
-        top_generadores = Counter(creador_key_candidates(i) or "Anónimo" for i in ideas).most_common(10)
+        top_generadores = Counter(
+            creador_key_candidates(i) or "Anónimo" for i in modelo.fetch(modelo.all)
+        ).most_common(10)
 
         return render_template(
-            "templatesIdeas/estadisticas.html",
+            "estadisticas_ideas.html",
             total_ideas=total_ideas,
             ideas_aprobadas=ideas_aprobadas,
             ideas_pendientes=ideas_pendientes,
@@ -440,76 +497,166 @@ def top_generadores():
         ideas = idea_client.get_all() or []
         creador_key_candidates = lambda idea: idea.get("creador_por") or idea.get("usuario") or idea.get("autor") or idea.get("user_email")
         top_generadores = Counter(creador_key_candidates(i) or "Anónimo" for i in ideas).most_common(10)
+        # Resolver los perfiles de todos los creadores en una sola consulta
+        perfiles = perfil_client.get_many("usuario_email", [email for email, _ in top_generadores])
     except Exception:
         top_generadores = []
+        perfiles = {}
 
-    return render_template("top_generadores.html", top_generadores=top_generadores)
+    return render_template("top_generadores.html", top_generadores=top_generadores, perfiles=perfiles)
 
 from collections import Counter
 
+PAGE_SIZE = 12
+
+
+def _fechas_a_datetime(ideas):
+    """Convierte la fecha de creación a datetime si viene como string para usar strftime en el template."""
+    for idea in ideas:
+        fecha = idea.get("fecha_creacion")
+        if isinstance(fecha, str):
+            try:
+                idea["fecha_creacion"] = datetime.strptime(fecha[:10], "%Y-%m-%d")
+            except Exception:
+                idea["fecha_creacion"] = None  # evita que falle strftime
+        elif fecha is None:
+            idea["fecha_creacion"] = None
+    return ideas
+
+
+# Ideas pendientes de evaluación: sin estado o no aprobadas
+PENDIENTES = "(estado IS NULL OR estado = FALSE)"
+
+
+def _es_pendiente(idea):
+    return not idea.get("estado")
+
+
+def _pagina_reciente(where_condition, cursor, predicate=None):
+    """
+    Página de ideas de la más reciente a la más antigua (las que no tienen
+    fecha al final), paginada por (fecha_creacion, codigo_idea) en la API.
+    ``predicate`` es el equivalente en Python de ``where_condition``.
+
+    Returns
+    -------
+    tuple
+        (ideas, cursor de la siguiente página o None).
+    """
+    after = decode_cursor(cursor)
+    try:
+        after = (after[0], int(after[1])) if after else None
+    except (TypeError, ValueError):
+        after = None
+    ideas = idea_client.get_keyset_page(
+        "fecha_creacion", "codigo_idea", after, where_condition, PAGE_SIZE, predicate
+    )
+    siguiente = None
+    if len(ideas) == PAGE_SIZE:
+        ultima = ideas[-1]
+        siguiente = encode_cursor(ultima["fecha_creacion"], ultima["codigo_idea"])
+    return _fechas_a_datetime(ideas), siguiente
+
+
+def _pagina_evaluacion(cursor):
+    """Ideas pendientes de evaluación, con sus posibles duplicados."""
+    ideas_pendientes, siguiente = _pagina_reciente(PENDIENTES, cursor, _es_pendiente)
+    grupos_duplicados = {}
+    try:
+        indice = duplicates.get_index()
+        for idea in ideas_pendientes:
+            similares = indice.query(
+                duplicates.idea_text(idea), exclude=idea.get("codigo_idea")
+            )
+            if similares:
+                grupos_duplicados[idea.get("codigo_idea")] = [s["codigo_idea"] for s in similares]
+    except Exception:
+        current_app.logger.exception("Error al buscar ideas duplicadas")
+    return {
+        "ideas_pendientes": ideas_pendientes,
+        "grupos_duplicados": grupos_duplicados,
+        "contenedor": "cola-evaluacion",
+        "siguiente_fragmento": siguiente and url_for("ideas.evaluacion_fragmento", cursor=siguiente),
+        "siguiente_pagina": siguiente and url_for("ideas.evaluacion", cursor=siguiente),
+    }
+
+
 @ideas_bp.route("/evaluacion", methods=["GET"])
 @login_required
 def evaluacion():
     """
-    Muestra las ideas pendientes de evaluación.
+    Muestra las ideas pendientes de evaluación, una página a la vez; las
+    siguientes se cargan al desplazarse desde /evaluacion/fragmento.
     """
     try:
-        # Obtener todas las ideas
-        ideas = idea_client.get_all() or []
-
-        ideas_pendientes = []
-        for idea in ideas:
-            # Solo ideas que no estén aprobadas
-            estado = idea.get("estado")
-            aprobada = False
-            if isinstance(estado, bool):
-                aprobada = estado
-            elif isinstance(estado, (int, float)):
-                aprobada = int(estado) == 1
-            elif isinstance(estado, str):
-                aprobada = estado.lower() in ("aprobada", "aprobado", "approved", "true", "1", "si", "sí")
-
-            if not aprobada:
-                # Convertir fecha a datetime si viene como string
-                fecha = idea.get("fecha_creacion")
-                if isinstance(fecha, str):
-                    try:
-                        idea["fecha_creacion"] = datetime.strptime(fecha[:10], "%Y-%m-%d")
-                    except Exception:
-                        idea["fecha_creacion"] = None
-                ideas_pendientes.append(idea)
-
-        return render_template("evaluacion.html", ideas_pendientes=ideas_pendientes)
-
+        contexto = _pagina_evaluacion(request.args.get("cursor"))
     except Exception as e:
         current_app.logger.exception("Error al obtener ideas para evaluación")
         flash(f"Error al obtener ideas pendientes de evaluación: {e}", "danger")
-        return render_template("evaluacion_ideas.html", ideas_pendientes=[])
+        contexto = {"ideas_pendientes": []}
+    return render_template("evaluacion_ideas.html", **contexto)
+
+
+@ideas_bp.route("/evaluacion/fragmento", methods=["GET"])
+@login_required
+def evaluacion_fragmento():
+    """Siguiente página de la cola de evaluación como fragmento HTML."""
+    try:
+        contexto = _pagina_evaluacion(request.args.get("cursor"))
+    except Exception:
+        current_app.logger.exception("Error al obtener ideas para evaluación")
+        return "", 502
+    return render_template("partials/tarjetas_evaluacion.html", **contexto)
+
+
+def _pagina_mercado(orden, cursor):
+    """
+    Página del mercado: por defecto el ranking personalizado del usuario
+    (utils.feed, cursor = posición); con ``orden=recientes`` las más
+    recientes primero (cursor = última fecha y código).
+    """
+    if orden == "recientes":
+        ideas_mercado, siguiente = _pagina_reciente(None, cursor)
+    else:
+        try:
+            posicion = int(cursor or 0)
+        except ValueError:
+            posicion = 0
+        ideas_mercado, siguiente = feed.page(session.get("user_email"), posicion, PAGE_SIZE)
+        _fechas_a_datetime(ideas_mercado)
+    orden = "recientes" if orden == "recientes" else None
+    return {
+        "ideas_mercado": ideas_mercado,
+        "orden": orden,
+        "contenedor": "mercado-ideas",
+        "siguiente_fragmento": siguiente is not None and url_for("ideas.mercado_fragmento", orden=orden, cursor=siguiente),
+        "siguiente_pagina": siguiente is not None and url_for("ideas.mercado", orden=orden, cursor=siguiente),
+    }
 
 
 @ideas_bp.route("/mercado", methods=["GET"])
 @login_required
 def mercado():
     """
-    Muestra el mercado de ideas.
-    Convierte la fecha de creación a datetime si viene como string para usar strftime en el template.
+    Muestra el mercado de ideas, una página a la vez; las siguientes se
+    cargan al desplazarse desde /mercado/fragmento.
     """
     try:
-        ideas_mercado = idea_client.get_all() or []
-
-        for idea in ideas_mercado:
-            fecha = idea.get("fecha_creacion")
-            if isinstance(fecha, str):
-                try:
-                    idea["fecha_creacion"] = datetime.strptime(fecha[:10], "%Y-%m-%d")
-                except Exception:
-                    idea["fecha_creacion"] = None  # evita que falle strftime
-            elif fecha is None:
-                idea["fecha_creacion"] = None
-
+        contexto = _pagina_mercado(request.args.get("orden"), request.args.get("cursor"))
     except Exception as e:
         current_app.logger.exception("Error al obtener ideas para el mercado")
         flash(f"Error al obtener ideas del mercado: {e}", "danger")
-        ideas_mercado = []
+        contexto = {"ideas_mercado": [], "orden": request.args.get("orden")}
+    return render_template("mercado_ideas.html", **contexto)
+
 
-    return render_template("mercado_ideas.html", ideas_mercado=ideas_mercado)
\ No newline at end of file
+@ideas_bp.route("/mercado/fragmento", methods=["GET"])
+@login_required
+def mercado_fragmento():
+    """Siguiente página del mercado como fragmento HTML."""
+    try:
+        contexto = _pagina_mercado(request.args.get("orden"), request.args.get("cursor"))
+    except Exception:
+        current_app.logger.exception("Error al obtener ideas para el mercado")
+        return "", 502
+    return render_template("partials/tarjetas_mercado.html", **contexto)
@@ -0,0 +1,69 @@
+# app/views/vistaImportar.py
+import os
+import shutil
+import tempfile
+
+from flask import (
+    Blueprint, render_template, request, jsonify, session, current_app, abort, url_for
+)
+from flask_login import login_required
+
+from utils.bulk_import import ALLOWED_IMPORT_EXTENSIONS, start_import, get_job
+from utils.catalogs import ENTITIES
+
+importar_bp = Blueprint(
+    "importar",
+    __name__,
+    template_folder="templates",
+    url_prefix="/importar"
+)
+
+# Tamaño de bloque al copiar el archivo subido a disco
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+@importar_bp.route("/<entidad>", methods=["GET", "POST"])
+@login_required
+def importar(entidad):
+    """
+    Importación masiva de ideas, soluciones u oportunidades desde CSV/XLSX.
+
+    El POST copia el archivo a disco por bloques, lanza la importación en
+    segundo plano y devuelve el id del trabajo; el progreso se consulta en
+    ``/importar/estado/<job_id>``.
+    """
+    if entidad not in ENTITIES:
+        abort(404)
+
+    if request.method == "GET":
+        return render_template("importar.html", entidad=entidad)
+
+    archivo = request.files.get("archivo")
+    if not archivo or not archivo.filename:
+        return jsonify({"error": "Debe seleccionar un archivo"}), 400
+
+    extension = archivo.filename.rsplit(".", 1)[-1].lower() if "." in archivo.filename else ""
+    if extension not in ALLOWED_IMPORT_EXTENSIONS:
+        return jsonify({"error": "Formato no permitido. Use CSV o XLSX."}), 400
+
+    fd, path = tempfile.mkstemp(suffix=f".{extension}", prefix="importar_")
+    with os.fdopen(fd, "wb") as destino:
+        shutil.copyfileobj(archivo.stream, destino, COPY_BUFFER_SIZE)
+
+    job_id = start_import(
+        current_app._get_current_object(), entidad, path, session.get("user_email", "")
+    )
+    return jsonify({
+        "job_id": job_id,
+        "estado_url": url_for("importar.estado", job_id=job_id),
+    }), 202
+
+
+@importar_bp.route("/estado/<job_id>", methods=["GET"])
+@login_required
+def estado(job_id):
+    job = get_job(job_id)
+    # El progreso y los errores por fila sólo los ve quien lanzó la importación
+    if not job or job.pop("usuario") != session.get("user_email", ""):
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    return jsonify(job)
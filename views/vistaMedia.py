@@ -0,0 +1,96 @@
+# app/views/vistaMedia.py
+import mimetypes
+import os
+
+from flask import Blueprint, Response, abort, current_app, redirect, request, send_file
+
+from config_flask import (
+    BASE_DIR, MEDIA_ACCEL_REDIRECT, MEDIA_IMMUTABLE_MAX_AGE, MEDIA_MAX_AGE, STORAGE_S3_URL_EXPIRY
+)
+from utils import file_storage, thumbnails
+
+media_bp = Blueprint(
+    "media",
+    __name__,
+    url_prefix="/media"
+)
+
+
+@media_bp.app_template_filter("media_url")
+def media_url(value):
+    return file_storage.public_url(value)
+
+
+@media_bp.app_template_filter("miniatura")
+def miniatura(value, width=640, fmt=None):
+    return file_storage.thumbnail_url(value, width, fmt)
+
+
+@media_bp.app_template_filter("srcset")
+def srcset(value, fmt=None):
+    return file_storage.srcset(value, fmt)
+
+
+@media_bp.app_template_filter("es_imagen")
+def es_imagen(value):
+    return thumbnails.is_image(value)
+
+
+def _etag(path, blob):
+    # Los blobs se identifican por su hash (y el sufijo del derivado); los
+    # demás por fecha y tamaño
+    if blob:
+        return blob
+    stat = os.stat(path)
+    return f"{int(stat.st_mtime)}-{stat.st_size}"
+
+
+@media_bp.route("/<path:ruta>", methods=["GET", "HEAD"])
+def servir(ruta):
+    """
+    Archivos multimedia con soporte de Range (para adelantar videos),
+    ETag fuerte con If-None-Match y caché de un año para los blobs por
+    contenido.
+
+    Con MEDIA_ACCEL_REDIRECT el archivo lo envía nginx (X-Accel-Redirect)
+    y con USE_X_SENDFILE el servidor que entienda X-Sendfile; en ambos
+    casos el worker de Python sólo responde los encabezados. Sin ellos,
+    send_file entrega el archivo a ``wsgi.file_wrapper``, que en gunicorn
+    usa sendfile() para las respuestas completas.
+
+    Con un backend remoto (STORAGE_BACKEND='s3') se redirige a la URL
+    firmada del blob y Flask no transmite ningún byte del archivo.
+    """
+    url = file_storage.remote_url(ruta)
+    if url:
+        # Backend remoto: el navegador descarga directo del almacenamiento
+        response = redirect(url, 302)
+        response.cache_control.private = True
+        response.cache_control.max_age = min(MEDIA_MAX_AGE, STORAGE_S3_URL_EXPIRY // 2)
+        return response
+
+    path, blob = file_storage.media_file(ruta)
+    if path is None:
+        abort(404)
+    max_age = MEDIA_IMMUTABLE_MAX_AGE if blob else MEDIA_MAX_AGE
+    etag = _etag(path, blob)
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    accel = current_app.config.get("MEDIA_ACCEL_REDIRECT", MEDIA_ACCEL_REDIRECT)
+    if accel:
+        response = Response(mimetype=mimetype)
+        response.set_etag(etag)
+        response = response.make_conditional(request)
+        if response.status_code != 304:
+            # nginx resuelve Range e If-Range sobre el archivo
+            relativa = os.path.relpath(path, BASE_DIR).replace(os.sep, "/")
+            response.headers["X-Accel-Redirect"] = accel.rstrip("/") + "/" + relativa
+    else:
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=etag, max_age=max_age)
+
+    response.accept_ranges = "bytes"
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if blob:
+        response.cache_control.immutable = True
+    return response
@@ -4,6 +4,7 @@ from flask import (
 from flask_login import login_required
 from utils.api_client import APIClient
 from forms.formsOportunidades import OportunidadForm
+from utils import file_storage, indices, tag_index, uploads
 from datetime import datetime
 
 
@@ -20,7 +21,11 @@ oportunidad_client = APIClient("oportunidad")
 @login_required
 def list_oportunidades():
     try:
-        oportunidades = oportunidad_client.get_all()
+        # Filtros (tipo, foco, estado y palabras claves) resueltos sobre el
+        # modelo de lectura en memoria, del más reciente al más antiguo
+        resultado = tag_index.query("oportunidades", request.args)
+        oportunidades = resultado["registros"]
+
         focos_tipos = {
             "focos": oportunidad_client.fetch_endpoint_data("foco_innovacion"),
             "tipos": oportunidad_client.fetch_endpoint_data("tipo_innovacion")
@@ -41,11 +46,20 @@ def list_oportunidades():
         current_app.logger.exception("Error al procesar oportunidades")
         flash(f"Error al obtener las oportunidades: {e}", "danger")
         oportunidades = []
+        resultado = {"tags": [], "facetas": {"tag": []}}
         form = OportunidadForm()
         form.foco_innovacion.choices = []
         form.tipo_innovacion.choices = []
 
-    return render_template("list_oportunidades.html", oportunidades=oportunidades, form=form)
+    return render_template(
+        "list_oportunidades.html",
+        oportunidades=oportunidades,
+        form=form,
+        selected_estado=request.args.get("estado", ""),
+        tags_seleccionados=resultado["tags"],
+        tag_facetas=resultado["facetas"]["tag"],
+        endpoint="vistaOportunidad.list_oportunidades"
+    )
 
 @oportunidades_bp.route("/create", methods=["GET", "POST"])
 @login_required
@@ -65,6 +79,9 @@ def create_oportunidad():
         form.tipo_innovacion.choices = []
 
     if form.validate_on_submit():
+        archivo_multimedia = file_storage.save_file(request.files.get("archivo_multimedia")) or uploads.resolve(
+            request.form.get("archivo_subido"), session.get("user_email"), "oportunidades"
+        )
         payload = {
             "id_tipo_innovacion": form.tipo_innovacion.data,
             "id_foco_innovacion": form.foco_innovacion.data,
@@ -72,13 +89,14 @@ def create_oportunidad():
             "descripcion": form.descripcion.data,
             "palabras_claves": form.palabras_claves.data,
             "recursos_requeridos": form.recursos_requeridos.data,
-            "archivo_multimedia": None,
+            "archivo_multimedia": archivo_multimedia,
             "creador_por": session.get("user_email"),
             "estado": True
         }
 
         response = oportunidad_client.insert_data(payload)
         if response and response.get("estado") == 201:
+            indices.on_created("oportunidades", payload)
             flash("Oportunidad creada exitosamente", "success")
             return redirect(url_for("vistaOportunidad.list_oportunidades"))
         else:
@@ -118,13 +136,15 @@ def update_oportunidad(codigo_oportunidad):
             "descripcion": form.descripcion.data,
             "palabras_claves": form.palabras_claves.data,
             "recursos_requeridos": form.recursos_requeridos.data,
-            "archivo_multimedia": None,
+            # El formulario de edición no incluye el archivo: se conserva el actual
+            "archivo_multimedia": oportunidad[0].get("archivo_multimedia"),
             "creador_por": oportunidad[0].get("creador_por"),
             "estado": oportunidad[0].get("estado")
         }
 
         response = oportunidad_client.update_by_key("codigo_oportunidad", codigo_oportunidad, payload)
         if response and response.get("estado") == 200:
+            indices.on_updated("oportunidades", oportunidad[0], dict(oportunidad[0], **payload, codigo_oportunidad=codigo_oportunidad))
             flash("Oportunidad actualizada correctamente", "success")
             return redirect(url_for("vistaOportunidad.list_oportunidades"))
         else:
@@ -145,6 +165,7 @@ def delete_oportunidad(codigo_oportunidad):
     if request.method == "POST":
         response = oportunidad_client.delete_by_key("codigo_oportunidad", codigo_oportunidad)
         if response and response.get("estado") == 200:
+            indices.on_deleted("oportunidades", oportunidad[0])
             flash("Oportunidad eliminada correctamente", "success")
             return redirect(url_for("vistaOportunidad.list_oportunidades"))
         else:
@@ -1,62 +1,81 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask_login import login_required
+from datetime import date
 from utils.api_client import APIClient
 from config_flask import API_CONFIG
 from forms.formsPerfil import PerfilForm
+from utils import expert_matching
 
 perfil_bp = Blueprint('perfil', __name__)
 api_client = APIClient(API_CONFIG['base_url'])
+perfil_client = APIClient('perfil')
+
+def _perfil_actual():
+    """(email de la sesión, registro de perfil o None)."""
+    user_email = session.get('user_email')
+    if not user_email:
+        return None, None
+    perfil = perfil_client.get_by_id('usuario_email', user_email)
+    return user_email, (perfil[0] if perfil else None)
 
 @perfil_bp.route('/perfil')
+@login_required
 def view_perfil():
     try:
-        user_id = session.get('user_id')
-        if not user_id:
+        user_email, perfil = _perfil_actual()
+        if not user_email:
             flash('Debe iniciar sesión para ver su perfil', 'error')
             return redirect(url_for('login.login'))
             
-        perfil = api_client.get_user_profile(user_id)
         if not perfil:
             flash('No se pudo cargar el perfil', 'error')
-            return redirect(url_for('dashboard.index'))
+            return redirect(url_for('main.menu'))
             
-        return render_template('perfil/view.html', perfil=perfil)
+        return render_template('mi_perfil.html', perfil=perfil)
     except Exception as e:
         flash(f'Error al cargar el perfil: {str(e)}', 'error')
-        return redirect(url_for('dashboard.index'))
+        return redirect(url_for('main.menu'))
 
-@perfil_bp.route('/perfil/edit', methods=['GET', 'POST'])
+@perfil_bp.route('/perfil/edit', methods=['GET', 'POST'], endpoint='editar_perfil')
+@login_required
 def edit_perfil():
     try:
-        user_id = session.get('user_id')
-        if not user_id:
+        user_email, perfil = _perfil_actual()
+        if not user_email:
             flash('Debe iniciar sesión para editar su perfil', 'error')
             return redirect(url_for('login.login'))
             
-        perfil = api_client.get_user_profile(user_id)
         if not perfil:
             flash('No se pudo cargar el perfil', 'error')
-            return redirect(url_for('dashboard.index'))
+            return redirect(url_for('main.menu'))
             
-        form = PerfilForm(obj=perfil)
+        # La API entrega la fecha como texto; el DateField espera un date
+        datos_form = dict(perfil)
+        try:
+            datos_form['fecha_nacimiento'] = date.fromisoformat(str(perfil.get('fecha_nacimiento'))[:10])
+        except ValueError:
+            datos_form['fecha_nacimiento'] = None
+        form = PerfilForm(data=datos_form)
         
         if form.validate_on_submit():
             data = {
                 'nombre': form.nombre.data,
-                'apellido': form.apellido.data,
-                'email': form.email.data,
-                'telefono': form.telefono.data,
-                'cargo': form.cargo.data,
-                'area': form.area.data
+                'fecha_nacimiento': form.fecha_nacimiento.data.isoformat() if form.fecha_nacimiento.data else None,
+                'direccion': form.direccion.data,
+                'descripcion': form.descripcion.data,
+                'area_expertise': form.area_expertise.data,
+                'info_adicional': form.info_adicional.data
             }
             
-            if form.password.data:
-                data['password'] = form.password.data
-                
-            api_client.update_user_profile(user_id, data)
+            if perfil_client.update_by_key('usuario_email', user_email, data) is None:
+                flash('No se pudo actualizar el perfil', 'error')
+                return render_template('editar_perfil.html', form=form, perfil=perfil)
+            # Los expertos sugeridos usan el perfil editado sin esperar la resincronización
+            expert_matching.update_expert(dict(perfil, **data, usuario_email=user_email))
             flash('Perfil actualizado exitosamente', 'success')
             return redirect(url_for('perfil.view_perfil'))
             
-        return render_template('perfil/edit.html', form=form, perfil=perfil)
+        return render_template('editar_perfil.html', form=form, perfil=perfil)
     except Exception as e:
         flash(f'Error al actualizar el perfil: {str(e)}', 'error')
         return redirect(url_for('perfil.view_perfil'))
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from models.AuthenticationModel import AuthenticationModel
 from forms.formsRegistro import RegisterForm
+from utils import expert_matching
 from datetime import datetime
 
 register_bp = Blueprint('register', __name__)
@@ -36,6 +37,7 @@ def register_view():
                 
                 # Actualizar perfil
                 if auth_model.update(perfil_data, "email = %s", (user['email'],)):
+                    expert_matching.update_expert(dict(perfil_data, usuario_email=user['email']))
                     flash('Usuario registrado exitosamente. Por favor inicia sesión.', 'success')
                     return redirect(url_for('login.login_view'))
                 else:
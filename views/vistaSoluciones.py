@@ -6,6 +6,7 @@ from flask_login import current_user
 from utils.api_client import APIClient
 from utils.external_api import FocoInnovacionAPI, TipoInnovacionAPI
 from forms.formsSoluciones import SolucionForm
+from utils import expert_matching, file_storage, indices, tag_index, uploads
 from flask_login import login_required
 import requests
 from datetime import datetime
@@ -24,7 +25,11 @@ solucion_client = APIClient("solucion")
 @login_required
 def list_solucion():
     try:
-        soluciones = solucion_client.get_all()
+        # Filtros (tipo, foco, estado y palabras claves) resueltos sobre el
+        # modelo de lectura en memoria, del más reciente al más antiguo
+        resultado = tag_index.query("soluciones", request.args)
+        soluciones = resultado["registros"]
+
         focos_tipos = {
             "focos": solucion_client.fetch_endpoint_data("foco_innovacion"),
             "tipos": solucion_client.fetch_endpoint_data("tipo_innovacion")
@@ -54,13 +59,22 @@ def list_solucion():
         current_app.logger.exception("Error al procesar soluciones")
         flash(f"Error al obtener las soluciones: {e}", "danger")
         soluciones = []
+        resultado = {"tags": [], "facetas": {"tag": []}}
         form = SolucionForm()
         form.foco_innovacion.choices = []
         form.tipo_innovacion.choices = []
 
     current_app.logger.debug(f"Datos de soluciones: {soluciones}")
 
-    return render_template("list_soluciones.html", soluciones=soluciones, form=form)
+    return render_template(
+        "list_soluciones.html",
+        soluciones=soluciones,
+        form=form,
+        selected_estado=request.args.get("estado", ""),
+        tags_seleccionados=resultado["tags"],
+        tag_facetas=resultado["facetas"]["tag"],
+        endpoint="vistaSolucion.list_solucion"
+    )
 
 
 
@@ -98,7 +112,9 @@ def create_solucion():
     if form.validate_on_submit():
         print("[DEBUG] Formulario válido. Enviando datos a la API...")
         archivo = request.files.get('archivo_multimedia')
-        archivo_multimedia = archivo.filename if archivo else None
+        archivo_multimedia = file_storage.save_file(archivo) or uploads.resolve(
+            request.form.get("archivo_subido"), session.get("user_email"), "soluciones"
+        )
 
         payload = {
             "id_tipo_innovacion": form.tipo_innovacion.data,
@@ -150,6 +166,7 @@ def create_solucion():
         # Mejorar el manejo de errores para registrar el mensaje de error de la API
         # Implementar Post/Redirect/Get para evitar reenvío del formulario
         if response and response.get("status_code") == 201:
+            indices.on_created("soluciones", payload)
             current_app.logger.info("Redirigiendo a la lista de soluciones después de creación exitosa.")
             flash("Solución creada exitosamente.", "success")
             return redirect(url_for("vistaSolucion.list_solucion"))
@@ -197,7 +214,8 @@ def update_solucion(codigo_solucion):
             "descripcion": form.descripcion.data,
             "palabras_claves": form.palabras_claves.data,
             "recursos_requeridos": form.recursos_requeridos.data,
-            "archivo_multimedia": None,
+            # El formulario de edición no incluye el archivo: se conserva el actual
+            "archivo_multimedia": solution[0].get("archivo_multimedia"),
             "creador_por": solution[0].get("creador_por"),
             "desarrollador_por": solution[0].get("desarrollador_por"),
             "area_unidad_desarrollo": solution[0].get("area_unidad_desarrollo"),
@@ -207,6 +225,7 @@ def update_solucion(codigo_solucion):
         response = solucion_client.update_by_key("codigo_solucion", codigo_solucion, payload)
 
         if response and response.get("estado") == 200:
+            indices.on_updated("soluciones", solution[0], dict(solution[0], **payload, codigo_solucion=codigo_solucion))
             flash("Solución actualizada correctamente", "success")
             return redirect(url_for("vistaSolucion.list_solucion"))
         else:
@@ -230,6 +249,7 @@ def delete_solucion(codigo_solucion):
         response = solucion_client.delete_by_key("codigo_solucion", codigo_solucion)
 
         if response and response.get("estado") == 200:
+            indices.on_deleted("soluciones", solution[0])
             flash("Solución eliminada correctamente", "success")
             return redirect(url_for("vistaSolucion.list_solucion"))
         else:
@@ -260,11 +280,23 @@ def confirmar_solucion(codigo_solucion):
 
     if request.method == "POST" and request.form.get("confirmar"):
         mensaje_experto = request.form.get("mensaje_experto")
-        solucion_client.confirm("codigo_solucion", codigo_solucion)
+        if solucion_client.confirm("codigo_solucion", codigo_solucion) is None:
+            flash("No se pudo confirmar la solución", "error")
+            return redirect(url_for("vistaSolucion.list_solucion"))
+        indices.on_updated("soluciones", solution[0], dict(solution[0], estado=True))
         flash("Solución confirmada exitosamente", "success")
         return render_template("confirmar_soluciones.html", form=form, solucion=solution[0], mensaje_experto=mensaje_experto)
 
-    return render_template("confirmar_soluciones.html", form=form, solucion=solution[0])
+    # Expertos sugeridos para revisar la solución
+    try:
+        expertos = expert_matching.get_matcher().top_experts(
+            expert_matching.item_text(solution[0]), exclude=solution[0].get("creador_por")
+        )
+    except Exception:
+        current_app.logger.exception("Error al sugerir expertos")
+        expertos = []
+
+    return render_template("confirmar_soluciones.html", form=form, solucion=solution[0], expertos=expertos)
 
 
 @soluciones_bp.route("/calendario", methods=["GET"])